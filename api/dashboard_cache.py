@@ -0,0 +1,104 @@
+from typing import Any, Callable, Dict, Optional, Tuple
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+
+from utils.logger import get_logger
+
+logger = get_logger('api.dashboard_cache')
+
+# 页面中替换为初始数据的占位注释
+INITIAL_DATA_PLACEHOLDER = b'<!--INITIAL_DATA-->'
+
+
+class DashboardEntry:
+    """一次渲染结果：原始和gzip压缩后的页面及各自的ETag"""
+
+    __slots__ = ('body', 'etag', 'gzip_body', 'gzip_etag', 'built_at')
+
+    def __init__(self, body: bytes, built_at: float):
+        digest = hashlib.md5(body).hexdigest()
+        self.body = body
+        self.etag = f'"{digest}"'
+        self.gzip_body = gzip.compress(body, 6)
+        self.gzip_etag = f'"{digest}-gzip"'
+        self.built_at = built_at
+
+
+class DashboardCache:
+    """
+    Dashboard页面缓存
+    页面模板只读取一次（文件修改后重新读取），可选地把当前数据以JSON内嵌到页面中；
+    数据版本（最近一次分析运行的ID）变化或超过 max_age 秒时重新渲染
+    模板修改时间和数据版本最多每 check_interval 秒检查一次，期间命中缓存不做任何文件或数据库访问；
+    同一进程内的分析完成后通过 invalidate() 立即失效
+    """
+
+    def __init__(self, path: str, version: Callable[[], Any],
+                 initial_data: Optional[Callable[[], Dict[str, Any]]] = None,
+                 max_age: float = 300, check_interval: float = 5):
+        self.path = path
+        self.version = version
+        self.initial_data = initial_data
+        self.max_age = max_age
+        self.check_interval = check_interval
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._template: Optional[bytes] = None
+        self._template_mtime = None
+        self._key: Optional[Tuple[Any, Any]] = None
+        self._entry: Optional[DashboardEntry] = None
+
+    def get(self) -> Optional[DashboardEntry]:
+        """当前页面，模板文件不存在时返回None"""
+        entry = self._entry
+        now = time.monotonic()
+        if entry is not None and now - self._checked_at < self.check_interval and now - entry.built_at < self.max_age:
+            return entry
+
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+        key = (mtime, self.version())
+        entry = self._entry
+        if entry is not None and key == self._key and time.monotonic() - entry.built_at < self.max_age:
+            self._checked_at = now
+            return entry
+
+        with self._lock:
+            # 等锁期间其他线程可能已重新渲染
+            entry = self._entry
+            if entry is not None and key == self._key and time.monotonic() - entry.built_at < self.max_age:
+                return entry
+            if mtime != self._template_mtime:
+                with open(self.path, 'rb') as f:
+                    self._template = f.read()
+                self._template_mtime = mtime
+            entry = DashboardEntry(self._render(), time.monotonic())
+            self._key, self._entry = key, entry
+            self._checked_at = now
+            logger.debug("Dashboard cache rebuilt", version=key[1], size=len(entry.body))
+            return entry
+
+    def invalidate(self):
+        """丢弃当前渲染结果，下次请求时重新渲染"""
+        with self._lock:
+            self._entry = None
+
+    def _render(self) -> bytes:
+        if self.initial_data is None or INITIAL_DATA_PLACEHOLDER not in self._template:
+            return self._template
+        try:
+            data = self.initial_data()
+        except Exception as e:
+            logger.warning(f"Failed to build dashboard initial data: {e}")
+            return self._template
+        # "</" 转义后JSON不会提前结束script标签
+        payload = json.dumps(data, ensure_ascii=False, separators=(',', ':')).replace('</', '<\\/')
+        script = f'<script id="initial-data" type="application/json">{payload}</script>'
+        return self._template.replace(INITIAL_DATA_PLACEHOLDER, script.encode('utf-8'), 1)
@@ -0,0 +1,27 @@
+from concurrent.futures import Executor
+
+from werkzeug.serving import BaseWSGIServer
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """
+    在给定线程池中处理请求的WSGI服务器
+    请求在固定大小的线程池中处理，不再为每个请求新建线程
+    """
+
+    multithread = True
+
+    def __init__(self, host: str, port: int, app, executor: Executor):
+        super().__init__(host, port, app)
+        self.executor = executor
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self._process_request_worker, request, client_address)
+
+    def _process_request_worker(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
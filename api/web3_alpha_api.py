@@ -1,18 +1,31 @@
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Flask, Response, jsonify, request, g
 from flask_cors import CORS
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List
 import os
+import time
 
 from services.web3_alpha_service import Web3AlphaService
+from services.web_monitor_service import WebMonitorService
+from api.dashboard_cache import DashboardCache
+from api.web_monitor_api import WebMonitorAPI
+from config.config import config
+from utils.metrics import metrics
+
+DASHBOARD_FILE = 'web3_alpha_dashboard.html'
 
 
 class Web3AlphaAPI:
     """Web3 Alpha API接口"""
     
-    def __init__(self, service: Web3AlphaService):
+    def __init__(self, service: Web3AlphaService, monitor_service: WebMonitorService = None):
         self.app = Flask(__name__)
         self.service = service
+        self.monitor_service = monitor_service
+        
+        # 旧数据库可能还没有后续版本新增的表（如 analysis_runs），启动时补齐，
+        # 否则在第一次分析运行之前数据版本和各接口的查询都会失败
+        self.service.db.init_db()
         
         # Enable CORS for all routes
         CORS(self.app, resources={
@@ -23,7 +36,38 @@ class Web3AlphaAPI:
             }
         })
         
+        # Dashboard页面缓存在内存中，新的分析批次落库后失效
+        dashboard_config = config.get('dashboard', {})
+        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.dashboard_path = os.path.join(project_root, DASHBOARD_FILE)
+        self.dashboard = DashboardCache(
+            self.dashboard_path,
+            version=self.service.get_data_version,
+            initial_data=self._initial_data if dashboard_config.get('inline_data', True) else None,
+            max_age=dashboard_config.get('max_age_seconds', 300),
+            check_interval=dashboard_config.get('check_interval_seconds', 5)
+        )
+        
         self._setup_routes()
+        self._setup_metrics()
+    
+    def _setup_metrics(self):
+        """记录每个端点的请求延迟"""
+        @self.app.before_request
+        def start_timer():
+            g.request_started = time.perf_counter()
+        
+        @self.app.after_request
+        def record_latency(response):
+            started = g.pop('request_started', None)
+            if started is not None:
+                endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+                labels = {'endpoint': endpoint, 'method': request.method, 'status': response.status_code}
+                metrics.histogram(
+                    'api_request_duration_seconds', 'API request latency per endpoint'
+                ).observe(time.perf_counter() - started, **labels)
+                metrics.counter('api_requests_total', 'API requests per endpoint').inc(**labels)
+            return response
     
     def _setup_routes(self):
         """设置路由"""
@@ -33,30 +77,83 @@ class Web3AlphaAPI:
         
         # API端点
         self.app.route('/api/tokens', methods=['GET', 'OPTIONS'])(self.get_tokens)
+        self.app.route('/api/momentum', methods=['GET', 'OPTIONS'])(self.get_momentum)
         self.app.route('/api/narratives', methods=['GET', 'OPTIONS'])(self.get_narratives)
         self.app.route('/api/hashtags', methods=['GET', 'OPTIONS'])(self.get_hashtags)
+        self.app.route('/api/trending', methods=['GET', 'OPTIONS'])(self.get_trending)
         self.app.route('/api/health', methods=['GET', 'OPTIONS'])(self.health_check)
+        self.app.route('/api/metrics', methods=['GET'])(self.get_metrics)
+        
+        # Web监控查询端点
+        if self.monitor_service is not None:
+            WebMonitorAPI(self.monitor_service).register(self.app)
     
     def serve_dashboard(self):
-        """提供Dashboard页面"""
+        """提供Dashboard页面（内存缓存，支持ETag和gzip）"""
         try:
-            # 获取项目根目录
-            project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            dashboard_path = os.path.join(project_root, 'web3_alpha_dashboard.html')
-            
-            if os.path.exists(dashboard_path):
-                return send_from_directory(project_root, 'web3_alpha_dashboard.html')
-            else:
+            entry = self.dashboard.get()
+            if entry is None:
                 return jsonify({
                     'error': 'Dashboard file not found',
-                    'message': f'web3_alpha_dashboard.html does not exist at {dashboard_path}'
+                    'message': f'{DASHBOARD_FILE} does not exist at {self.dashboard_path}'
                 }), 404
+            
+            if request.accept_encodings['gzip']:
+                body, etag, encoding = entry.gzip_body, entry.gzip_etag, 'gzip'
+            else:
+                body, etag, encoding = entry.body, entry.etag, None
+            
+            headers = {
+                'ETag': etag,
+                'Vary': 'Accept-Encoding',
+                # 内嵌数据会变化，每次都用ETag向服务器确认
+                'Cache-Control': 'no-cache'
+            }
+            if request.if_none_match.contains(etag.strip('"')):
+                return Response(status=304, headers=headers)
+            if encoding:
+                headers['Content-Encoding'] = encoding
+            return Response(body, mimetype='text/html', headers=headers)
         except Exception as e:
             return jsonify({
                 'error': str(e),
                 'message': 'Failed to serve dashboard'
             }), 500
     
+    def _initial_data(self) -> Dict[str, Any]:
+        """内嵌到Dashboard页面中的首屏数据，与对应API的响应格式一致"""
+        return {
+            'tokens': self._tokens_payload('day', 100),
+            'narratives': self._list_payload(self.service.get_narratives()),
+            'hashtags': self._list_payload(self.service.get_hashtags())
+        }
+    
+    def _tokens_payload(self, time_range: str, limit: int) -> Dict[str, Any]:
+        tokens = self.service.get_tokens_by_time_range(time_range, limit)
+        
+        # 格式化日期
+        for token in tokens:
+            token['created_at'] = self._format_date(token['created_at'])
+        
+        return {
+            'data': tokens,
+            'total': len(tokens),
+            'time_range': time_range,
+            # 最近一次运行的状态，partial 表示有数据源未贡献数据
+            'run': self.service.get_latest_run(),
+            'query_time': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+    
+    def _list_payload(self, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        # 格式化日期
+        for item in items:
+            item['updated_at'] = self._format_date(item['updated_at'])
+        
+        return {
+            'data': items,
+            'total': len(items)
+        }
+    
     def get_tokens(self):
         """
         获取代币数据
@@ -68,37 +165,55 @@ class Web3AlphaAPI:
         limit = request.args.get('limit', 100, type=int)
         
         try:
-            tokens = self.service.get_tokens_by_time_range(time_range, limit)
+            return jsonify(self._tokens_payload(time_range, limit))
+        except Exception as e:
+            return jsonify({
+                'error': str(e),
+                'message': 'Failed to fetch tokens data'
+            }), 500
+    
+    def get_momentum(self):
+        """
+        获取代币动量数据
+        支持参数：
+        - sort_by: 排序字段，可选值：momentum, velocity, ewma_score
+        - limit: 返回数量限制，默认100
+        """
+        sort_by = request.args.get('sort_by', 'momentum')
+        limit = request.args.get('limit', 100, type=int)
+        
+        try:
+            states = self.service.get_momentum(limit, sort_by)
             
             # 格式化日期
-            for token in tokens:
-                token['created_at'] = self._format_date(token['created_at'])
+            for state in states:
+                state['first_seen'] = self._format_date(state['first_seen'])
+                state['last_seen'] = self._format_date(state['last_seen'])
             
             return jsonify({
-                'data': tokens,
-                'total': len(tokens),
-                'time_range': time_range,
+                'data': states,
+                'total': len(states),
+                'sort_by': sort_by,
                 'query_time': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             })
         except Exception as e:
             return jsonify({
                 'error': str(e),
-                'message': 'Failed to fetch tokens data'
+                'message': 'Failed to fetch momentum data'
             }), 500
     
     def get_narratives(self):
-        """获取叙事数据"""
+        """
+        获取叙事数据
+        支持参数：
+        - window: 滑动窗口，可选值：1h, 24h, 7d
+        - limit: 返回数量限制，默认20
+        """
+        window = request.args.get('window')
+        limit = request.args.get('limit', 20, type=int)
+        
         try:
-            narratives = self.service.get_narratives()
-            
-            # 格式化日期
-            for narrative in narratives:
-                narrative['updated_at'] = self._format_date(narrative['updated_at'])
-            
-            return jsonify({
-                'data': narratives,
-                'total': len(narratives)
-            })
+            return jsonify(self._list_payload(self.service.get_narratives(window, limit)))
         except Exception as e:
             return jsonify({
                 'error': str(e),
@@ -106,22 +221,48 @@ class Web3AlphaAPI:
             }), 500
     
     def get_hashtags(self):
-        """获取标签数据"""
+        """
+        获取标签数据
+        支持参数：
+        - window: 滑动窗口，可选值：1h, 24h, 7d
+        - limit: 返回数量限制，默认20
+        """
+        window = request.args.get('window')
+        limit = request.args.get('limit', 20, type=int)
+        
+        try:
+            return jsonify(self._list_payload(self.service.get_hashtags(window, limit)))
+        except Exception as e:
+            return jsonify({
+                'error': str(e),
+                'message': 'Failed to fetch hashtags data'
+            }), 500
+    
+    def get_trending(self):
+        """
+        滑动窗口内提及次数最高的代币、标签或叙事
+        支持参数：
+        - kind: token, hashtag, narrative，默认token
+        - window: 滑动窗口，可选值：1h, 24h, 7d
+        - limit: 返回数量限制，默认20
+        """
+        kind = request.args.get('kind', 'token')
+        window = request.args.get('window')
+        limit = request.args.get('limit', 20, type=int)
+        
+        if kind not in ('token', 'hashtag', 'narrative'):
+            kind = 'token'
+        
         try:
-            hashtags = self.service.get_hashtags()
-            
-            # 格式化日期
-            for tag in hashtags:
-                tag['updated_at'] = self._format_date(tag['updated_at'])
-            
             return jsonify({
-                'data': hashtags,
-                'total': len(hashtags)
+                **self._list_payload(self.service.get_heavy_hitters(kind, window, limit)),
+                'kind': kind,
+                'query_time': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             })
         except Exception as e:
             return jsonify({
                 'error': str(e),
-                'message': 'Failed to fetch hashtags data'
+                'message': 'Failed to fetch trending data'
             }), 500
     
     def health_check(self):
@@ -133,7 +274,8 @@ class Web3AlphaAPI:
             return jsonify({
                 'status': 'healthy',
                 'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                'database': 'connected'
+                'database': 'connected',
+                'sources': self.service.get_source_health()
             })
         except Exception as e:
             return jsonify({
@@ -143,6 +285,10 @@ class Web3AlphaAPI:
                 'database': 'disconnected'
             }), 500
     
+    def get_metrics(self):
+        """Prometheus文本格式的指标"""
+        return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+    
     def _format_date(self, date_str: str) -> str:
         """格式化日期字符串"""
         try:
@@ -158,11 +304,11 @@ class Web3AlphaAPI:
 def create_app() -> Flask:
     """应用工厂函数"""
     service = Web3AlphaService()
-    api = Web3AlphaAPI(service)
+    api = Web3AlphaAPI(service, WebMonitorService())
     return api.app
 
 
 if __name__ == '__main__':
     service = Web3AlphaService()
-    api = Web3AlphaAPI(service)
+    api = Web3AlphaAPI(service, WebMonitorService())
     api.run(port=8080)
@@ -0,0 +1,79 @@
+from flask import Flask, jsonify, request
+from datetime import datetime
+
+from services.web_monitor_service import WebMonitorService
+
+
+class WebMonitorAPI:
+    """Web监控查询API，路由挂载在 Web3AlphaAPI 的 Flask 应用上"""
+    
+    MAX_LIMIT = 1000
+    
+    def __init__(self, service: WebMonitorService):
+        self.service = service
+    
+    def register(self, app: Flask):
+        """注册路由"""
+        app.route('/api/monitor/pages', methods=['GET', 'OPTIONS'])(self.get_pages)
+        app.route('/api/monitor/changes', methods=['GET', 'OPTIONS'])(self.get_changes)
+    
+    def _limit(self) -> int:
+        limit = request.args.get('limit', 100, type=int)
+        return max(1, min(limit, self.MAX_LIMIT))
+    
+    def get_pages(self):
+        """
+        获取监控页面列表
+        支持参数：
+        - limit: 每页数量，默认100，最大1000
+        - cursor: 上一页返回的 next_cursor
+        """
+        try:
+            result = self.service.get_pages(request.args.get('cursor'), self._limit())
+            return jsonify({
+                'data': result['data'],
+                'next_cursor': result['next_cursor'],
+                'query_time': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            })
+        except ValueError as e:
+            return jsonify({'error': str(e), 'message': 'Invalid parameters'}), 400
+        except Exception as e:
+            return jsonify({
+                'error': str(e),
+                'message': 'Failed to fetch monitored pages'
+            }), 500
+    
+    def get_changes(self):
+        """
+        获取变更记录（按检测时间倒序）
+        支持参数：
+        - url: 只返回该URL的变更
+        - element_type: 元素类型，可选值：text, images, scripts, styles, links
+        - change_type: added 或 deleted
+        - since / until: 检测时间范围，格式 YYYY-MM-DD[ HH:MM:SS]
+        - limit: 每页数量，默认100，最大1000
+        - cursor: 上一页返回的 next_cursor
+        """
+        args = request.args
+        try:
+            result = self.service.get_changes(
+                url=args.get('url'),
+                element_type=args.get('element_type'),
+                change_type=args.get('change_type'),
+                since=args.get('since'),
+                until=args.get('until'),
+                cursor=args.get('cursor'),
+                limit=self._limit()
+            )
+            return jsonify({
+                'data': result['data'],
+                'next_cursor': result['next_cursor'],
+                'query_time': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            })
+        except ValueError as e:
+            return jsonify({'error': str(e), 'message': 'Invalid parameters'}), 400
+        except Exception as e:
+            return jsonify({
+                'error': str(e),
+                'message': 'Failed to fetch change events'
+            }), 500
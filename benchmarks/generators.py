@@ -0,0 +1,210 @@
+"""
+基准测试用的合成数据生成器
+所有生成器都接收seed，保证多次运行得到完全相同的数据
+"""
+
+from typing import List, Tuple
+from datetime import datetime, timedelta
+import random
+import sqlite3
+
+
+WORDS = (
+    "alpha beta gamma delta market token chain bridge layer yield pool swap "
+    "stake vault oracle launch airdrop wallet ledger block miner validator "
+    "governance proposal treasury liquidity volume price chart breakout"
+).split()
+
+SYMBOLS = [
+    "BTC", "ETH", "SOL", "DOGE", "PEPE", "WIF", "BONK", "ARB", "OP", "LINK",
+    "UNI", "AAVE", "TIA", "SEI", "SUI", "APT", "INJ", "RNDR", "FET", "ONDO"
+]
+
+NARRATIVE_WORDS = ["ai agent", "rwa", "depin", "layer2 rollup", "restake eigen",
+                   "meme", "gamefi", "defi yield", "llm", "play to earn"]
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def generate_html(size_kb: int, seed: int = 0) -> str:
+    """生成大约size_kb大小的HTML页面，包含文本、图片、脚本、样式和链接"""
+    rng = random.Random(seed)
+    parts = [
+        "<!DOCTYPE html><html><head><title>Synthetic page</title>",
+        "<style>body { font-family: sans-serif; } .item { margin: 4px; }</style>",
+        "<script src=\"/static/app.js\"></script>",
+        "</head><body>"
+    ]
+    size = sum(len(p) for p in parts)
+    block = 0
+
+    while size < size_kb * 1024:
+        block += 1
+        section = [
+            f"<div class=\"item\" id=\"item-{block}\">",
+            f"<h2>{_sentence(rng, 4)}</h2>",
+            f"<p>{_sentence(rng, rng.randint(10, 40))}</p>",
+            f"<img src=\"/img/{block}-{rng.randint(0, 9999)}.png\">",
+            f"<a href=\"/page/{block}/{rng.randint(0, 9999)}\">{_sentence(rng, 3)}</a>",
+        ]
+        if block % 10 == 0:
+            section.append(f"<script>window.block{block} = {rng.randint(0, 10 ** 6)};</script>")
+        section.append("</div>\n")
+        chunk = "\n".join(section)
+        parts.append(chunk)
+        size += len(chunk)
+
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def mutate_html(html: str, churn: float, seed: int = 0) -> str:
+    """按churn比例修改页面中的行（文本、图片地址、链接）"""
+    rng = random.Random(seed)
+    lines = html.split("\n")
+    for i, line in enumerate(lines):
+        if rng.random() >= churn:
+            continue
+        if line.startswith("<p>"):
+            lines[i] = f"<p>{_sentence(rng, rng.randint(10, 40))}</p>"
+        elif line.startswith("<img"):
+            lines[i] = f"<img src=\"/img/changed-{rng.randint(0, 10 ** 6)}.png\">"
+        elif line.startswith("<a "):
+            lines[i] = f"<a href=\"/changed/{rng.randint(0, 10 ** 6)}\">{_sentence(rng, 3)}</a>"
+    return "\n".join(lines)
+
+
+def generate_html_pair(size_kb: int, churn: float, seed: int = 0) -> Tuple[str, str]:
+    """生成(旧页面, 新页面)"""
+    old = generate_html(size_kb, seed)
+    return old, mutate_html(old, churn, seed + 1)
+
+
+def generate_reddit_corpus(posts: int, seed: int = 0) -> List[str]:
+    """生成类似Reddit标题/正文的文本，夹杂$代币、#标签、叙事关键词和噪声"""
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(posts):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(8, 60))]
+        for _ in range(rng.randint(0, 4)):
+            words.insert(rng.randrange(len(words)), "$" + rng.choice(SYMBOLS + ["100", "USD", "moon"]))
+        for _ in range(rng.randint(0, 2)):
+            words.insert(rng.randrange(len(words)), "#" + rng.choice(WORDS))
+        if rng.random() < 0.5:
+            words.insert(rng.randrange(len(words)), rng.choice(NARRATIVE_WORDS))
+        texts.append(" ".join(words))
+    return texts
+
+
+def generate_tokens_batch(count: int, seed: int = 0) -> List[dict]:
+    """生成一次运行要保存的代币数据"""
+    rng = random.Random(seed)
+    symbols = SYMBOLS + [f"SYN{i}" for i in range(max(0, count - len(SYMBOLS)))]
+    return [
+        {
+            "symbol": symbol,
+            "name": symbol.title(),
+            "icon_url": f"https://example.com/{symbol}.png",
+            "rank": rank,
+            "alpha_score": round(rng.uniform(0, 100), 2),
+            "heat_level": rng.randint(0, 5)
+        }
+        for rank, symbol in enumerate(symbols[:count], 1)
+    ]
+
+
+def seed_token_history(db_file: str, days: int = 90, runs_per_day: int = 24,
+                       tokens_per_run: int = 50, seed: int = 0):
+    """向tokens表写入多个月的历史数据（每小时一次运行）"""
+    rng = random.Random(seed)
+    symbols = SYMBOLS + [f"SYN{i}" for i in range(tokens_per_run * 4)]
+    now = datetime.now()
+    interval = timedelta(hours=24 / runs_per_day)
+
+    conn = sqlite3.connect(db_file)
+    rows = []
+    for run in range(days * runs_per_day):
+        ts = (now - interval * run).strftime("%Y-%m-%d %H:%M:%S")
+        for rank, symbol in enumerate(rng.sample(symbols, tokens_per_run), 1):
+            rows.append((symbol, symbol.title(), "", rank, round(rng.uniform(0, 100), 2),
+                         rng.randint(0, 5), ts, ts))
+        if len(rows) >= 50000:
+            conn.executemany("""
+                INSERT INTO tokens (symbol, name, icon_url, rank, alpha_score, heat_level, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            rows = []
+    if rows:
+        conn.executemany("""
+            INSERT INTO tokens (symbol, name, icon_url, rank, alpha_score, heat_level, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+    conn.commit()
+    conn.close()
+
+
+def seed_change_events(db_file: str, days: int = 90, urls: int = 200,
+                       checks_per_day: int = 48, change_rate: float = 0.1, seed: int = 0):
+    """向change_events表写入多个月的变更记录（每30分钟一轮检查，部分URL有变更）"""
+    rng = random.Random(seed)
+    element_types = ["text", "text", "text", "images", "links", "scripts", "styles"]
+    url_list = [f"https://example.com/page/{i}" for i in range(urls)]
+    now = datetime.now()
+    interval = timedelta(hours=24 / checks_per_day)
+
+    conn = sqlite3.connect(db_file)
+    rows = []
+    for check in range(days * checks_per_day):
+        ts = (now - interval * check).strftime("%Y-%m-%d %H:%M:%S")
+        for url in url_list:
+            if rng.random() >= change_rate:
+                continue
+            for _ in range(rng.randint(1, 6)):
+                rows.append((url, rng.choice(element_types), rng.choice(("added", "deleted")),
+                             _sentence(rng, 6), "minor", None, ts))
+        if len(rows) >= 50000:
+            conn.executemany("""
+                INSERT INTO change_events (url, element_type, change_type, content, magnitude, version, detected_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            rows = []
+    if rows:
+        conn.executemany("""
+            INSERT INTO change_events (url, element_type, change_type, content, magnitude, version, detected_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+    conn.commit()
+    conn.close()
+
+
+def seed_heavy_hitters(db_file: str, days: int = 7, bucket_minutes: int = 60, items: int = 200,
+                       seed: int = 0):
+    """向heavy_hitters表写入各时间桶的代币/标签/叙事提及次数摘要（与每次运行写入的格式一致）"""
+    rng = random.Random(seed)
+    kinds = {
+        "token": SYMBOLS + [f"SYN{i}" for i in range(items)],
+        "hashtag": [f"#{word}" for word in WORDS] + [f"#tag{i}" for i in range(items)],
+        "narrative": NARRATIVE_WORDS
+    }
+    now = datetime.now()
+    interval = timedelta(minutes=bucket_minutes)
+    ts = now.strftime("%Y-%m-%d %H:%M:%S")
+
+    rows = []
+    for bucket in range(days * 24 * 60 // bucket_minutes):
+        start = now - interval * (bucket + 1)
+        bucket_start = start.strftime("%Y-%m-%d %H:%M:%S")
+        bucket_end = (start + interval).strftime("%Y-%m-%d %H:%M:%S")
+        for kind, names in kinds.items():
+            for name in rng.sample(names, min(len(names), items)):
+                rows.append((kind, bucket_start, bucket_end, name, int(rng.paretovariate(1.2) * 3), 0, ts))
+
+    conn = sqlite3.connect(db_file)
+    conn.executemany("""
+        INSERT OR REPLACE INTO heavy_hitters (kind, bucket_start, bucket_end, item, count, error, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, rows)
+    conn.commit()
+    conn.close()
@@ -0,0 +1,74 @@
+"""
+基于 `python -X importtime` 的导入耗时预算检查
+每个子命令在独立解释器中导入它真正需要的模块，统计总导入耗时，
+并检查是否导入了不该导入的重依赖（如 monitor 导入了 Flask/PRAW）
+"""
+
+from typing import List, Dict, Any
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_FILE = os.path.join(PROJECT_ROOT, 'benchmarks', 'import_budget.json')
+
+
+def measure(module: str = None, code: str = None) -> Dict[str, Any]:
+    """在子进程中导入main（以及可选的module），返回总耗时和已导入模块"""
+    if code is None:
+        code = "import main" + (f"; import {module}" if module else "")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+    )
+
+    total_us = 0
+    modules = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules.add(name.strip())
+        # 只累加顶层导入，嵌套导入已包含在其cumulative中
+        if not name.startswith("  "):
+            total_us += int(cumulative)
+
+    return {"total_ms": total_us / 1000, "modules": modules}
+
+
+def check(repeat: int = 5, budget_file: str = BUDGET_FILE) -> List[Dict[str, Any]]:
+    """按预算文件检查每个子命令，返回违反预算的条目"""
+    with open(budget_file, 'r', encoding='utf-8') as f:
+        budgets = json.load(f)
+
+    # 空解释器启动（site等）的导入耗时与项目无关，从结果中扣除
+    baseline_ms = statistics.median(measure(code="pass")["total_ms"] for _ in range(repeat))
+
+    violations = []
+    print(f"\n📦 Import time budget (median of {repeat} runs, "
+          f"excluding {baseline_ms:.1f}ms interpreter startup)")
+    print(f"{'Command':<12} {'import':>10} {'budget':>10}  heavy modules")
+
+    for command, budget in budgets.items():
+        samples = [measure(budget.get("module")) for _ in range(repeat)]
+        total_ms = statistics.median(s["total_ms"] for s in samples) - baseline_ms
+        imported = samples[0]["modules"]
+        forbidden = sorted(m for m in budget.get("forbidden", [])
+                           if m in imported)
+
+        flag = ""
+        if total_ms > budget["budget_ms"]:
+            flag = " ⚠️"
+            violations.append({"name": f"import.{command}", "total_ms": round(total_ms, 2),
+                               "budget_ms": budget["budget_ms"]})
+        if forbidden:
+            flag = " ⚠️"
+            violations.append({"name": f"import.{command}", "forbidden": forbidden})
+
+        print(f"{command:<12} {total_ms:>8.1f}ms {budget['budget_ms']:>8}ms  "
+              f"{', '.join(forbidden) or '-'}{flag}")
+
+    return violations
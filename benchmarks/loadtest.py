@@ -0,0 +1,248 @@
+"""
+API负载测试
+在合成数据库上启动进程内API（或直接压测已部署的URL），用多个并发客户端按权重请求各接口，
+报告每个接口和整体的吞吐量与 p50/p95/p99 延迟
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+from collections import defaultdict
+import logging
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+import requests
+
+from benchmarks import generators
+from benchmarks.suite import percentile
+
+# 接口名称 -> 可选的请求路径（每次随机取一个）
+ENDPOINTS = {
+    'tokens': ['/api/tokens?time_range=hour', '/api/tokens?time_range=day',
+               '/api/tokens?time_range=week', '/api/tokens?time_range=month',
+               '/api/tokens?time_range=day&limit=20'],
+    'narratives': ['/api/narratives?window=1h', '/api/narratives?window=24h', '/api/narratives?window=7d'],
+    'hashtags': ['/api/hashtags?window=1h', '/api/hashtags?window=24h', '/api/hashtags?window=7d'],
+    'health': ['/api/health'],
+    'dashboard': ['/']
+}
+
+DEFAULT_MIX = 'tokens=5,narratives=2,hashtags=2,health=1'
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """解析 "tokens=5,health=1" 形式的接口权重"""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.strip().partition('=')
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint: {name} (choose from {', '.join(ENDPOINTS)})")
+        mix[name] = float(weight or 1)
+    if not any(mix.values()):
+        raise ValueError("Endpoint mix has no positive weight")
+    return mix
+
+
+def seed_database(db_file: str, days: int = 30, runs_per_day: int = 24, tokens_per_run: int = 50,
+                  seed: int = 0):
+    """生成合成数据库：代币历史、各时间桶的提及次数摘要和一条分析运行记录"""
+    from models.database import TokenModel
+
+    db = TokenModel(db_file)
+    db.init_db()
+    generators.seed_token_history(db_file, days, runs_per_day, tokens_per_run, seed)
+    generators.seed_heavy_hitters(db_file, min(days, 7), 60, tokens_per_run * 2, seed)
+    db.save_source_observations({})
+    db.analyze()
+
+
+class InProcessServer:
+    """在后台线程中运行API（与 main.py api 相同的多线程WSGI服务器），监听随机端口"""
+
+    def __init__(self, db_file: str, host: str = '127.0.0.1', port: int = 0):
+        from werkzeug.serving import make_server
+        from api.web3_alpha_api import Web3AlphaAPI
+        from models.database import TokenModel
+        from services.web3_alpha_service import Web3AlphaService
+
+        service = Web3AlphaService()
+        service.db = TokenModel(db_file)
+        # 每个请求一行的访问日志会成为瓶颈并淹没报告
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        self.server = make_server(host, port, Web3AlphaAPI(service).app, threaded=True)
+        self.url = f"http://{host}:{self.server.server_port}"
+        self._thread = threading.Thread(target=self.server.serve_forever, name='loadtest-api', daemon=True)
+
+    def __enter__(self) -> "InProcessServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self._thread.join(timeout=5)
+
+
+class LoadGenerator:
+    """并发客户端，每个客户端使用自己的keep-alive连接，按权重随机选择接口"""
+
+    def __init__(self, base_url: str, clients: int = 16, mix: Dict[str, float] = None,
+                 timeout: float = 10, seed: int = 0):
+        self.base_url = base_url.rstrip('/')
+        self.clients = clients
+        self.mix = mix or parse_mix(DEFAULT_MIX)
+        self.timeout = timeout
+        self.seed = seed
+        self._lock = threading.Lock()
+        # 接口 -> 延迟样本（秒）；错误按 (接口, 状态或异常类型) 计数
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[Tuple[str, str], int] = defaultdict(int)
+
+    def run(self, duration: float = 30, total_requests: int = None, warmup: float = 1) -> Dict[str, Any]:
+        """运行 duration 秒（或发出 total_requests 个请求后结束），返回统计报告"""
+        names = [name for name, weight in self.mix.items() if weight > 0]
+        weights = [self.mix[name] for name in names]
+
+        # 预热：建立连接、填充缓存和SQLite页缓存，不计入结果
+        self._drive(names, weights, time.monotonic() + warmup, None, record=False)
+
+        self.samples.clear()
+        self.errors.clear()
+        remaining = [total_requests] if total_requests else None
+        started = time.perf_counter()
+        self._drive(names, weights, time.monotonic() + duration if not total_requests else None, remaining)
+        elapsed = time.perf_counter() - started
+        return self.report(elapsed)
+
+    def _drive(self, names: List[str], weights: List[float], deadline: Optional[float],
+               remaining: Optional[List[int]], record: bool = True):
+        threads = [
+            threading.Thread(target=self._client, args=(i, names, weights, deadline, remaining, record),
+                             name=f'loadtest-client-{i}', daemon=True)
+            for i in range(self.clients)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def _client(self, index: int, names: List[str], weights: List[float], deadline: Optional[float],
+                remaining: Optional[List[int]], record: bool):
+        rng = random.Random(self.seed * 1000 + index)
+        session = requests.Session()
+        samples = defaultdict(list)
+        errors = defaultdict(int)
+        try:
+            while True:
+                if deadline is not None and time.monotonic() >= deadline:
+                    break
+                if remaining is not None:
+                    with self._lock:
+                        if remaining[0] <= 0:
+                            break
+                        remaining[0] -= 1
+                name = rng.choices(names, weights)[0]
+                path = rng.choice(ENDPOINTS[name])
+                started = time.perf_counter()
+                try:
+                    response = session.get(self.base_url + path, timeout=self.timeout)
+                    response.content  # 读取完整响应体后再计时
+                    latency = time.perf_counter() - started
+                    if response.status_code >= 400:
+                        errors[(name, str(response.status_code))] += 1
+                    else:
+                        samples[name].append(latency)
+                except requests.RequestException as e:
+                    errors[(name, type(e).__name__)] += 1
+        finally:
+            session.close()
+
+        if record:
+            with self._lock:
+                for name, values in samples.items():
+                    self.samples[name].extend(values)
+                for key, count in errors.items():
+                    self.errors[key] += count
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        """每个接口和整体的请求数、错误数、吞吐量和延迟百分位（毫秒）"""
+        def summarize(values: List[float], errors: int) -> Dict[str, Any]:
+            values = sorted(values)
+            return {
+                'requests': len(values) + errors,
+                'errors': errors,
+                'rps': round((len(values) + errors) / elapsed, 2) if elapsed else 0.0,
+                'mean_ms': round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+                'p50_ms': round(percentile(values, 50) * 1000, 3),
+                'p95_ms': round(percentile(values, 95) * 1000, 3),
+                'p99_ms': round(percentile(values, 99) * 1000, 3),
+                'max_ms': round(values[-1] * 1000, 3) if values else 0.0
+            }
+
+        errors_by_endpoint = defaultdict(int)
+        for (name, _), count in self.errors.items():
+            errors_by_endpoint[name] += count
+
+        endpoints = {
+            name: summarize(self.samples.get(name, []), errors_by_endpoint.get(name, 0))
+            for name in self.mix if name in self.samples or name in errors_by_endpoint
+        }
+        all_samples = [value for values in self.samples.values() for value in values]
+        return {
+            'base_url': self.base_url,
+            'clients': self.clients,
+            'duration_seconds': round(elapsed, 3),
+            'total': summarize(all_samples, sum(errors_by_endpoint.values())),
+            'endpoints': endpoints,
+            'errors': {f"{name} {kind}": count for (name, kind), count in sorted(self.errors.items())}
+        }
+
+
+def print_report(report: Dict[str, Any]):
+    """以表格输出报告"""
+    print(f"\n🚦 {report['base_url']}  clients={report['clients']}  {report['duration_seconds']}s\n")
+    print(f"{'endpoint':<12} {'requests':>9} {'errors':>7} {'req/s':>9} "
+          f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    rows = list(report['endpoints'].items()) + [('total', report['total'])]
+    for name, r in rows:
+        print(f"{name:<12} {r['requests']:>9} {r['errors']:>7} {r['rps']:>9.1f} "
+              f"{r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} {r['max_ms']:>9.2f}")
+    for key, count in report['errors'].items():
+        print(f"  ⚠️  {key}: {count}")
+
+
+def run_loadtest(url: str = None, clients: int = 16, duration: float = 30, total_requests: int = None,
+                 mix: Dict[str, float] = None, days: int = 30, runs_per_day: int = 24,
+                 tokens_per_run: int = 50, db_file: str = None, timeout: float = 10,
+                 seed: int = 0) -> Dict[str, Any]:
+    """
+    url 为空时在合成数据库上启动进程内API；db_file 已存在时直接使用，不存在时生成后保留，
+    都未指定时在临时目录中生成并在结束后删除
+    """
+    if url:
+        report = LoadGenerator(url, clients, mix, timeout, seed).run(duration, total_requests)
+        print_report(report)
+        return report
+
+    workdir = None
+    if db_file is None:
+        workdir = tempfile.mkdtemp(prefix="monitor_page_loadtest_")
+        db_file = os.path.join(workdir, "loadtest_alpha.db")
+    try:
+        if not os.path.exists(db_file):
+            seeding_started = time.perf_counter()
+            seed_database(db_file, days, runs_per_day, tokens_per_run, seed)
+            print(f"🌱 Seeded {db_file} ({days} days x {runs_per_day} runs x {tokens_per_run} tokens, "
+                  f"{os.path.getsize(db_file) / 1024 / 1024:.1f} MB) in {time.perf_counter() - seeding_started:.1f}s")
+
+        with InProcessServer(db_file) as server:
+            report = LoadGenerator(server.url, clients, mix, timeout, seed).run(duration, total_requests)
+        report['database'] = {'file': db_file, 'days': days, 'runs_per_day': runs_per_day,
+                              'tokens_per_run': tokens_per_run}
+        print_report(report)
+        return report
+    finally:
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
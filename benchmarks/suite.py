@@ -0,0 +1,261 @@
+"""
+Monitor / Alpha 热路径基准测试
+每个用例报告吞吐量和 p50/p99 延迟，并可与JSON基线比较以发现性能回退
+"""
+
+from typing import List, Dict, Any, Callable, Optional
+from datetime import datetime, timedelta
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+
+from benchmarks import generators
+
+
+class BenchmarkCase:
+    """单个基准测试用例"""
+
+    def __init__(self, name: str, fn: Callable[[Any], Any],
+                 setup: Callable[[], Any] = None, iterations: int = 50,
+                 items: int = 1, unit: str = "ops"):
+        self.name = name
+        self.fn = fn
+        self.setup = setup
+        self.iterations = iterations
+        # 每次调用处理的工作量（字节、文本条数、行数），用于计算吞吐量
+        self.items = items
+        self.unit = unit
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """最近秩法计算百分位数"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+class BenchmarkRunner:
+    """基准测试运行器"""
+
+    def __init__(self, warmup: int = 3, scale: float = 1.0):
+        self.warmup = warmup
+        self.scale = scale
+
+    def run_case(self, case: BenchmarkCase) -> Dict[str, Any]:
+        """运行单个用例并统计延迟分布"""
+        state = case.setup() if case.setup else None
+        iterations = max(5, int(case.iterations * self.scale))
+
+        for _ in range(self.warmup):
+            case.fn(state)
+
+        samples = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            case.fn(state)
+            samples.append(time.perf_counter() - started)
+
+        samples.sort()
+        total = sum(samples)
+
+        return {
+            "iterations": iterations,
+            "mean_ms": round(total / iterations * 1000, 4),
+            "p50_ms": round(percentile(samples, 50) * 1000, 4),
+            "p99_ms": round(percentile(samples, 99) * 1000, 4),
+            "ops_per_sec": round(iterations / total, 2) if total else 0.0,
+            "throughput": round(iterations * case.items / total, 2) if total else 0.0,
+            "unit": f"{case.unit}/s"
+        }
+
+    def run(self, cases: List[BenchmarkCase], pattern: str = None) -> Dict[str, Dict[str, Any]]:
+        """运行所有（名称包含pattern的）用例"""
+        results = {}
+        for case in cases:
+            if pattern and pattern not in case.name:
+                continue
+            results[case.name] = self.run_case(case)
+            r = results[case.name]
+            print(f"{case.name:<48} p50 {r['p50_ms']:>10.3f} ms  p99 {r['p99_ms']:>10.3f} ms  "
+                  f"{r['throughput']:>14,.1f} {r['unit']}")
+        return results
+
+
+def save_baseline(path: str, results: Dict[str, Dict[str, Any]]):
+    """保存基线"""
+    data = {
+        "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+
+
+def load_baseline(path: str) -> Optional[Dict[str, Any]]:
+    """读取基线，不存在时返回None"""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(baseline: Dict[str, Any], results: Dict[str, Dict[str, Any]],
+            threshold: float = 0.2) -> List[Dict[str, Any]]:
+    """与基线比较p50延迟，返回超过阈值的回退项"""
+    regressions = []
+
+    print(f"\n📊 Compared with baseline from {baseline.get('created_at', 'unknown')}")
+    print(f"{'Benchmark':<48} {'base p50':>10} {'p50':>10} {'change':>8}")
+
+    for name, result in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base or not base["p50_ms"]:
+            continue
+        change = result["p50_ms"] / base["p50_ms"] - 1
+        flag = " ⚠️" if change > threshold else ""
+        print(f"{name:<48} {base['p50_ms']:>10.3f} {result['p50_ms']:>10.3f} {change:>+8.1%}{flag}")
+        if change > threshold:
+            regressions.append({"name": name, "baseline_p50_ms": base["p50_ms"],
+                                "p50_ms": result["p50_ms"], "change": round(change, 4)})
+
+    return regressions
+
+
+def build_cases(workdir: str, quick: bool = False) -> List[BenchmarkCase]:
+    """构建全部基准用例，数据库等临时文件放在workdir中"""
+    from services.web_monitor_service import WebMonitorService
+    from utils.html_extract import BACKENDS, available_backends
+    from models.data_source import TextAnalyzer
+    from models.database import TokenModel, WebMonitorModel
+    from config.config import config
+
+    cases = []
+    monitor = WebMonitorService(WebMonitorModel(os.path.join(workdir, "bench_monitor.db")))
+
+    page_sizes = [10, 100] if quick else [10, 100, 500]
+    churns = [0.01, 0.2]
+
+    for size_kb in page_sizes:
+        iterations = max(5, 2000 // size_kb)
+
+        for churn in churns:
+            old, new = generators.generate_html_pair(size_kb, churn, seed=size_kb)
+            cases.append(BenchmarkCase(
+                f"monitor.detect_changes[{size_kb}kb,churn={churn}]",
+                lambda state, old=old, new=new: monitor._detect_changes(old, new, "bench://page"),
+                iterations=iterations, items=len(old) + len(new), unit="bytes"
+            ))
+
+        # 解析+提取文本和元素，bs4 为原先的实现，可与其他后端对比加速比
+        html = generators.generate_html(size_kb, seed=size_kb)
+        for backend in available_backends():
+            cases.append(BenchmarkCase(
+                f"monitor.extract[{backend},{size_kb}kb]",
+                lambda state, html=html, extract=BACKENDS[backend]: extract(html),
+                iterations=iterations, items=len(html), unit="bytes"
+            ))
+
+    analyzer = TextAnalyzer(config.get_narratives())
+    for posts in ([200, 2000] if quick else [200, 2000, 10000]):
+        corpus = generators.generate_reddit_corpus(posts, seed=posts)
+        cases.append(BenchmarkCase(
+            f"alpha.text_analyze[{posts} texts]",
+            lambda state, corpus=corpus: analyzer.analyze(corpus),
+            iterations=max(5, 20000 // posts), items=posts, unit="texts"
+        ))
+
+    save_db = TokenModel(os.path.join(workdir, "bench_save.db"))
+    save_db.init_db()
+    batch = generators.generate_tokens_batch(50)
+    cases.append(BenchmarkCase(
+        "alpha.save_tokens[50 tokens]",
+        lambda state: save_db.save_tokens(batch),
+        iterations=100, items=len(batch), unit="rows"
+    ))
+
+    days = 30 if quick else 90
+    history_db = TokenModel(os.path.join(workdir, "bench_history.db"))
+    history_db.init_db()
+    generators.seed_token_history(history_db.db_file, days=days)
+
+    for time_range, delta in (("hour", timedelta(hours=1)), ("day", timedelta(days=1)),
+                              ("week", timedelta(weeks=1)), ("month", timedelta(days=30))):
+        start_time = (datetime.now() - delta).strftime("%Y-%m-%d %H:%M:%S")
+        cases.append(BenchmarkCase(
+            f"alpha.get_tokens_by_time_range[{days}d db,{time_range}]",
+            lambda state, start_time=start_time: history_db.get_tokens_by_time_range(start_time, 100),
+            iterations=20, items=1, unit="queries"
+        ))
+
+    # 变更记录查询：多个月历史上的过滤 + 键集分页
+    monitor.db.init_db()
+    generators.seed_change_events(monitor.db.db_file, days=days)
+    week_ago = (datetime.now() - timedelta(weeks=1)).strftime("%Y-%m-%d %H:%M:%S")
+    second_page = monitor.get_changes(limit=100)["next_cursor"]
+    change_queries = (
+        ("latest", {}),
+        ("url", {"url": "https://example.com/page/7"}),
+        ("element_type,week", {"element_type": "images", "since": week_ago}),
+        ("page2", {"cursor": second_page})
+    )
+    for label, params in change_queries:
+        cases.append(BenchmarkCase(
+            f"monitor.get_changes[{days}d db,{label}]",
+            lambda state, params=params: monitor.get_changes(limit=100, **params),
+            iterations=50, items=1, unit="queries"
+        ))
+
+    return cases
+
+
+def print_speedups(results: Dict[str, Dict[str, Any]], reference: str = "bs4"):
+    """打印各HTML提取后端相对于参考后端的加速比"""
+    reference_p50 = {}
+    for name, result in results.items():
+        if name.startswith(f"monitor.extract[{reference},"):
+            reference_p50[name.split(",", 1)[1]] = result["p50_ms"]
+    if not reference_p50:
+        return
+
+    print(f"\n🚀 HTML extraction speedup vs {reference}")
+    for name, result in results.items():
+        if not name.startswith("monitor.extract[") or name.startswith(f"monitor.extract[{reference},"):
+            continue
+        size = name.split(",", 1)[1]
+        if size in reference_p50 and result["p50_ms"]:
+            print(f"{name:<48} {reference_p50[size] / result['p50_ms']:>8.1f}x")
+
+
+def run_suite(pattern: str = None, quick: bool = False, baseline_path: str = None,
+              save: bool = False, threshold: float = 0.2) -> Dict[str, Any]:
+    """运行完整基准测试，可选保存基线或与基线比较"""
+    workdir = tempfile.mkdtemp(prefix="monitor_page_bench_")
+
+    try:
+        print(f"\n⏱️  Running benchmarks{' (quick)' if quick else ''}\n")
+        runner = BenchmarkRunner(scale=0.3 if quick else 1.0)
+        results = runner.run(build_cases(workdir, quick), pattern)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    
+    print_speedups(results)
+
+    regressions = []
+    if baseline_path:
+        if save:
+            save_baseline(baseline_path, results)
+            print(f"\n💾 Baseline saved to {baseline_path}")
+        else:
+            baseline = load_baseline(baseline_path)
+            if baseline:
+                regressions = compare(baseline, results, threshold)
+            else:
+                print(f"\nNo baseline at {baseline_path}; run with --save-baseline first")
+
+    return {"results": results, "regressions": regressions}
@@ -1,80 +1,378 @@
 import json
+import logging
 import os
-from typing import Dict, Any, Optional
+import re
+import threading
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, Any, Optional, Mapping, Tuple, Pattern
+
+
+DEFAULT_DATA_SOURCES = {
+    'reddit': {'enabled': True, 'weight': 1.0, 'client_id': '', 'client_secret': '', 'user_agent': 'web3-alpha-tracker'},
+    'coingecko': {'enabled': True, 'weight': 1.5, 'api_url': 'https://api.coingecko.com/api/v3'},
+    'dexscreener': {'enabled': True, 'weight': 0.7, 'api_url': 'https://api.dexscreener.com/latest/dex/search'}
+}
+
+DEFAULT_MONITOR_SETTINGS = {
+    'timeout': 10,
+    # 下载前的预检层级，按顺序尝试，可选 head、range；为空时总是完整下载
+    'precheck': [],
+    'precheck_range_bytes': 4096,
+    # file:// 目标先比较 (mtime, size, inode)，未变化时不读取文件
+    'file_stat_precheck': True
+}
+
+
+# 各表的默认保留天数，0 表示不清理
+# 删除历史数据需要在 db_maintenance.retention_days 中显式配置，默认只清理失联工作进程的心跳和过期租约
+DEFAULT_RETENTION_DAYS = {
+    'tokens': 0,
+    'narratives': 0,
+    'hashtags': 0,
+    'token_momentum': 0,
+    'analysis_runs': 0,
+    'change_events': 0,
+    'notification_outbox': 0,
+    'page_versions': 0,
+    'page_elements': 0,
+    'web_pages': 0,
+    'monitor_workers': 7
+}
+
+
+def _freeze(value: Any) -> Any:
+    """递归转换为只读结构（dict -> MappingProxyType, list -> tuple）"""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+@dataclass(frozen=True)
+class MonitorTarget:
+    """解析后的单个监控URL及其设置（全局 monitor_defaults 与URL级设置合并后的结果）"""
+    url: str
+    settings: Mapping[str, Any]
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """不可变的预编译配置快照，重新加载时整体替换"""
+    version: int
+    mtime: float
+    raw: Mapping[str, Any]
+    data_sources: Mapping[str, Mapping[str, Any]]
+    weights: Mapping[str, float]
+    narratives: Mapping[str, Tuple[str, ...]]
+    narrative_matchers: Tuple[Tuple[str, Pattern], ...]
+    monitor_defaults: Mapping[str, Any]
+    monitor_targets: Tuple[MonitorTarget, ...]
+    monitor_sharding: Mapping[str, Any]
+    monitor_history: Mapping[str, Any]
+    notifications: Mapping[str, Any]
+    db_maintenance: Mapping[str, Any]
+    serve_all: Mapping[str, Any]
+    heavy_hitters: Mapping[str, Any]
+    source_resilience: Mapping[str, Any]
+    momentum: Mapping[str, float]
+    token_universe: Mapping[str, Any]
+    logging: Mapping[str, Any]
+
+    @classmethod
+    def compile(cls, raw: Dict[str, Any], version: int = 0, mtime: float = 0.0) -> "ConfigSnapshot":
+        """由原始JSON配置构建快照"""
+        data_sources = raw.get('data_sources') or DEFAULT_DATA_SOURCES
+
+        # 权重按配置的原值使用，不做归一化：alpha_score 会持久化并用于动量、回测和历史汇总，
+        # 归一化会让分数的量纲随任何一个权重的修改而整体变化，与已保存的历史不可比较
+        weights = {
+            name: float(source.get('weight', 1.0))
+            for name, source in data_sources.items()
+            if source.get('enabled', True)
+        }
+        if not weights:
+            logging.getLogger('monitor_page.config').warning(
+                "All data sources are disabled; falling back to default data source weights")
+            weights = {name: source['weight'] for name, source in DEFAULT_DATA_SOURCES.items()}
+        # 数据源附带的打分信号（如DexScreener成交量、流动性）作为独立的 "<数据源>_<信号>" 参与打分
+        for name, source in data_sources.items():
+            if name in weights:
+                for signal, weight in source.get('signal_weights', {}).items():
+                    weights[f"{name}_{signal}"] = float(weight)
+
+        narratives = {name: tuple(w.lower() for w in words)
+                      for name, words in raw.get('narratives', {}).items()}
+        # 每个叙事编译成一个正则（关键词子串匹配，与原先的 any(w in text) 等价）
+        narrative_matchers = tuple(
+            (name, re.compile('|'.join(re.escape(w) for w in words)))
+            for name, words in narratives.items() if words
+        )
+
+        monitor_defaults = dict(DEFAULT_MONITOR_SETTINGS)
+        monitor_defaults.update(raw.get('monitor_defaults', {}))
+        monitor_targets = []
+        for entry in raw.get('monitor_urls', []):
+            if isinstance(entry, str):
+                entry = {'url': entry}
+            settings = dict(monitor_defaults)
+            settings.update({k: v for k, v in entry.items() if k != 'url'})
+            monitor_targets.append(MonitorTarget(entry['url'], _freeze(settings)))
+
+        sharding = raw.get('monitor_sharding', {})
+        history = raw.get('monitor_history', {})
+        notifications = raw.get('notifications', {})
+        sinks = list(notifications.get('sinks', []))
+        if not sinks and raw.get('lark_webhook_url'):
+            # 兼容旧配置：只配置了飞书Webhook
+            sinks = [{'type': 'lark', 'url': raw['lark_webhook_url']}]
+        maintenance = raw.get('db_maintenance', {})
+        retention_days = dict(DEFAULT_RETENTION_DAYS)
+        retention_days.update(maintenance.get('retention_days', {}))
+        serve_all = raw.get('serve_all', {})
+        heavy_hitters = raw.get('heavy_hitters', {})
+        resilience = raw.get('source_resilience', {})
+        momentum = raw.get('momentum', {})
+        universe = raw.get('token_universe', {})
+        logging_config = raw.get('logging', {})
+
+        return cls(
+            version=version,
+            mtime=mtime,
+            raw=_freeze(raw),
+            data_sources=_freeze(data_sources),
+            weights=MappingProxyType(weights),
+            narratives=MappingProxyType(narratives),
+            narrative_matchers=narrative_matchers,
+            monitor_defaults=_freeze(monitor_defaults),
+            monitor_targets=tuple(monitor_targets),
+            monitor_sharding=MappingProxyType({
+                'lease_seconds': float(sharding.get('lease_seconds', 300)),
+                'vnodes': int(sharding.get('vnodes', 64))
+            }),
+            monitor_history=MappingProxyType({
+                'enabled': bool(history.get('enabled', True)),
+                'keyframe_interval': max(1, int(history.get('keyframe_interval', 20)))
+            }),
+            notifications=_freeze({
+                'sinks': sinks,
+                'batch_size': int(notifications.get('batch_size', 50)),
+                'retry_seconds': float(notifications.get('retry_seconds', 30)),
+                'drain_timeout': float(notifications.get('drain_timeout', 30))
+            }),
+            db_maintenance=_freeze({
+                'retention_days': retention_days,
+                'batch_size': int(maintenance.get('batch_size', 2000)),
+                'vacuum_step_pages': int(maintenance.get('vacuum_step_pages', 1000)),
+                'schedule': bool(maintenance.get('schedule', False)),
+                'interval_hours': float(maintenance.get('interval_hours', 24))
+            }),
+            serve_all=MappingProxyType({
+                'alpha_interval_seconds': float(serve_all.get('alpha_interval_seconds', 3600)),
+                'monitor_interval_seconds': float(serve_all.get('monitor_interval_seconds', 300)),
+                'workers': max(1, int(serve_all.get('workers', 8))),
+                'run_on_start': bool(serve_all.get('run_on_start', True))
+            }),
+            heavy_hitters=MappingProxyType({
+                'capacity': max(10, int(heavy_hitters.get('capacity', 1000))),
+                'bucket_minutes': max(1, int(heavy_hitters.get('bucket_minutes', 10))),
+                'default_window': heavy_hitters.get('default_window', '24h')
+            }),
+            source_resilience=MappingProxyType({
+                'deadline_seconds': float(resilience.get('deadline_seconds', 60)),
+                'timeout': float(resilience.get('timeout', 10)),
+                'retries': max(0, int(resilience.get('retries', 2))),
+                'backoff_seconds': float(resilience.get('backoff_seconds', 1.0)),
+                'failure_threshold': max(1, int(resilience.get('failure_threshold', 3))),
+                'cooldown_seconds': float(resilience.get('cooldown_seconds', 900))
+            }),
+            momentum=MappingProxyType({
+                'half_life_hours': float(momentum.get('half_life_hours', 24.0))
+            }),
+            token_universe=_freeze({
+                'enabled': universe.get('enabled', True),
+                'cache_file': universe.get('cache_file', 'token_universe.json'),
+                'ttl_hours': universe.get('ttl_hours', 24.0),
+                'aliases': universe.get('aliases', {}),
+                'ignore': universe.get('ignore', [])
+            }),
+            logging=_freeze({
+                'level': logging_config.get('level', 'INFO'),
+                'format': logging_config.get('format', 'text'),
+                'file': logging_config.get('file'),
+                'levels': logging_config.get('levels', {})
+            })
+        )
 
 
 class Config:
     """Configuration management class"""
-    
+
     _instance = None
-    _config: Dict[str, Any] = {}
-    
+
+    # 两次检查config.json修改时间的最小间隔（秒），避免每次读取都stat文件
+    RELOAD_CHECK_INTERVAL = 1.0
+
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
+            cls._instance._snapshot = None
         return cls._instance
-    
+
     def __init__(self):
         """Initialize configuration"""
-        if not self._config:
-            self._load_config()
-    
-    def _load_config(self):
-        """Load configuration file"""
-        config_file = os.path.join(os.path.dirname(__file__), 'config.json')
-        
-        if os.path.exists(config_file):
-            with open(config_file, 'r', encoding='utf-8') as f:
-                self._config = json.load(f)
-        else:
-            self._config = {}
-    
+        if self._snapshot is None:
+            self.config_file = os.path.join(os.path.dirname(__file__), 'config.json')
+            self._reload_lock = threading.Lock()
+            self._last_check = 0.0
+            self._failed_mtime = None
+            snapshot = self._load_snapshot(version=0)
+            if snapshot is None:
+                # 使用默认配置启动，同一个损坏的文件不再重复报错
+                self._failed_mtime = os.stat(self.config_file).st_mtime
+                snapshot = ConfigSnapshot.compile({})
+            self._snapshot = snapshot
+
+    def _load_snapshot(self, version: int) -> Optional[ConfigSnapshot]:
+        """Load and compile configuration file, None if it cannot be parsed"""
+        if not os.path.exists(self.config_file):
+            return ConfigSnapshot.compile({}, version)
+
+        try:
+            mtime = os.stat(self.config_file).st_mtime
+            with open(self.config_file, 'r', encoding='utf-8') as f:
+                return ConfigSnapshot.compile(json.load(f), version, mtime)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            # 日志管道依赖配置（首次加载时本模块尚未初始化完），这里直接用标准库logger：
+            # 管道已配置时经由队列输出，否则由 logging 的 lastResort 写到stderr
+            logging.getLogger('monitor_page.config').error(f"Failed to load {self.config_file}, keeping previous config: {e}")
+            return None
+
+    @property
+    def snapshot(self) -> ConfigSnapshot:
+        """Current configuration snapshot, reloaded when config.json changes"""
+        now = time.monotonic()
+        if now - self._last_check >= self.RELOAD_CHECK_INTERVAL:
+            self._last_check = now
+            self._maybe_reload()
+        return self._snapshot
+
+    def _maybe_reload(self):
+        """Reload configuration if config.json mtime changed"""
+        try:
+            mtime = os.stat(self.config_file).st_mtime
+        except OSError:
+            return
+
+        # 同一个损坏的文件只报一次错
+        if mtime == self._snapshot.mtime or mtime == self._failed_mtime:
+            return
+
+        # 非阻塞：其他线程正在重新加载时直接使用当前快照
+        if not self._reload_lock.acquire(blocking=False):
+            return
+        try:
+            if mtime != self._snapshot.mtime:
+                snapshot = self._load_snapshot(self._snapshot.version + 1)
+                if snapshot is None:
+                    self._failed_mtime = mtime
+                else:
+                    # 单次引用赋值，读取方要么看到旧快照要么看到新快照
+                    self._snapshot = snapshot
+                    from utils.logger import get_logger
+                    get_logger('config').info(f"Configuration reloaded (version {snapshot.version})")
+        finally:
+            self._reload_lock.release()
+
+    def reload(self):
+        """Force reload on next access"""
+        self._last_check = 0.0
+
     def get(self, key: str, default: Any = None) -> Any:
         """Get configuration item"""
-        return self._config.get(key, default)
-    
+        return self.snapshot.raw.get(key, default)
+
     def get_reddit_config(self) -> Dict[str, str]:
         """Get Reddit configuration"""
-        data_sources = self.get('data_sources', {})
-        reddit_config = data_sources.get('reddit', {})
+        reddit_config = self.snapshot.data_sources.get('reddit', {})
         return {
             'client_id': reddit_config.get('client_id', ''),
             'client_secret': reddit_config.get('client_secret', ''),
             'user_agent': reddit_config.get('user_agent', 'web3-alpha-tracker')
         }
-    
-    def get_narratives(self) -> Dict[str, list]:
+
+    def get_narratives(self) -> Mapping[str, Tuple[str, ...]]:
         """Get narrative keywords configuration"""
-        return self.get('narratives', {})
-    
-    def get_weights(self) -> Dict[str, float]:
+        return self.snapshot.narratives
+
+    def get_weights(self) -> Mapping[str, float]:
         """Get data source weights configuration"""
-        weights = {}
-        data_sources = self.get('data_sources', {})
-        for source_name, source_config in data_sources.items():
-            if source_config.get('enabled', True):
-                weights[source_name] = source_config.get('weight', 1.0)
-        return weights if weights else {
-            'reddit': 1.0,
-            'coingecko': 1.5,
-            'dexscreener': 0.7
-        }
-    
-    def get_data_sources(self) -> Dict[str, Dict[str, Any]]:
+        return self.snapshot.weights
+
+    def get_data_sources(self) -> Mapping[str, Mapping[str, Any]]:
         """Get data sources configuration"""
-        return self.get('data_sources', {
-            'reddit': {'enabled': True, 'weight': 1.0, 'client_id': '', 'client_secret': '', 'user_agent': 'web3-alpha-tracker'},
-            'coingecko': {'enabled': True, 'weight': 1.5, 'api_url': 'https://api.coingecko.com/api/v3'},
-            'dexscreener': {'enabled': True, 'weight': 0.7, 'api_url': 'https://api.dexscreener.com/latest/dex/search'}
-        })
+        return self.snapshot.data_sources
+
+    def get_monitor_sharding_config(self) -> Mapping[str, Any]:
+        """Get sharded monitoring (lease/hash ring) configuration"""
+        return self.snapshot.monitor_sharding
+    
+    def get_monitor_history_config(self) -> Mapping[str, Any]:
+        """Get page version history configuration"""
+        return self.snapshot.monitor_history
+    
+    def get_momentum_config(self) -> Mapping[str, float]:
+        """Get momentum scoring configuration"""
+        return self.snapshot.momentum
+
+    def get_token_universe_config(self) -> Mapping[str, Any]:
+        """Get token universe (symbol validation) configuration"""
+        return self.snapshot.token_universe
+
+    def get_logging_config(self) -> Mapping[str, Any]:
+        """Get logging configuration"""
+        return self.snapshot.logging
+
+    def get_notification_config(self) -> Mapping[str, Any]:
+        """Get notification outbox/sink configuration"""
+        return self.snapshot.notifications
+    
+    def get_db_maintenance_config(self) -> Mapping[str, Any]:
+        """Get database retention/compaction configuration"""
+        return self.snapshot.db_maintenance
+    
+    def get_serve_all_config(self) -> Mapping[str, Any]:
+        """Get serve-all supervisor schedule/pool configuration"""
+        return self.snapshot.serve_all
+    
+    def get_heavy_hitters_config(self) -> Mapping[str, Any]:
+        """Get heavy-hitter (top-K mentions) tracking configuration"""
+        return self.snapshot.heavy_hitters
+    
+    def get_source_resilience_config(self) -> Mapping[str, Any]:
+        """Get data source deadline/retry/circuit breaker configuration"""
+        return self.snapshot.source_resilience
     
     def get_lark_webhook_url(self) -> Optional[str]:
         """Get Lark webhook URL"""
         return self.get('lark_webhook_url')
-    
+
     def get_monitor_urls(self) -> list:
         """Get monitor URL list"""
-        return self.get('monitor_urls', [])
+        return [target.url for target in self.snapshot.monitor_targets]
+
+    def get_monitor_targets(self, urls: list = None) -> Tuple[MonitorTarget, ...]:
+        """Get resolved monitor targets with per-URL settings (ad-hoc urls use monitor_defaults)"""
+        snapshot = self.snapshot
+        if urls is None:
+            return snapshot.monitor_targets
+        configured = {target.url: target for target in snapshot.monitor_targets}
+        return tuple(
+            configured.get(url) or MonitorTarget(url, snapshot.monitor_defaults)
+            for url in urls
+        )
 
 
 # Global configuration instance
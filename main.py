@@ -7,35 +7,125 @@ Monitor Page 主入口文件
 import sys
 import os
 import argparse
+import contextlib
 
 # 添加项目根目录到Python路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from scripts.run_web3_alpha import main as run_web3_alpha_main
-from scripts.run_web_monitor import main as run_web_monitor_main
-from api.web3_alpha_api import Web3AlphaAPI
-from services.web3_alpha_service import Web3AlphaService
+# 子命令依赖（Flask、PRAW、BeautifulSoup、NumPy等）都在各自的处理函数中按需导入，
+# 这里只导入轻量模块，保证 cron 触发的短命令启动足够快
+from scripts.run_backtest import parse_grid
+from scripts.run_benchmarks import add_arguments as add_bench_arguments
+from scripts.run_loadtest import add_arguments as add_loadtest_arguments
 from utils.logger import logger
+from utils.metrics import metrics
 
 
 def run_web3_alpha(args):
     """运行Web3 Alpha分析"""
+    from scripts.run_web3_alpha import main as run_web3_alpha_main
+    
     logger.info("Starting Web3 Alpha analysis...")
     return run_web3_alpha_main()
 
 
 def run_web_monitor(args):
     """运行Web监控"""
+    from scripts.run_web_monitor import main as run_web_monitor_main
+    
     logger.info("Starting Web monitoring...")
-    return run_web_monitor_main()
+    return run_web_monitor_main(args.worker_id, args.lease_seconds, args.loop, args.interval, args.watch)
+
+
+def run_page_history(args):
+    """查看页面版本历史"""
+    from scripts.run_page_history import main as run_page_history_main
+    
+    return run_page_history_main(args.url, args.version, args.diff, args.stats, args.output)
+
+
+def run_db_maintenance(args):
+    """数据库维护"""
+    from scripts.run_db_maintenance import main as run_db_maintenance_main
+    
+    return run_db_maintenance_main(args.action, args.database, not args.no_vacuum, not args.no_analyze,
+                                   args.convert, args.json)
+
+
+def run_export(args):
+    """导出数据"""
+    from scripts.run_export import main as run_export_main
+    
+    return run_export_main(args.dataset, args.format, args.output, args.since, args.until,
+                           args.symbol, args.url, args.chunk_size)
+
+
+def run_backtest(args):
+    """运行权重回测"""
+    from scripts.run_backtest import main as run_backtest_main
+    
+    logger.info("Starting weight backtest...")
+    return run_backtest_main(args.days, args.grid, args.samples, args.top_k, args.show)
+
+
+def run_benchmarks(args):
+    """运行基准测试"""
+    from scripts.run_benchmarks import main as run_benchmarks_main
+    
+    logger.info("Starting benchmarks...")
+    return run_benchmarks_main(args.pattern, args.quick, args.baseline, args.save_baseline,
+                               args.threshold, args.fail_on_regression, args.imports_only)
+
+
+def run_loadtest(args):
+    """运行API负载测试"""
+    from scripts.run_loadtest import main as run_loadtest_main
+    
+    logger.info("Starting API load test...")
+    return run_loadtest_main(args.url, args.clients, args.duration, args.total_requests, args.mix,
+                             args.days, args.runs_per_day, args.tokens_per_run, args.db_file,
+                             args.timeout, args.output)
 
 
 def run_api_server(port: int = 8080, host: str = '0.0.0.0'):
     """运行API服务器"""
+    from api.web3_alpha_api import Web3AlphaAPI
+    from services.web3_alpha_service import Web3AlphaService
+    from services.web_monitor_service import WebMonitorService
+    
+    from services.maintenance_service import MaintenanceService
+    
     logger.info(f"Starting API server on {host}:{port}...")
     service = Web3AlphaService()
-    api = Web3AlphaAPI(service)
-    api.run(host=host, port=port, debug=False)
+    monitor_service = WebMonitorService()
+    # 长驻进程内按 db_maintenance.interval_hours 定时维护数据库
+    maintenance = MaintenanceService(service.db, monitor_service.db)
+    maintenance.start()
+    api = Web3AlphaAPI(service, monitor_service)
+    try:
+        api.run(host=host, port=port, debug=False)
+    finally:
+        maintenance.stop()
+
+
+def run_serve_all(args):
+    """单进程运行分析、监控和API"""
+    from scripts.run_serve_all import main as run_serve_all_main
+    
+    return run_serve_all_main(args.host, args.port, args.alpha_interval, args.monitor_interval,
+                              args.workers, args.worker_id, args.no_api)
+
+
+def http_recorder(args):
+    """按 --record/--replay 参数返回HTTP录制回放上下文"""
+    if not (args.record or args.replay):
+        return contextlib.nullcontext()
+    
+    from utils.http_replay import HttpRecorder, parse_latency
+    
+    if args.record:
+        return HttpRecorder(args.record, mode='record')
+    return HttpRecorder(args.replay, mode='replay', latency=parse_latency(args.replay_latency))
 
 
 def main():
@@ -51,11 +141,56 @@ def main():
   # 运行Web监控
   python3 main.py monitor
   
+  # 两个工作进程分片监控（可在不同节点上，共享同一数据库）
+  python3 main.py monitor --worker-id w1 --loop --interval 60
+  python3 main.py monitor --worker-id w2 --loop --interval 60
+  
+  # 监听模式：本地文件变更后立即检查
+  python3 main.py monitor --watch
+  
+  # 查看页面历史版本、还原第3版、比较第3和第5版
+  python3 main.py history https://example.com
+  python3 main.py history https://example.com --version 3 -o v3.html
+  python3 main.py history https://example.com --diff 3 5
+  
   # 启动API服务器
   python3 main.py api --port 8080
+  
+  # 单进程运行：定时分析、监控轮询和API共用线程池与服务实例
+  python3 main.py serve-all --port 8080 --alpha-interval 1800 --monitor-interval 120
+  
+  # 数据库维护：按保留期清理、增量vacuum、刷新统计信息
+  python3 main.py db maintain
+  python3 main.py db stats
+  
+  # 流式导出代币历史、按天汇总或变更事件
+  python3 main.py export tokens --since 2026-01-01 --symbol BTC --symbol ETH -o tokens.csv
+  python3 main.py export changes -f ndjson --since 2026-01-01 --until 2026-02-01 -o changes.ndjson
+  python3 main.py export token_rollups -f parquet -o rollups.parquet
+  
+  # 回测数据源权重
+  python3 main.py backtest --grid 0,0.5,1,1.5,2 --samples 5000
+  
+  # 运行基准测试并与基线比较
+  python3 main.py bench --quick
+  
+  # API负载测试：合成数据库 + 进程内API，或压测已部署的地址
+  python3 main.py loadtest --clients 32 --duration 20 --days 90
+  python3 main.py loadtest --url http://127.0.0.1:8080 --mix tokens=3,health=1
+  
+  # 录制一次真实运行的HTTP流量，之后离线回放
+  python3 main.py --record fixtures/alpha.har.gz alpha
+  python3 main.py --replay fixtures/alpha.har.gz --replay-latency recorded alpha
         """
     )
     
+    parser.add_argument('--metrics-file', help='命令结束后把Prometheus格式指标写入该文件')
+    replay_group = parser.add_mutually_exclusive_group()
+    replay_group.add_argument('--record', metavar='ARCHIVE', help='把本次运行的HTTP响应录制到归档文件')
+    replay_group.add_argument('--replay', metavar='ARCHIVE', help='从归档文件回放HTTP响应，不访问网络')
+    parser.add_argument('--replay-latency', default='zero',
+                        help='回放延迟：recorded（按录制耗时）、zero（默认）或固定秒数')
+    
     subparsers = parser.add_subparsers(dest='command', help='可用命令')
     
     # Web3 Alpha命令
@@ -64,8 +199,23 @@ def main():
     
     # Web监控命令
     monitor_parser = subparsers.add_parser('monitor', help='运行Web页面监控')
+    monitor_parser.add_argument('--worker-id', help='以分片模式运行，多个工作进程共享数据库并按一致性哈希分摊URL')
+    monitor_parser.add_argument('--lease-seconds', type=float, help='URL租约时长（秒），默认取配置 monitor_sharding.lease_seconds')
+    monitor_parser.add_argument('--loop', action='store_true', help='持续运行，每隔 --interval 秒检查一轮')
+    monitor_parser.add_argument('--interval', type=float, default=300, help='循环模式下两轮检查的间隔秒数 (默认: 300)')
+    monitor_parser.add_argument('--watch', action='store_true',
+                                help='监听模式：file:// 目标变更后立即检查（Linux 使用 inotify），其余URL按 --interval 检查')
     monitor_parser.set_defaults(func=run_web_monitor)
     
+    # 页面版本历史命令
+    history_parser = subparsers.add_parser('history', help='查看监控页面的历史版本和版本间diff')
+    history_parser.add_argument('url', nargs='?', help='监控的URL，省略时输出存储统计')
+    history_parser.add_argument('--version', type=int, help='输出指定版本的内容')
+    history_parser.add_argument('--diff', type=int, nargs=2, metavar=('OLD', 'NEW'), help='输出两个版本之间的diff')
+    history_parser.add_argument('--stats', action='store_true', help='输出存储统计')
+    history_parser.add_argument('-o', '--output', help='把版本内容或diff写入文件')
+    history_parser.set_defaults(func=run_page_history)
+    
     # API服务器命令
     api_parser = subparsers.add_parser('api', help='启动API服务器')
     api_parser.add_argument('--host', default='0.0.0.0', help='监听地址 (默认: 0.0.0.0)')
@@ -73,6 +223,63 @@ def main():
     api_parser.add_argument('--debug', action='store_true', help='启用调试模式')
     api_parser.set_defaults(func=lambda args: run_api_server(args.port, args.host))
     
+    # 一体化运行命令
+    serve_parser = subparsers.add_parser('serve-all', help='在一个进程中定时运行分析和监控，并提供API服务')
+    serve_parser.add_argument('--host', default='0.0.0.0', help='监听地址 (默认: 0.0.0.0)')
+    serve_parser.add_argument('--port', type=int, default=8080, help='监听端口 (默认: 8080)')
+    serve_parser.add_argument('--alpha-interval', type=float,
+                              help='两次Alpha分析的间隔秒数，默认取配置 serve_all.alpha_interval_seconds')
+    serve_parser.add_argument('--monitor-interval', type=float,
+                              help='两轮Web监控的间隔秒数，默认取配置 serve_all.monitor_interval_seconds')
+    serve_parser.add_argument('--workers', type=int, help='处理HTTP请求的线程数，默认取配置 serve_all.workers')
+    serve_parser.add_argument('--worker-id', help='以分片模式运行Web监控，与其他节点共享数据库')
+    serve_parser.add_argument('--no-api', action='store_true', help='只运行定时任务，不提供API')
+    serve_parser.set_defaults(func=run_serve_all)
+    
+    # 数据库维护命令
+    db_parser = subparsers.add_parser('db', help='数据库维护：保留期清理、增量vacuum、统计信息')
+    db_parser.add_argument('action', choices=['maintain', 'stats'], help='maintain 执行维护，stats 只输出大小和碎片统计')
+    db_parser.add_argument('--database', action='append', choices=['alpha', 'monitor'],
+                           help='只处理指定数据库，可重复 (默认: 全部)')
+    db_parser.add_argument('--no-vacuum', action='store_true', help='跳过增量vacuum')
+    db_parser.add_argument('--no-analyze', action='store_true', help='跳过ANALYZE')
+    db_parser.add_argument('--convert', action='store_true',
+                           help='先执行一次完整VACUUM把已有数据库切换为增量vacuum（期间独占数据库）')
+    db_parser.add_argument('--json', action='store_true', help='以JSON输出报告')
+    db_parser.set_defaults(func=run_db_maintenance)
+    
+    # 数据导出命令
+    export_parser = subparsers.add_parser('export', help='流式导出代币历史、按天汇总或Web监控变更事件')
+    export_parser.add_argument('dataset', choices=['tokens', 'token_rollups', 'changes'], help='导出的数据集')
+    export_parser.add_argument('-f', '--format', choices=['csv', 'ndjson', 'parquet'], default='csv',
+                               help='输出格式 (默认: csv，parquet 需要安装 pyarrow)')
+    export_parser.add_argument('-o', '--output', default='-', help='输出文件 (默认: 标准输出)')
+    export_parser.add_argument('--since', help='起始时间（含），如 2026-01-01 或 "2026-01-01 08:00:00"')
+    export_parser.add_argument('--until', help='结束时间（不含）')
+    export_parser.add_argument('--symbol', action='append', help='只导出指定代币，可重复（tokens、token_rollups）')
+    export_parser.add_argument('--url', action='append', help='只导出指定URL，可重复（changes）')
+    export_parser.add_argument('--chunk-size', type=int, default=5000, help='每次读取和写出的行数 (默认: 5000)')
+    export_parser.set_defaults(func=run_export)
+    
+    # 权重回测命令
+    backtest_parser = subparsers.add_parser('backtest', help='在历史运行上回测数据源权重组合')
+    backtest_parser.add_argument('--days', type=int, default=30, help='回放最近N天的运行 (默认: 30)')
+    backtest_parser.add_argument('--grid', type=parse_grid, help='每个数据源的候选权重，逗号分隔，如 0,0.5,1,1.5,2')
+    backtest_parser.add_argument('--samples', type=int, default=0, help='额外随机采样的权重组合数量')
+    backtest_parser.add_argument('--top-k', type=int, default=10, help='评估命中率的top K (默认: 10)')
+    backtest_parser.add_argument('--show', type=int, default=10, help='显示前N个结果 (默认: 10)')
+    backtest_parser.set_defaults(func=run_backtest)
+    
+    # 基准测试命令
+    bench_parser = subparsers.add_parser('bench', help='运行热路径基准测试')
+    add_bench_arguments(bench_parser)
+    bench_parser.set_defaults(func=run_benchmarks)
+    
+    # API负载测试命令
+    loadtest_parser = subparsers.add_parser('loadtest', help='并发压测API，报告吞吐量和 p50/p95/p99 延迟')
+    add_loadtest_arguments(loadtest_parser)
+    loadtest_parser.set_defaults(func=run_loadtest)
+    
     # 解析参数
     args = parser.parse_args()
     
@@ -82,12 +289,20 @@ def main():
     
     # 执行命令
     try:
-        result = args.func(args)
+        with http_recorder(args):
+            result = args.func(args)
         logger.info("Command completed successfully")
-        sys.exit(0)
+        exit_code = 0
     except Exception as e:
         logger.error(f"Command failed: {e}", exc_info=True)
-        sys.exit(1)
+        exit_code = 1
+    
+    # 批处理命令的指标导出
+    if args.metrics_file:
+        metrics.write_textfile(args.metrics_file)
+        logger.info(f"Metrics written to {args.metrics_file}")
+    
+    sys.exit(exit_code)
 
 
 if __name__ == "__main__":
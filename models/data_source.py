@@ -1,49 +1,61 @@
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Optional, Pattern, Mapping, Sequence
 from collections import Counter
-import praw
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import math
+import re
 import requests
+import requests.adapters
+
+from models.heavy_hitters import SpaceSaving
+from models.scoring import VectorizedScoreEngine
+from utils.logger import get_logger
+
+logger = get_logger('models.data_source')
 
 
 class DataSource:
     """数据源基类"""
     
     def fetch(self) -> Tuple[List[str], Dict[str, Dict[str, str]]]:
-        """获取数据，返回(代币列表, 代币详情字典)"""
+        """获取数据，返回(代币列表, 代币详情字典)；失败时抛出异常，由调用方决定重试或跳过"""
         raise NotImplementedError
 
 
 class RedditDataSource(DataSource):
     """Reddit数据源"""
     
-    def __init__(self, client_id: str, client_secret: str, user_agent: str):
+    def __init__(self, client_id: str, client_secret: str, user_agent: str, timeout: float = 10):
         self.client_id = client_id
         self.client_secret = client_secret
         self.user_agent = user_agent
+        self.timeout = timeout
     
     def fetch(self) -> List[str]:
         """获取Reddit文本数据"""
         if not self.client_id:
             return []
         
+        # PRAW导入较慢，且只有配置了Reddit凭据时才需要
+        import praw
+        
         texts = []
         
-        try:
-            reddit = praw.Reddit(
-                client_id=self.client_id,
-                client_secret=self.client_secret,
-                user_agent=self.user_agent,
-            )
-            
-            subs = ["cryptocurrency", "ethtrader", "CryptoMoonShots"]
-            
-            for sub in subs:
-                for post in reddit.subreddit(sub).hot(limit=80):
-                    texts.append(post.title)
-                    if post.selftext:
-                        texts.append(post.selftext)
-            
-        except Exception as e:
-            print(f"Reddit error: {e}")
+        reddit = praw.Reddit(
+            client_id=self.client_id,
+            client_secret=self.client_secret,
+            user_agent=self.user_agent,
+            # PRAW默认超时较长，每个请求都受此限制
+            timeout=self.timeout,
+        )
+        
+        subs = ["cryptocurrency", "ethtrader", "CryptoMoonShots"]
+        
+        for sub in subs:
+            for post in reddit.subreddit(sub).hot(limit=80):
+                texts.append(post.title)
+                if post.selftext:
+                    texts.append(post.selftext)
         
         return texts
 
@@ -51,8 +63,9 @@ class RedditDataSource(DataSource):
 class CoinGeckoDataSource(DataSource):
     """CoinGecko数据源"""
     
-    def __init__(self, api_url: str = "https://api.coingecko.com/api/v3"):
+    def __init__(self, api_url: str = "https://api.coingecko.com/api/v3", timeout: float = 10):
         self.api_url = api_url
+        self.timeout = timeout
     
     def fetch(self) -> Tuple[List[str], Dict[str, Dict[str, str]]]:
         """获取CoinGecko趋势代币"""
@@ -61,22 +74,19 @@ class CoinGeckoDataSource(DataSource):
         tokens = []
         token_details = {}
         
-        try:
-            r = requests.get(url, timeout=10)
-            data = r.json()
-            
-            for coin in data["coins"]:
-                symbol = coin["item"]["symbol"].upper()
-                name = coin["item"]["name"]
-                icon_url = coin["item"].get("large", "")
-                tokens.append(symbol)
-                token_details[symbol] = {
-                    "name": name,
-                    "icon_url": icon_url
-                }
-            
-        except Exception as e:
-            print(f"CoinGecko error: {e}")
+        r = requests.get(url, timeout=self.timeout)
+        r.raise_for_status()
+        data = r.json()
+        
+        for coin in data["coins"]:
+            symbol = coin["item"]["symbol"].upper()
+            name = coin["item"]["name"]
+            icon_url = coin["item"].get("large", "")
+            tokens.append(symbol)
+            token_details[symbol] = {
+                "name": name,
+                "icon_url": icon_url
+            }
         
         return tokens, token_details
 
@@ -84,65 +94,153 @@ class CoinGeckoDataSource(DataSource):
 class DexScreenerDataSource(DataSource):
     """DexScreener数据源"""
     
-    def __init__(self, api_url: str = "https://api.dexscreener.com/latest/dex/search"):
+    def __init__(self, api_url: str = "https://api.dexscreener.com/latest/dex/search",
+                 queries: Sequence[str] = ("sol",), chains: Sequence[str] = (),
+                 max_pairs_per_query: int = None, max_workers: int = 4, timeout: float = 10):
         self.api_url = api_url
+        self.chains = tuple(chain.lower() for chain in chains)
+        # 未配置查询词时按链名搜索
+        self.queries = tuple(queries) or self.chains or ("sol",)
+        self.max_pairs_per_query = max_pairs_per_query
+        self.max_workers = max(1, min(max_workers, len(self.queries)))
+        self.timeout = timeout
+        # 所有查询共用一个连接池，长驻进程中跨运行复用keep-alive连接
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
     
-    def fetch(self) -> Tuple[List[str], Dict[str, Dict[str, str]]]:
-        """获取DexScreener热门交易对"""
-        url = self.api_url + "?q=sol"
+    def fetch(self) -> Tuple[List[str], Dict[str, Dict[str, Any]]]:
+        """
+        并发执行所有查询，按交易对地址去重；
+        返回(每个交易对一个代币符号, 代币详情及按代币汇总的24小时成交量、流动性)
+        部分查询失败时记录警告并使用其余查询的结果，全部失败时抛出最后一个异常
+        """
+        if len(self.queries) == 1:
+            outcomes = [self._search_outcome(self.queries[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                outcomes = list(executor.map(self._search_outcome, self.queries))
+        
+        errors = [error for _, error in outcomes if error is not None]
+        if len(errors) == len(outcomes):
+            raise errors[-1]
+        results = [pairs for pairs, error in outcomes if error is None]
         
         tokens = []
         token_details = {}
+        best_liquidity = {}
+        seen = set()
         
-        try:
-            r = requests.get(url, timeout=10)
-            pairs = r.json().get("pairs", [])[:40]
-            
+        for pairs in results:
             for p in pairs:
-                symbol = p.get("baseToken", {}).get("symbol", "").upper()
-                if symbol:
-                    tokens.append(symbol)
-                    if symbol not in token_details:
-                        token_details[symbol] = {
-                            "name": p.get("baseToken", {}).get("name", ""),
-                            "icon_url": p.get("info", {}).get("imageUrl", "")
-                        }
-            
-        except Exception as e:
-            print(f"DexScreener error: {e}")
+                base = p.get("baseToken") or {}
+                symbol = (base.get("symbol") or "").upper()
+                chain = (p.get("chainId") or "").lower()
+                key = (chain, p.get("pairAddress") or p.get("url") or id(p))
+                if not symbol or key in seen or (self.chains and chain not in self.chains):
+                    continue
+                seen.add(key)
+                tokens.append(symbol)
+                
+                volume = _number((p.get("volume") or {}).get("h24"))
+                liquidity = _number((p.get("liquidity") or {}).get("usd"))
+                details = token_details.get(symbol)
+                if details is None:
+                    details = token_details[symbol] = {
+                        "name": base.get("name", ""),
+                        "icon_url": (p.get("info") or {}).get("imageUrl", ""),
+                        "pairs": 0,
+                        "volume_24h": 0.0,
+                        "liquidity_usd": 0.0,
+                        "price_change_24h": None
+                    }
+                details["pairs"] += 1
+                details["volume_24h"] += volume
+                details["liquidity_usd"] += liquidity
+                # 价格变化取流动性最高的交易对
+                if liquidity >= best_liquidity.get(symbol, -1.0):
+                    best_liquidity[symbol] = liquidity
+                    details["price_change_24h"] = (p.get("priceChange") or {}).get("h24")
         
         return tokens, token_details
+    
+    def _search(self, query: str) -> List[Dict[str, Any]]:
+        """执行单个搜索查询"""
+        r = self.session.get(self.api_url, params={"q": query}, timeout=self.timeout)
+        r.raise_for_status()
+        pairs = r.json().get("pairs") or []
+        return pairs[:self.max_pairs_per_query] if self.max_pairs_per_query else pairs
+    
+    def _search_outcome(self, query: str) -> Tuple[List[Dict[str, Any]], Optional[Exception]]:
+        try:
+            return self._search(query), None
+        except Exception as e:
+            logger.warning(f"DexScreener error ({query}): {e}")
+            return [], e
+    
+    @staticmethod
+    def signal_totals(token_details: Mapping[str, Mapping[str, Any]]) -> Dict[str, Counter]:
+        """按代币汇总的美元指标，{信号: {代币: 美元}}"""
+        return {
+            "volume": Counter({s: d["volume_24h"] for s, d in token_details.items() if d.get("volume_24h")}),
+            "liquidity": Counter({s: d["liquidity_usd"] for s, d in token_details.items() if d.get("liquidity_usd")})
+        }
+    
+    @staticmethod
+    def signal_scores(totals: Mapping[str, float]) -> Counter:
+        """美元指标取 log10(1 + x) 压缩到与提及次数相近的量级，作为打分输入"""
+        return Counter({symbol: math.log10(1 + value) for symbol, value in totals.items() if value > 0})
+
+
+def _number(value: Any) -> float:
+    """接口中的数值字段可能缺失或为字符串"""
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
 
 
 class TextAnalyzer:
     """文本分析器"""
     
-    TOKEN_PATTERN = r"\$[A-Za-z0-9]+"
-    HASHTAG_PATTERN = r"#[A-Za-z0-9_]+"
+    TOKEN_PATTERN = re.compile(r"\$[A-Za-z0-9]+")
+    HASHTAG_PATTERN = re.compile(r"#[A-Za-z0-9_]+")
     
-    def __init__(self, narratives: Dict[str, List[str]]):
+    def __init__(self, narratives: Dict[str, List[str]], 
+                 matchers: Tuple[Tuple[str, Pattern], ...] = None, capacity: int = None):
         self.narratives = narratives
+        # 代币和标签计数最多保留的不同元素数（Space-Saving），None 表示精确计数
+        self.capacity = capacity
+        # 预编译的叙事匹配器，一般直接取自 ConfigSnapshot.narrative_matchers
+        if matchers is None:
+            matchers = tuple(
+                (n, re.compile("|".join(re.escape(w.lower()) for w in words)))
+                for n, words in narratives.items() if words
+            )
+        self.matchers = matchers
     
     def analyze(self, texts: List[str]) -> Tuple[Counter, Counter, Counter]:
         """分析文本，返回(代币计数, 标签计数, 叙事计数)"""
-        import re
-        
-        tokens = []
-        hashtags = []
+        if self.capacity:
+            token_counter = SpaceSaving(self.capacity)
+            hashtag_counter = SpaceSaving(self.capacity)
+        else:
+            token_counter = Counter()
+            hashtag_counter = Counter()
         narratives = Counter()
         
         for t in texts:
-            tokens += re.findall(self.TOKEN_PATTERN, t)
-            hashtags += re.findall(self.HASHTAG_PATTERN, t)
+            token_counter.update(m[1:].upper() for m in self.TOKEN_PATTERN.findall(t))
+            hashtag_counter.update(self.HASHTAG_PATTERN.findall(t))
             
             lower = t.lower()
-            for n, words in self.narratives.items():
-                if any(w in lower for w in words):
+            for n, matcher in self.matchers:
+                if matcher.search(lower):
                     narratives[n] += 1
         
-        token_counter = Counter([t.replace("$", "").upper() for t in tokens])
-        hashtag_counter = Counter(hashtags)
-        
+        if self.capacity:
+            return token_counter.counter(), hashtag_counter.counter(), narratives
         return token_counter, hashtag_counter, narratives
 
 
@@ -151,25 +249,76 @@ class AlphaScoreCalculator:
     
     def __init__(self, weights: Dict[str, float]):
         self.weights = weights
+        self.engine = VectorizedScoreEngine(weights)
     
     def calculate(self, reddit_tokens: Counter, cg_tokens: List[str], 
                 dex_tokens: List[str]) -> Counter:
         """计算Alpha分数"""
-        from collections import defaultdict
-        
-        scores = defaultdict(float)
+        return self.calculate_sources({
+            "reddit": reddit_tokens,
+            "coingecko": Counter(cg_tokens),
+            "dexscreener": Counter(dex_tokens)
+        })
+    
+    def calculate_sources(self, source_counts: Dict[str, Counter]) -> Counter:
+        """按 config.get_weights() 中的任意数据源计算Alpha分数"""
+        return self.engine.score(source_counts)
+
+
+class MomentumCalculator:
+    """动量计算器（按时间衰减的EWMA动量与速度，增量更新）"""
+    
+    def __init__(self, half_life_hours: float = 24.0):
+        self.half_life_hours = half_life_hours
+    
+    def decay_factor(self, elapsed_hours: float) -> float:
+        """计算经过elapsed_hours后的衰减系数"""
+        if self.half_life_hours <= 0:
+            return 0.0
+        return 0.5 ** (max(elapsed_hours, 0.0) / self.half_life_hours)
+    
+    def update(self, state: Optional[Dict[str, Any]], score: float,
+               now: datetime) -> Dict[str, Any]:
+        """用一次新观测更新单个代币的动量状态"""
+        now_str = now.strftime("%Y-%m-%d %H:%M:%S")
         
-        reddit_weight = self.weights.get("reddit", 1.0)
-        coingecko_weight = self.weights.get("coingecko", 1.5)
-        dexscreener_weight = self.weights.get("dexscreener", 0.7)
+        if not state:
+            return {
+                "momentum": score,
+                "ewma_score": score,
+                "velocity": 0.0,
+                "last_score": score,
+                "observations": 1,
+                "first_seen": now_str,
+                "last_seen": now_str
+            }
         
-        for t, c in reddit_tokens.items():
-            scores[t] += c * reddit_weight
+        last_seen = datetime.strptime(state["last_seen"], "%Y-%m-%d %H:%M:%S")
+        elapsed_hours = (now - last_seen).total_seconds() / 3600
+        decay = self.decay_factor(elapsed_hours)
+        alpha = 1 - decay
         
-        for t in cg_tokens:
-            scores[t] += coingecko_weight
+        ewma_score = state["ewma_score"] + alpha * (score - state["ewma_score"])
+        # 速度：EWMA分数每小时的变化量，同样做指数平滑
+        instant_velocity = (ewma_score - state["ewma_score"]) / max(elapsed_hours, 1 / 60)
+        velocity = state["velocity"] * decay + instant_velocity * alpha
         
-        for t in dex_tokens:
-            scores[t] += dexscreener_weight
+        return {
+            "momentum": state["momentum"] * decay + score,
+            "ewma_score": ewma_score,
+            "velocity": velocity,
+            "last_score": score,
+            "observations": state["observations"] + 1,
+            "first_seen": state["first_seen"],
+            "last_seen": now_str
+        }
+    
+    def decayed(self, state: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+        """返回衰减到now时刻的动量状态（只读，不修改存储）"""
+        last_seen = datetime.strptime(state["last_seen"], "%Y-%m-%d %H:%M:%S")
+        decay = self.decay_factor((now - last_seen).total_seconds() / 3600)
         
-        return Counter(scores)
+        result = dict(state)
+        result["momentum"] = state["momentum"] * decay
+        result["velocity"] = state["velocity"] * decay
+        return result
@@ -1,7 +1,11 @@
 import sqlite3
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+import json
+from typing import List, Dict, Any, Optional, Tuple, Iterator, Sequence
+from datetime import datetime, timedelta
 import os
+import time
+
+from utils import text_delta
 
 
 class DatabaseManager:
@@ -10,15 +14,190 @@ class DatabaseManager:
     def __init__(self, db_file: str):
         self.db_file = db_file
     
+    # 多个进程共享同一数据库时，写锁冲突最多等待的毫秒数
+    BUSY_TIMEOUT_MS = 10000
+    
     def get_connection(self):
         """获取数据库连接"""
-        conn = sqlite3.connect(self.db_file)
+        conn = sqlite3.connect(self.db_file, timeout=self.BUSY_TIMEOUT_MS / 1000)
         conn.row_factory = sqlite3.Row
         return conn
     
+    def enable_wal(self, conn: sqlite3.Connection):
+        """启用WAL模式：读写互不阻塞，多个写进程按busy_timeout排队（设置持久保存在数据库文件中）"""
+        conn.execute("PRAGMA journal_mode=WAL")
+    
+    def enable_incremental_vacuum(self, conn: sqlite3.Connection):
+        """新建数据库使用增量vacuum（已有数据库需一次完整VACUUM才会生效，见 convert_incremental_vacuum）"""
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    
     def init_db(self):
         """初始化数据库表"""
         raise NotImplementedError
+    
+    def iter_query(self, sql: str, params: Sequence = (), chunk_size: int = 5000
+                   ) -> Tuple[List[str], Iterator[List[tuple]]]:
+        """
+        流式执行查询，返回(列名, 按chunk_size分块的行迭代器)
+        整个迭代在同一个读事务中完成（WAL下读到的是一致快照，且不阻塞写入），内存占用与结果大小无关
+        """
+        conn = sqlite3.connect(self.db_file, timeout=self.BUSY_TIMEOUT_MS / 1000)
+        conn.execute("BEGIN")
+        cursor = conn.execute(sql, tuple(params))
+        columns = [description[0] for description in cursor.description]
+        
+        def chunks():
+            try:
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        return
+                    yield rows
+            finally:
+                conn.rollback()
+                conn.close()
+        
+        return columns, chunks()
+    
+    @staticmethod
+    def _time_range(column: str, since: str = None, until: str = None) -> Tuple[List[str], List[Any]]:
+        """[since, until) 时间范围条件"""
+        conditions, params = [], []
+        if since:
+            conditions.append(f"{column} >= ?")
+            params.append(since)
+        if until:
+            conditions.append(f"{column} < ?")
+            params.append(until)
+        return conditions, params
+    
+    def delete_in_batches(self, table: str, where: str, params: Tuple = (), batch_size: int = 2000) -> int:
+        """按批删除满足条件的行，每批单独提交，写锁只持有一批的时间，返回删除的行数"""
+        conn = self.get_connection()
+        total = 0
+        try:
+            while True:
+                cursor = conn.execute(f"""
+                    DELETE FROM {table} WHERE rowid IN (
+                        SELECT rowid FROM {table} WHERE {where} LIMIT ?
+                    )
+                """, (*params, batch_size))
+                conn.commit()
+                total += cursor.rowcount
+                if cursor.rowcount < batch_size:
+                    return total
+        finally:
+            conn.close()
+    
+    def storage_stats(self) -> Dict[str, Any]:
+        """数据库文件大小、页数、空闲页比例（碎片）和各表行数/占用"""
+        conn = self.get_connection()
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        freelist_count = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        auto_vacuum = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        tables = [row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+        )]
+        
+        table_stats = {name: {'rows': conn.execute(f'SELECT COUNT(*) FROM "{name}"').fetchone()[0]}
+                       for name in tables}
+        try:
+            # dbstat 虚拟表需要编译选项支持，不可用时只报告行数
+            for name, size in conn.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name"):
+                if name in table_stats:
+                    table_stats[name]['bytes'] = size
+        except sqlite3.OperationalError:
+            pass
+        conn.close()
+        
+        wal_file = self.db_file + '-wal'
+        return {
+            'file_bytes': os.path.getsize(self.db_file) if os.path.exists(self.db_file) else 0,
+            'wal_bytes': os.path.getsize(wal_file) if os.path.exists(wal_file) else 0,
+            'page_size': page_size,
+            'page_count': page_count,
+            'freelist_count': freelist_count,
+            'fragmentation': round(freelist_count / page_count, 4) if page_count else 0.0,
+            'auto_vacuum': {0: 'none', 1: 'full', 2: 'incremental'}.get(auto_vacuum, auto_vacuum),
+            'tables': table_stats
+        }
+    
+    def incremental_vacuum(self, step_pages: int = 1000) -> int:
+        """分步回收空闲页，每步单独提交，返回回收的页数（未启用增量vacuum时为0）"""
+        conn = self.get_connection()
+        freed = 0
+        try:
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                return 0
+            while True:
+                before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                if not before:
+                    return freed
+                conn.execute(f"PRAGMA incremental_vacuum({int(step_pages)})").fetchall()
+                conn.commit()
+                after = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                if after >= before:
+                    return freed
+                freed += before - after
+        finally:
+            conn.close()
+    
+    def convert_incremental_vacuum(self):
+        """把已有数据库切换为增量vacuum：需要一次完整VACUUM，期间独占数据库"""
+        conn = self.get_connection()
+        conn.isolation_level = None
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("VACUUM")
+        conn.close()
+    
+    def analyze(self):
+        """刷新查询规划器统计信息（每个索引最多采样一定行数，大表上也很快）"""
+        conn = self.get_connection()
+        conn.execute("PRAGMA analysis_limit=1000")
+        conn.execute("ANALYZE")
+        conn.commit()
+        conn.close()
+    
+    def checkpoint(self) -> Tuple[int, int, int]:
+        """把WAL中的内容写回数据库文件（PASSIVE，不等待读写）"""
+        conn = self.get_connection()
+        row = conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+        conn.close()
+        return tuple(row)
+    
+    def claim_maintenance(self, now: float, interval_seconds: float) -> Optional[int]:
+        """距上次维护超过interval_seconds时登记一次新的维护并返回其ID，否则返回None（多进程只有一个能领取）"""
+        conn = self.get_connection()
+        try:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS maintenance_runs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    started_at REAL NOT NULL,
+                    finished_at REAL,
+                    report TEXT
+                )
+            """)
+            conn.execute("BEGIN IMMEDIATE")
+            cursor = conn.execute("""
+                INSERT INTO maintenance_runs (started_at)
+                SELECT ? WHERE NOT EXISTS (
+                    SELECT 1 FROM maintenance_runs WHERE started_at > ?
+                )
+            """, (now, now - interval_seconds))
+            conn.commit()
+            return cursor.lastrowid if cursor.rowcount else None
+        finally:
+            conn.close()
+    
+    def finish_maintenance(self, run_id: int, finished_at: float, report: Dict[str, Any]):
+        """记录维护结果"""
+        conn = self.get_connection()
+        conn.execute("""
+            UPDATE maintenance_runs SET finished_at = ?, report = ? WHERE id = ?
+        """, (finished_at, json.dumps(report, ensure_ascii=False), run_id))
+        conn.commit()
+        conn.close()
 
 
 class TokenModel(DatabaseManager):
@@ -30,6 +209,7 @@ class TokenModel(DatabaseManager):
     def init_db(self):
         """初始化代币表"""
         conn = self.get_connection()
+        self.enable_incremental_vacuum(conn)
         cursor = conn.cursor()
         
         cursor.execute("""
@@ -66,7 +246,103 @@ class TokenModel(DatabaseManager):
             )
         """)
         
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS token_momentum (
+                symbol TEXT PRIMARY KEY,
+                momentum REAL,
+                ewma_score REAL,
+                velocity REAL,
+                last_score REAL,
+                observations INTEGER,
+                first_seen TEXT,
+                last_seen TEXT
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS analysis_runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                created_at TEXT
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS source_observations (
+                run_id INTEGER NOT NULL,
+                source TEXT NOT NULL,
+                symbol TEXT NOT NULL,
+                count REAL,
+                FOREIGN KEY (run_id) REFERENCES analysis_runs(id)
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_source_observations_run 
+            ON source_observations(run_id)
+        """)
+        
+        # 旧库补充运行状态列：complete 或 partial（有数据源失败、超时或被熔断跳过）
+        columns = {row["name"] for row in cursor.execute("PRAGMA table_info(analysis_runs)")}
+        if "status" not in columns:
+            cursor.execute("ALTER TABLE analysis_runs ADD COLUMN status TEXT")
+        
+        # 每次运行各数据源的结果
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS analysis_run_sources (
+                run_id INTEGER NOT NULL,
+                source TEXT NOT NULL,
+                status TEXT NOT NULL,
+                items INTEGER,
+                attempts INTEGER,
+                duration_ms INTEGER,
+                error TEXT,
+                PRIMARY KEY (run_id, source)
+            )
+        """)
+        
+        # 各数据源的熔断器状态，跨进程（如cron触发的单次运行）保持
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS source_health (
+                source TEXT PRIMARY KEY,
+                state TEXT NOT NULL,
+                failures INTEGER NOT NULL DEFAULT 0,
+                opened_until REAL NOT NULL DEFAULT 0,
+                last_error TEXT,
+                updated_at TEXT
+            )
+        """)
+        
+        # 按时间范围查询代币和按保留期清理都走索引
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_tokens_updated ON tokens(updated_at)
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_tokens_symbol ON tokens(symbol, updated_at)
+        """)
+        
+        # 跨运行的代币/标签/叙事 top-K 摘要（Space-Saving），每个时间桶最多 capacity 行；
+        # 较细的桶超过一天后合并为按天的桶
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS heavy_hitters (
+                kind TEXT NOT NULL,
+                bucket_start TEXT NOT NULL,
+                bucket_end TEXT NOT NULL,
+                item TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                error INTEGER NOT NULL DEFAULT 0,
+                updated_at TEXT,
+                PRIMARY KEY (kind, bucket_start, item)
+            ) WITHOUT ROWID
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_heavy_hitters_end ON heavy_hitters(kind, bucket_end)
+        """)
+        
         conn.commit()
+        # 导出等长时间读取与分析写入并发，读写不能互相阻塞
+        self.enable_wal(conn)
         conn.close()
     
     def save_tokens(self, tokens_data: List[Dict[str, Any]]):
@@ -95,6 +371,135 @@ class TokenModel(DatabaseManager):
         conn.commit()
         conn.close()
     
+    def save_source_observations(self, source_counts: Dict[str, Dict[str, float]],
+                                 source_results: Dict[str, Dict[str, Any]] = None) -> int:
+        """
+        保存一次运行中各数据源的原始代币计数，返回运行ID
+        source_results 为各数据源的获取结果（status、items、attempts、duration_ms、error），
+        有任一数据源未成功时运行标记为 partial
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        source_results = source_results or {}
+        status = 'partial' if any(r['status'] != 'ok' for r in source_results.values()) else 'complete'
+        
+        cursor.execute("INSERT INTO analysis_runs (created_at, status) VALUES (?, ?)", (now, status))
+        run_id = cursor.lastrowid
+        
+        cursor.executemany("""
+            INSERT INTO analysis_run_sources (run_id, source, status, items, attempts, duration_ms, error)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, [
+            (run_id, source, r['status'], r.get('items', 0), r.get('attempts', 0),
+             r.get('duration_ms', 0), r.get('error'))
+            for source, r in source_results.items()
+        ])
+        
+        cursor.executemany("""
+            INSERT INTO source_observations (run_id, source, symbol, count)
+            VALUES (?, ?, ?, ?)
+        """, [
+            (run_id, source, symbol, count)
+            for source, counts in source_counts.items()
+            for symbol, count in counts.items()
+        ])
+        
+        conn.commit()
+        conn.close()
+        
+        return run_id
+    
+    def get_latest_run(self) -> Optional[Dict[str, Any]]:
+        """最近一次分析运行及其各数据源结果，没有运行时返回None"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("SELECT id, created_at, status FROM analysis_runs ORDER BY id DESC LIMIT 1")
+        row = cursor.fetchone()
+        if row is None:
+            conn.close()
+            return None
+        
+        run = dict(row)
+        cursor.execute("""
+            SELECT source, status, items, attempts, duration_ms, error 
+            FROM analysis_run_sources WHERE run_id = ?
+        """, (run['id'],))
+        run['sources'] = {r['source']: dict(r) for r in cursor.fetchall()}
+        for source in run['sources'].values():
+            del source['source']
+        conn.close()
+        
+        return run
+    
+    def get_source_health(self) -> Dict[str, Dict[str, Any]]:
+        """各数据源的熔断器状态"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT source, state, failures, opened_until, last_error, updated_at FROM source_health
+        """)
+        health = {row['source']: dict(row) for row in cursor.fetchall()}
+        conn.close()
+        
+        return health
+    
+    def save_source_health(self, health: Dict[str, Dict[str, Any]]):
+        """保存各数据源的熔断器状态（state、failures、opened_until、last_error）"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        
+        cursor.executemany("""
+            INSERT INTO source_health (source, state, failures, opened_until, last_error, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(source) DO UPDATE SET 
+                state = excluded.state,
+                failures = excluded.failures,
+                opened_until = excluded.opened_until,
+                last_error = COALESCE(excluded.last_error, source_health.last_error),
+                updated_at = excluded.updated_at
+        """, [
+            (source, h['state'], h['failures'], h['opened_until'], h.get('last_error'), now)
+            for source, h in health.items()
+        ])
+        
+        conn.commit()
+        conn.close()
+    
+    def get_latest_run_id(self) -> int:
+        """最近一次分析运行的ID（没有运行时为0），用作数据版本"""
+        conn = self.get_connection()
+        row = conn.execute("SELECT MAX(id) FROM analysis_runs").fetchone()
+        conn.close()
+        return row[0] or 0
+    
+    def get_source_observations(self, start_time: str) -> List[Dict[str, Dict[str, float]]]:
+        """按时间顺序获取历史运行的数据源计数，每个元素为 {数据源: {代币: 计数}}"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT o.run_id, o.source, o.symbol, o.count 
+            FROM source_observations o
+            INNER JOIN analysis_runs r ON r.id = o.run_id
+            WHERE r.created_at >= ?
+            ORDER BY o.run_id
+        """, (start_time,))
+        
+        runs = {}
+        for row in cursor:
+            run = runs.setdefault(row["run_id"], {})
+            run.setdefault(row["source"], {})[row["symbol"]] = row["count"]
+        
+        conn.close()
+        
+        return list(runs.values())
+    
     def save_narratives(self, narratives_data: Dict[str, int]):
         """保存叙事数据"""
         conn = self.get_connection()
@@ -154,6 +559,102 @@ class TokenModel(DatabaseManager):
         
         return [dict(token) for token in tokens]
     
+    def iter_token_history(self, since: str = None, until: str = None, symbols: List[str] = None,
+                           chunk_size: int = 5000) -> Tuple[List[str], Iterator[List[tuple]]]:
+        """流式读取代币历史记录（每次运行每个代币一行），按时间顺序"""
+        conditions, params = self._time_range('updated_at', since, until)
+        if symbols:
+            conditions.append(f"symbol IN ({','.join('?' * len(symbols))})")
+            params.extend(s.upper() for s in symbols)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return self.iter_query(f"""
+            SELECT id, symbol, name, rank, alpha_score, heat_level, created_at, updated_at
+            FROM tokens
+            {where}
+            ORDER BY updated_at, id
+        """, params, chunk_size)
+    
+    def iter_token_rollups(self, since: str = None, until: str = None, symbols: List[str] = None,
+                           chunk_size: int = 5000) -> Tuple[List[str], Iterator[List[tuple]]]:
+        """流式读取按天汇总的代币统计（出现次数、平均/最高分数、最好排名）"""
+        conditions, params = self._time_range('updated_at', since, until)
+        if symbols:
+            conditions.append(f"symbol IN ({','.join('?' * len(symbols))})")
+            params.extend(s.upper() for s in symbols)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return self.iter_query(f"""
+            SELECT substr(updated_at, 1, 10) AS day, symbol, COUNT(*) AS runs,
+                   AVG(alpha_score) AS avg_score, MAX(alpha_score) AS max_score,
+                   MIN(rank) AS best_rank, MAX(heat_level) AS max_heat
+            FROM tokens
+            {where}
+            GROUP BY day, symbol
+            ORDER BY day, symbol
+        """, params, chunk_size)
+    
+    def get_momentum_states(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """获取指定代币的动量状态"""
+        if not symbols:
+            return {}
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        placeholders = ",".join("?" * len(symbols))
+        cursor.execute(f"""
+            SELECT symbol, momentum, ewma_score, velocity, last_score, 
+                   observations, first_seen, last_seen
+            FROM token_momentum 
+            WHERE symbol IN ({placeholders})
+        """, list(symbols))
+        
+        states = cursor.fetchall()
+        conn.close()
+        
+        return {state["symbol"]: dict(state) for state in states}
+    
+    def save_momentum_states(self, states: Dict[str, Dict[str, Any]]):
+        """保存代币动量状态"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.executemany("""
+            INSERT OR REPLACE INTO token_momentum 
+            (symbol, momentum, ewma_score, velocity, last_score, observations, first_seen, last_seen)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, [
+            (
+                symbol,
+                state["momentum"],
+                state["ewma_score"],
+                state["velocity"],
+                state["last_score"],
+                state["observations"],
+                state["first_seen"],
+                state["last_seen"]
+            )
+            for symbol, state in states.items()
+        ])
+        
+        conn.commit()
+        conn.close()
+    
+    def get_all_momentum_states(self) -> List[Dict[str, Any]]:
+        """获取全部代币动量状态"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT symbol, momentum, ewma_score, velocity, last_score, 
+                   observations, first_seen, last_seen
+            FROM token_momentum
+        """)
+        
+        states = cursor.fetchall()
+        conn.close()
+        
+        return [dict(state) for state in states]
+    
     def get_narratives(self) -> List[Dict[str, Any]]:
         """获取叙事数据"""
         conn = self.get_connection()
@@ -185,7 +686,133 @@ class TokenModel(DatabaseManager):
         conn.close()
         
         return [dict(tag) for tag in hashtags]
+    
+    def get_heavy_hitter_bucket(self, kind: str, bucket_start: str,
+                                bucket_end: str = None) -> List[Tuple[str, int, int]]:
+        """读取一个桶（或 [bucket_start, bucket_end) 内全部桶）的 (元素, 计数, 误差)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        if bucket_end is None:
+            cursor.execute("""
+                SELECT item, count, error FROM heavy_hitters 
+                WHERE kind = ? AND bucket_start = ?
+            """, (kind, bucket_start))
+        else:
+            cursor.execute("""
+                SELECT item, count, error FROM heavy_hitters 
+                WHERE kind = ? AND bucket_start >= ? AND bucket_start < ?
+            """, (kind, bucket_start, bucket_end))
+        rows = [tuple(row) for row in cursor.fetchall()]
+        conn.close()
+        
+        return rows
+    
+    def save_heavy_hitters(self, bucket_start: str, bucket_end: str,
+                           summaries: Dict[str, Sequence[Tuple[str, int, int]]], replace_range: bool = False):
+        """
+        在一个事务中整体替换各类别在该桶的摘要；
+        replace_range 为真时先删除 [bucket_start, bucket_end) 内的全部桶（合并为一个桶时使用）
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        
+        for kind, items in summaries.items():
+            if replace_range:
+                cursor.execute("""
+                    DELETE FROM heavy_hitters WHERE kind = ? AND bucket_start >= ? AND bucket_start < ?
+                """, (kind, bucket_start, bucket_end))
+            else:
+                cursor.execute("DELETE FROM heavy_hitters WHERE kind = ? AND bucket_start = ?",
+                               (kind, bucket_start))
+            cursor.executemany("""
+                INSERT INTO heavy_hitters (kind, bucket_start, bucket_end, item, count, error, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, [(kind, bucket_start, bucket_end, item, count, error, now) for item, count, error in items])
+        
+        conn.commit()
+        conn.close()
+    
+    def get_heavy_hitter_rollup_days(self, before: str) -> List[Tuple[str, str]]:
+        """早于 before 所在日期、仍由较细的桶组成的 (类别, 日期)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT DISTINCT kind, substr(bucket_start, 1, 10) FROM heavy_hitters 
+            WHERE bucket_start < ? AND julianday(bucket_end) - julianday(bucket_start) < 1
+        """, (before[:10],))
+        days = [tuple(row) for row in cursor.fetchall()]
+        conn.close()
+        
+        return days
+    
+    def prune_heavy_hitters(self, before: str) -> int:
+        """删除在 before 之前结束的桶"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("DELETE FROM heavy_hitters WHERE bucket_end <= ?", (before,))
+        deleted = cursor.rowcount
+        
+        conn.commit()
+        conn.close()
+        
+        return deleted
+    
+    def get_heavy_hitters(self, kind: str, since: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """合并在 since 之后结束的桶，返回计数最高的元素（计数为上界估计，error 为各桶误差之和）"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT item, SUM(count) AS count, SUM(error) AS error, MAX(updated_at) AS updated_at
+            FROM heavy_hitters 
+            WHERE kind = ? AND bucket_end > ?
+            GROUP BY item 
+            ORDER BY count DESC, item
+            LIMIT ?
+        """, (kind, since, limit))
+        rows = cursor.fetchall()
+        conn.close()
+        
+        return [dict(row) for row in rows]
+
 
+    def apply_retention(self, retention_days: Dict[str, float], now: datetime,
+                        batch_size: int = 2000) -> Dict[str, int]:
+        """按各表保留天数分批删除过期数据，返回每个表删除的行数"""
+        deleted = {}
+        
+        def cutoff(table: str) -> Optional[str]:
+            days = retention_days.get(table) or 0
+            return (now - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S") if days > 0 else None
+        
+        for table in ('tokens', 'narratives', 'hashtags'):
+            if cutoff(table):
+                deleted[table] = self.delete_in_batches(table, "updated_at < ?", (cutoff(table),), batch_size)
+        
+        if cutoff('token_momentum'):
+            deleted['token_momentum'] = self.delete_in_batches(
+                'token_momentum', "last_seen < ?", (cutoff('token_momentum'),), batch_size)
+        
+        if cutoff('analysis_runs'):
+            # 最近一次运行始终保留（其ID是Dashboard缓存的数据版本）
+            expired = """
+                SELECT id FROM analysis_runs 
+                WHERE created_at < ? AND id < (SELECT MAX(id) FROM analysis_runs)
+            """
+            deleted['source_observations'] = self.delete_in_batches(
+                'source_observations', f"run_id IN ({expired})", (cutoff('analysis_runs'),), batch_size)
+            deleted['analysis_run_sources'] = self.delete_in_batches(
+                'analysis_run_sources', f"run_id IN ({expired})", (cutoff('analysis_runs'),), batch_size)
+            deleted['analysis_runs'] = self.delete_in_batches(
+                'analysis_runs', f"id IN ({expired})", (cutoff('analysis_runs'),), batch_size)
+        
+        return deleted
+    
 
 class WebMonitorModel(DatabaseManager):
     """Web监控数据模型"""
@@ -196,6 +823,7 @@ class WebMonitorModel(DatabaseManager):
     def init_db(self):
         """初始化监控表"""
         conn = self.get_connection()
+        self.enable_incremental_vacuum(conn)
         cursor = conn.cursor()
         
         cursor.execute("""
@@ -223,21 +851,172 @@ class WebMonitorModel(DatabaseManager):
             )
         """)
         
+        # 旧版本的 INSERT OR REPLACE 没有唯一约束，同一URL会产生多行；只保留最新一行
+        cursor.execute("""
+            DELETE FROM web_pages 
+            WHERE id NOT IN (SELECT MAX(id) FROM web_pages GROUP BY url)
+        """)
+        
+        cursor.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_web_pages_url ON web_pages(url)
+        """)
+        
+        # 旧库补充SimHash指纹列
+        columns = {row["name"] for row in cursor.execute("PRAGMA table_info(web_pages)")}
+        if "simhash" not in columns:
+            cursor.execute("ALTER TABLE web_pages ADD COLUMN simhash TEXT")
+        # 最近一次被判定为细微变更的内容哈希，同一内容不再重复指纹和分类
+        if "trivial_hash" not in columns:
+            cursor.execute("ALTER TABLE web_pages ADD COLUMN trivial_hash TEXT")
+        
+        # 分片监控：工作进程心跳和URL租约
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS monitor_workers (
+                worker_id TEXT PRIMARY KEY,
+                heartbeat_at REAL NOT NULL,
+                started_at REAL
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS url_leases (
+                url TEXT PRIMARY KEY,
+                worker_id TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+        
+        # 变更事件：每条检测到的变更一行，按URL或元素类型查询时间范围都走索引
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS change_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT NOT NULL,
+                element_type TEXT NOT NULL,
+                change_type TEXT NOT NULL,
+                content TEXT,
+                magnitude TEXT,
+                version INTEGER,
+                detected_at TEXT NOT NULL
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_change_events_url ON change_events(url, detected_at, id)
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_change_events_type ON change_events(element_type, detected_at, id)
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_change_events_time ON change_events(detected_at, id)
+        """)
+        
+        # 通知发件箱：与页面状态同一事务写入，按 (url, hash) 去重；各目的地记录已投递到的位置
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS notification_outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                created_at TEXT,
+                UNIQUE (url, content_hash)
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS notification_sinks (
+                sink TEXT PRIMARY KEY,
+                last_id INTEGER NOT NULL DEFAULT 0,
+                failures INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL,
+                last_error TEXT,
+                updated_at TEXT
+            )
+        """)
+        
+        # 多个工作进程共享发件箱时，投递前先认领目的地的当前位置，避免同一批事件重复投递
+        columns = {row["name"] for row in cursor.execute("PRAGMA table_info(notification_sinks)")}
+        if "claimed_by" not in columns:
+            cursor.execute("ALTER TABLE notification_sinks ADD COLUMN claimed_by TEXT")
+            cursor.execute("ALTER TABLE notification_sinks ADD COLUMN claim_until REAL")
+        
+        # 页面版本历史：最新版本和关键帧存全文，其余版本存相对后一版本的反向增量
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS page_versions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                hash TEXT,
+                kind TEXT NOT NULL,
+                data BLOB NOT NULL,
+                size INTEGER,
+                created_at TEXT,
+                UNIQUE (url, version)
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_page_versions_created ON page_versions(created_at)
+        """)
+        
+        # 预检：上次完整下载时的校验信息和各层级命中次数
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS page_validators (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                content_length INTEGER,
+                size INTEGER,
+                prefix_bytes INTEGER,
+                prefix_hash TEXT,
+                updated_at TEXT
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS precheck_stats (
+                url TEXT NOT NULL,
+                tier TEXT NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (url, tier)
+            )
+        """)
+        
+        # file:// 目标上次完整读取时的文件状态
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS file_stats (
+                url TEXT PRIMARY KEY,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                inode INTEGER NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+        """)
+        
         conn.commit()
+        self.enable_wal(conn)
         conn.close()
     
-    def save_page(self, url: str, content: str, content_hash: str):
+    def save_page(self, url: str, content: str, content_hash: str, simhash: str = None):
         """保存页面数据"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
         now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
+        # 按URL原地更新，多个工作进程并发写不会产生重复行
         cursor.execute("""
-            INSERT OR REPLACE INTO web_pages 
-            (url, content, hash, created_at, updated_at)
-            VALUES (?, ?, ?, ?, ?)
-        """, (url, content, content_hash, now, now))
+            INSERT INTO web_pages 
+            (url, content, hash, simhash, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(url) DO UPDATE SET
+                content = excluded.content,
+                hash = excluded.hash,
+                simhash = excluded.simhash,
+                trivial_hash = NULL,
+                updated_at = excluded.updated_at
+        """, (url, content, content_hash, simhash, now, now))
         
         conn.commit()
         conn.close()
@@ -265,7 +1044,7 @@ class WebMonitorModel(DatabaseManager):
         cursor = conn.cursor()
         
         cursor.execute("""
-            SELECT id, url, content, hash, created_at, updated_at 
+            SELECT id, url, content, hash, simhash, trivial_hash, created_at, updated_at 
             FROM web_pages 
             WHERE url = ?
         """, (url,))
@@ -275,6 +1054,541 @@ class WebMonitorModel(DatabaseManager):
         
         return dict(page) if page else None
     
+    def get_page_fingerprints(self, urls: List[str]) -> Dict[str, str]:
+        """获取URL的SimHash指纹"""
+        if not urls:
+            return {}
+        conn = self.get_connection()
+        placeholders = ",".join("?" * len(urls))
+        rows = conn.execute(f"""
+            SELECT url, simhash FROM web_pages
+            WHERE simhash IS NOT NULL AND url IN ({placeholders})
+        """, list(urls)).fetchall()
+        conn.close()
+        return {row["url"]: row["simhash"] for row in rows}
+    
+    def add_page_version(self, url: str, content: str, content_hash: str,
+                         keyframe_interval: int = 20) -> Optional[int]:
+        """
+        记录页面新版本，内容与最新版本相同时不记录
+        原最新版本改存为相对新版本的反向增量（版本号为keyframe_interval倍数的关键帧保留全文），
+        返回新版本号
+        """
+        # 增量和压缩在写锁之外计算（大页面可能需要数秒），写入前在短事务中确认最新版本未变
+        for _ in range(3):
+            conn = self.get_connection()
+            latest = conn.execute("""
+                SELECT id, version, hash, data FROM page_versions
+                WHERE url = ? ORDER BY version DESC LIMIT 1
+            """, (url,)).fetchone()
+            conn.close()
+            
+            if latest and latest["hash"] == content_hash:
+                return None
+            
+            delta = None
+            if latest and latest["version"] % keyframe_interval != 0:
+                delta = text_delta.make_delta(content, text_delta.decompress(latest["data"]))
+            compressed = text_delta.compress(content)
+            
+            conn = self.get_connection()
+            conn.execute("BEGIN IMMEDIATE")
+            current = conn.execute("""
+                SELECT id FROM page_versions WHERE url = ? ORDER BY version DESC LIMIT 1
+            """, (url,)).fetchone()
+            if (current["id"] if current else None) != (latest["id"] if latest else None):
+                # 其他进程在此期间写入了新版本，按新的最新版本重新计算
+                conn.rollback()
+                conn.close()
+                continue
+            
+            version = latest["version"] + 1 if latest else 1
+            now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            if delta is not None:
+                conn.execute("""
+                    UPDATE page_versions SET kind = 'delta', data = ? WHERE id = ?
+                """, (delta, latest["id"]))
+            conn.execute("""
+                INSERT INTO page_versions (url, version, hash, kind, data, size, created_at)
+                VALUES (?, ?, ?, 'full', ?, ?, ?)
+            """, (url, version, content_hash, compressed, len(content), now))
+            conn.commit()
+            conn.close()
+            return version
+        
+        raise sqlite3.OperationalError(f"page_versions for {url} kept changing while adding a version")
+    
+    def save_trivial_hash(self, url: str, content_hash: str):
+        """记录相对基准版本为细微变更的内容哈希（基准版本不变）"""
+        conn = self.get_connection()
+        conn.execute("UPDATE web_pages SET trivial_hash = ? WHERE url = ?", (content_hash, url))
+        conn.commit()
+        conn.close()
+    
+    def get_page_versions(self, url: str) -> List[Dict[str, Any]]:
+        """列出页面的全部版本（不含内容）"""
+        conn = self.get_connection()
+        rows = conn.execute("""
+            SELECT version, hash, kind, size, LENGTH(data) AS stored_bytes, created_at
+            FROM page_versions
+            WHERE url = ?
+            ORDER BY version
+        """, (url,)).fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+    
+    def get_version_chain(self, url: str, version: int) -> List[Dict[str, Any]]:
+        """
+        还原version所需的记录：从version之后最近的全文版本开始，按版本号降序到version为止，
+        第一条为全文，其余为增量
+        """
+        conn = self.get_connection()
+        rows = conn.execute("""
+            SELECT version, kind, data FROM page_versions
+            WHERE url = ? AND version >= ? AND version <= (
+                SELECT MIN(version) FROM page_versions
+                WHERE url = ? AND version >= ? AND kind = 'full'
+            )
+            ORDER BY version DESC
+        """, (url, version, url, version)).fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+    
+    def get_history_stats(self) -> Dict[str, Any]:
+        """版本历史的存储统计"""
+        conn = self.get_connection()
+        row = conn.execute("""
+            SELECT COUNT(DISTINCT url) AS pages, COUNT(*) AS versions,
+                   COALESCE(SUM(size), 0) AS raw_bytes, COALESCE(SUM(LENGTH(data)), 0) AS stored_bytes
+            FROM page_versions
+        """).fetchone()
+        conn.close()
+        return dict(row)
+    
+    def save_check_result(self, url: str, content: str, content_hash: str, simhash: str = None,
+                          changes: List[tuple] = None, detected_at: str = None,
+                          magnitude: str = None, version: int = None) -> Optional[int]:
+        """
+        在一个事务中保存一次检查的结果：更新页面状态、写入变更记录，有变更时写入通知发件箱
+        同一URL同一内容哈希只入箱一次，返回发件箱ID（无变更或重复时为None）
+        """
+        detected_at = detected_at or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        conn = self.get_connection()
+        conn.execute("""
+            INSERT INTO web_pages 
+            (url, content, hash, simhash, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(url) DO UPDATE SET
+                content = excluded.content,
+                hash = excluded.hash,
+                simhash = excluded.simhash,
+                trivial_hash = NULL,
+                updated_at = excluded.updated_at
+        """, (url, content, content_hash, simhash, detected_at, detected_at))
+        
+        outbox_id = None
+        if changes:
+            conn.executemany("""
+                INSERT INTO change_events
+                (url, element_type, change_type, content, magnitude, version, detected_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, [(url, element_type, change_type, change_content, magnitude, version, detected_at)
+                  for element_type, change_type, change_content in changes])
+            
+            payload = json.dumps({
+                'url': url,
+                'content_hash': content_hash,
+                'magnitude': magnitude,
+                'version': version,
+                'detected_at': detected_at,
+                'changes': [list(change) for change in changes]
+            }, ensure_ascii=False)
+            cursor = conn.execute("""
+                INSERT OR IGNORE INTO notification_outbox (url, content_hash, payload, created_at)
+                VALUES (?, ?, ?, ?)
+            """, (url, content_hash, payload, detected_at))
+            outbox_id = cursor.lastrowid if cursor.rowcount else None
+        
+        conn.commit()
+        conn.close()
+        return outbox_id
+    
+    def query_change_events(self, url: str = None, element_type: str = None, change_type: str = None,
+                            since: str = None, until: str = None, before: tuple = None,
+                            limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        按时间倒序查询变更事件
+        before 为上一页最后一条的 (detected_at, id)，用于键集分页
+        """
+        conditions, params = [], []
+        for column, value in (('url', url), ('element_type', element_type), ('change_type', change_type)):
+            if value:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if since:
+            conditions.append("detected_at >= ?")
+            params.append(since)
+        if until:
+            conditions.append("detected_at < ?")
+            params.append(until)
+        if before:
+            conditions.append("(detected_at, id) < (?, ?)")
+            params.extend(before)
+        
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        conn = self.get_connection()
+        rows = conn.execute(f"""
+            SELECT id, url, element_type, change_type, content, magnitude, version, detected_at
+            FROM change_events
+            {where}
+            ORDER BY detected_at DESC, id DESC
+            LIMIT ?
+        """, params + [limit]).fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+    
+    def iter_change_events(self, since: str = None, until: str = None, urls: List[str] = None,
+                           chunk_size: int = 5000) -> Tuple[List[str], Iterator[List[tuple]]]:
+        """流式读取变更事件，按时间顺序"""
+        conditions, params = self._time_range('detected_at', since, until)
+        if urls:
+            conditions.append(f"url IN ({','.join('?' * len(urls))})")
+            params.extend(urls)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return self.iter_query(f"""
+            SELECT id, url, element_type, change_type, magnitude, version, detected_at, content
+            FROM change_events
+            {where}
+            ORDER BY detected_at, id
+        """, params, chunk_size)
+    
+    def query_pages(self, after_url: str = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """按URL顺序列出监控页面及其最近一次变更时间，after_url 用于键集分页"""
+        conn = self.get_connection()
+        rows = conn.execute("""
+            SELECT p.url, p.hash, p.simhash, p.created_at, p.updated_at,
+                   (SELECT MAX(c.detected_at) FROM change_events c WHERE c.url = p.url) AS last_change_at,
+                   (SELECT MAX(v.version) FROM page_versions v WHERE v.url = p.url) AS latest_version
+            FROM web_pages p
+            WHERE p.url > ?
+            ORDER BY p.url
+            LIMIT ?
+        """, (after_url or "", limit)).fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+    
+    def register_notification_sink(self, sink: str):
+        """登记通知目的地，新目的地从发件箱当前末尾开始"""
+        conn = self.get_connection()
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        conn.execute("""
+            INSERT OR IGNORE INTO notification_sinks (sink, last_id, updated_at)
+            VALUES (?, (SELECT COALESCE(MAX(id), 0) FROM notification_outbox), ?)
+        """, (sink, now))
+        conn.commit()
+        conn.close()
+    
+    def get_notification_sink(self, sink: str) -> Optional[Dict[str, Any]]:
+        """获取目的地的投递状态"""
+        conn = self.get_connection()
+        row = conn.execute("""
+            SELECT sink, last_id, failures, next_attempt_at, last_error, updated_at
+            FROM notification_sinks WHERE sink = ?
+        """, (sink,)).fetchone()
+        conn.close()
+        return dict(row) if row else None
+    
+    def fetch_outbox(self, after_id: int, limit: int = 50) -> List[Dict[str, Any]]:
+        """按ID顺序读取after_id之后的发件箱事件"""
+        conn = self.get_connection()
+        rows = conn.execute("""
+            SELECT id, payload FROM notification_outbox
+            WHERE id > ? ORDER BY id LIMIT ?
+        """, (after_id, limit)).fetchall()
+        conn.close()
+        return [{'id': row["id"], 'payload': json.loads(row["payload"])} for row in rows]
+    
+    def claim_notification_sink(self, sink: str, owner: str, last_id: int, claim_seconds: float) -> bool:
+        """
+        原子地认领目的地从 last_id 开始的下一批投递，claim_seconds 秒内其他分发器不会认领；
+        位置已被前移、处于退避中或被其他分发器认领且未过期时返回False
+        """
+        conn = self.get_connection()
+        now = time.time()
+        cursor = conn.execute("""
+            UPDATE notification_sinks
+            SET claimed_by = ?, claim_until = ?
+            WHERE sink = ? AND last_id = ?
+              AND (next_attempt_at IS NULL OR next_attempt_at <= ?)
+              AND (claim_until IS NULL OR claim_until < ? OR claimed_by = ?)
+        """, (owner, now + claim_seconds, sink, last_id, now, now, owner))
+        conn.commit()
+        conn.close()
+        return cursor.rowcount == 1
+    
+    def advance_notification_sink(self, sink: str, last_id: int, owner: str = None):
+        """投递成功后前移目的地位置、清除失败状态并释放 owner 的认领（位置只增不减）"""
+        conn = self.get_connection()
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        conn.execute("""
+            UPDATE notification_sinks
+            SET last_id = MAX(last_id, ?), failures = 0, next_attempt_at = NULL, last_error = NULL, updated_at = ?,
+                claim_until = CASE WHEN claimed_by = ? THEN NULL ELSE claim_until END,
+                claimed_by = CASE WHEN claimed_by = ? THEN NULL ELSE claimed_by END
+            WHERE sink = ?
+        """, (last_id, now, owner, owner, sink))
+        conn.commit()
+        conn.close()
+    
+    def record_notification_failure(self, sink: str, error: str, next_attempt_at: float, owner: str = None):
+        """记录投递失败和下次重试时间，并释放 owner 的认领"""
+        conn = self.get_connection()
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        conn.execute("""
+            UPDATE notification_sinks
+            SET failures = failures + 1, next_attempt_at = ?, last_error = ?, updated_at = ?,
+                claim_until = CASE WHEN claimed_by = ? THEN NULL ELSE claim_until END,
+                claimed_by = CASE WHEN claimed_by = ? THEN NULL ELSE claimed_by END
+            WHERE sink = ?
+        """, (next_attempt_at, error[:500], now, owner, owner, sink))
+        conn.commit()
+        conn.close()
+    
+    def count_pending_notifications(self, sinks: List[str]) -> int:
+        """指定目的地中最落后者尚未投递的事件数"""
+        if not sinks:
+            return 0
+        conn = self.get_connection()
+        placeholders = ",".join("?" * len(sinks))
+        row = conn.execute(f"""
+            SELECT COUNT(*) AS pending FROM notification_outbox
+            WHERE id > (SELECT COALESCE(MIN(last_id), 0) FROM notification_sinks WHERE sink IN ({placeholders}))
+        """, list(sinks)).fetchone()
+        conn.close()
+        return row["pending"]
+    
+    def get_page_validators(self, url: str) -> Optional[Dict[str, Any]]:
+        """获取URL上次完整下载时的校验信息"""
+        conn = self.get_connection()
+        row = conn.execute("""
+            SELECT etag, last_modified, content_length, size, prefix_bytes, prefix_hash
+            FROM page_validators
+            WHERE url = ?
+        """, (url,)).fetchone()
+        conn.close()
+        return dict(row) if row else None
+    
+    def save_page_validators(self, url: str, validators: Dict[str, Any]):
+        """保存URL的校验信息"""
+        conn = self.get_connection()
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        conn.execute("""
+            INSERT OR REPLACE INTO page_validators
+            (url, etag, last_modified, content_length, size, prefix_bytes, prefix_hash, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (url, validators.get('etag'), validators.get('last_modified'),
+              validators.get('content_length'), validators.get('size'),
+              validators.get('prefix_bytes'), validators.get('prefix_hash'), now))
+        conn.commit()
+        conn.close()
+    
+    def record_precheck(self, url: str, tier: str):
+        """记录一次由tier层级（head、range、stat、file_hash 或 full）确定结果的检查"""
+        conn = self.get_connection()
+        conn.execute("""
+            INSERT INTO precheck_stats (url, tier, hits) VALUES (?, ?, 1)
+            ON CONFLICT(url, tier) DO UPDATE SET hits = hits + 1
+        """, (url, tier))
+        conn.commit()
+        conn.close()
+    
+    def get_file_stat(self, url: str) -> Optional[Tuple[int, int, int]]:
+        """获取本地文件上次读取时的 (mtime_ns, size, inode)"""
+        conn = self.get_connection()
+        row = conn.execute("""
+            SELECT mtime_ns, size, inode FROM file_stats WHERE url = ?
+        """, (url,)).fetchone()
+        conn.close()
+        return tuple(row) if row else None
+    
+    def save_file_stat(self, url: str, signature: Tuple[int, int, int]):
+        """保存本地文件的 (mtime_ns, size, inode)"""
+        conn = self.get_connection()
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        conn.execute("""
+            INSERT OR REPLACE INTO file_stats (url, mtime_ns, size, inode, updated_at)
+            VALUES (?, ?, ?, ?, ?)
+        """, (url, signature[0], signature[1], signature[2], now))
+        conn.commit()
+        conn.close()
+    
+    def get_page_hash(self, url: str) -> Optional[str]:
+        """只获取页面当前内容的哈希，不读取内容"""
+        conn = self.get_connection()
+        row = conn.execute("SELECT hash FROM web_pages WHERE url = ?", (url,)).fetchone()
+        conn.close()
+        return row['hash'] if row else None
+    
+    def get_precheck_stats(self) -> List[Dict[str, Any]]:
+        """获取每个URL各预检层级的命中次数"""
+        conn = self.get_connection()
+        rows = conn.execute("""
+            SELECT url, tier, hits FROM precheck_stats ORDER BY url, tier
+        """).fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+    
+    def heartbeat(self, worker_id: str, now: float):
+        """记录工作进程心跳"""
+        conn = self.get_connection()
+        conn.execute("""
+            INSERT INTO monitor_workers (worker_id, heartbeat_at, started_at)
+            VALUES (?, ?, ?)
+            ON CONFLICT(worker_id) DO UPDATE SET heartbeat_at = excluded.heartbeat_at
+        """, (worker_id, now, now))
+        conn.commit()
+        conn.close()
+    
+    def get_live_workers(self, since: float) -> List[str]:
+        """获取since之后有心跳的工作进程"""
+        conn = self.get_connection()
+        rows = conn.execute("""
+            SELECT worker_id FROM monitor_workers WHERE heartbeat_at >= ? ORDER BY worker_id
+        """, (since,)).fetchall()
+        conn.close()
+        return [row["worker_id"] for row in rows]
+    
+    def remove_worker(self, worker_id: str):
+        """注销工作进程并释放其全部租约"""
+        conn = self.get_connection()
+        conn.execute("DELETE FROM url_leases WHERE worker_id = ?", (worker_id,))
+        conn.execute("DELETE FROM monitor_workers WHERE worker_id = ?", (worker_id,))
+        conn.commit()
+        conn.close()
+    
+    def acquire_leases(self, worker_id: str, urls: List[str], now: float, 
+                       expires_at: float) -> List[str]:
+        """
+        为worker_id获取或续约URL租约（URL无租约、租约已过期或本来就属于自己时成功），
+        在一个写事务中完成，返回成功获得租约的URL
+        """
+        if not urls:
+            return []
+        
+        conn = self.get_connection()
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany("""
+            INSERT INTO url_leases (url, worker_id, expires_at)
+            VALUES (?, ?, ?)
+            ON CONFLICT(url) DO UPDATE SET
+                worker_id = excluded.worker_id,
+                expires_at = excluded.expires_at
+            WHERE url_leases.worker_id = excluded.worker_id OR url_leases.expires_at < ?
+        """, [(url, worker_id, expires_at, now) for url in urls])
+        
+        placeholders = ",".join("?" * len(urls))
+        rows = conn.execute(f"""
+            SELECT url FROM url_leases WHERE worker_id = ? AND url IN ({placeholders})
+        """, [worker_id] + list(urls)).fetchall()
+        conn.commit()
+        conn.close()
+        
+        return [row["url"] for row in rows]
+    
+    def release_leases(self, worker_id: str, urls: List[str]):
+        """释放worker_id持有的指定URL租约"""
+        if not urls:
+            return
+        conn = self.get_connection()
+        conn.executemany("""
+            DELETE FROM url_leases WHERE url = ? AND worker_id = ?
+        """, [(url, worker_id) for url in urls])
+        conn.commit()
+        conn.close()
+    
+    def get_leases(self) -> List[Dict[str, Any]]:
+        """获取全部URL租约"""
+        conn = self.get_connection()
+        rows = conn.execute("""
+            SELECT url, worker_id, expires_at FROM url_leases ORDER BY url
+        """).fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+    
+    def apply_retention(self, retention_days: Dict[str, float], now: datetime, monitored_urls: List[str],
+                        batch_size: int = 2000) -> Dict[str, int]:
+        """
+        按各表保留天数分批删除过期数据，返回每个表删除的行数
+        页面按"已不在监控列表中且超过保留期未更新"清理，连同其版本历史和校验信息；
+        每个URL的最新版本和尚未投递给所有目的地的通知始终保留
+        """
+        deleted = {}
+        
+        def cutoff(table: str) -> Optional[str]:
+            days = retention_days.get(table) or 0
+            return (now - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S") if days > 0 else None
+        
+        if cutoff('change_events'):
+            deleted['change_events'] = self.delete_in_batches(
+                'change_events', "detected_at < ?", (cutoff('change_events'),), batch_size)
+        
+        if cutoff('notification_outbox'):
+            conn = self.get_connection()
+            row = conn.execute("SELECT MIN(last_id) FROM notification_sinks").fetchone()
+            max_id = conn.execute("SELECT MAX(id) FROM notification_outbox").fetchone()[0] or 0
+            conn.close()
+            delivered = max_id if row[0] is None else row[0]
+            deleted['notification_outbox'] = self.delete_in_batches(
+                'notification_outbox', "id <= ? AND created_at < ?",
+                (delivered, cutoff('notification_outbox')), batch_size)
+        
+        if cutoff('page_versions'):
+            deleted['page_versions'] = self.delete_in_batches(
+                'page_versions',
+                """created_at < ? AND version < (
+                    SELECT MAX(version) FROM page_versions latest WHERE latest.url = page_versions.url
+                )""",
+                (cutoff('page_versions'),), batch_size)
+        
+        if cutoff('page_elements'):
+            deleted['page_elements'] = self.delete_in_batches(
+                'page_elements', "created_at < ?", (cutoff('page_elements'),), batch_size)
+        
+        if cutoff('web_pages'):
+            conn = self.get_connection()
+            rows = conn.execute("SELECT id, url FROM web_pages WHERE updated_at < ?",
+                                (cutoff('web_pages'),)).fetchall()
+            conn.close()
+            monitored = set(monitored_urls)
+            orphans = [(row['id'], row['url']) for row in rows if row['url'] not in monitored]
+            for start in range(0, len(orphans), 100):
+                self._delete_pages(orphans[start:start + 100])
+            deleted['web_pages'] = len(orphans)
+        
+        if retention_days.get('monitor_workers'):
+            since = now.timestamp() - retention_days['monitor_workers'] * 86400
+            deleted['monitor_workers'] = self.delete_in_batches(
+                'monitor_workers', "heartbeat_at < ?", (since,), batch_size)
+            deleted['url_leases'] = self.delete_in_batches(
+                'url_leases', "expires_at < ?", (since,), batch_size)
+        
+        return deleted
+    
+    def _delete_pages(self, pages: List[Tuple[int, str]]):
+        """在一个事务中删除页面及其所有关联数据"""
+        ids = [page_id for page_id, _ in pages]
+        urls = [url for _, url in pages]
+        id_marks = ','.join('?' * len(ids))
+        url_marks = ','.join('?' * len(urls))
+        
+        conn = self.get_connection()
+        conn.execute(f"DELETE FROM page_elements WHERE page_id IN ({id_marks})", ids)
+        for table in ('page_versions', 'page_validators', 'precheck_stats', 'file_stats', 'url_leases'):
+            conn.execute(f"DELETE FROM {table} WHERE url IN ({url_marks})", urls)
+        conn.execute(f"DELETE FROM web_pages WHERE id IN ({id_marks})", ids)
+        conn.commit()
+        conn.close()
+    
     def get_elements_by_page_id(self, page_id: int) -> List[Dict[str, Any]]:
         """根据页面ID获取元素数据"""
         conn = self.get_connection()
@@ -0,0 +1,75 @@
+from collections import Counter
+from typing import Dict, Hashable, Iterable, List, Tuple
+import heapq
+
+# 滑动窗口名称 -> 小时数
+WINDOWS = {'1h': 1, '24h': 24, '7d': 168}
+
+
+class SpaceSaving:
+    """
+    Space-Saving top-K摘要（Metwally等），最多保留 capacity 个计数器，内存与不同元素数量无关
+    计数满时替换当前最小的计数器：新元素继承其计数，error 记录可能高估的上界，
+    因此 count - error <= 真实次数 <= count；不同元素不超过 capacity 时计数是精确的
+    """
+
+    def __init__(self, capacity: int = 1000, items: Iterable[Tuple[Hashable, int, int]] = ()):
+        self.capacity = max(1, capacity)
+        self.counts: Dict[Hashable, int] = {}
+        self.errors: Dict[Hashable, int] = {}
+        # (count, item) 的最小堆，计数变化后旧条目留在堆中，弹出时按当前计数跳过
+        self._heap: List[Tuple[int, Hashable]] = []
+        self.merge(items)
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def add(self, item: Hashable, count: int = 1, error: int = 0):
+        """记录 item 出现 count 次（error 为该次数自带的误差上界，合并摘要时使用）"""
+        counts = self.counts
+        if item in counts:
+            counts[item] += count
+            self.errors[item] += error
+        elif len(counts) < self.capacity:
+            counts[item] = count
+            self.errors[item] = error
+        else:
+            evicted, minimum = self._pop_min()
+            del counts[evicted]
+            del self.errors[evicted]
+            counts[item] = minimum + count
+            self.errors[item] = minimum + error
+        heapq.heappush(self._heap, (counts[item], item))
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(c, i) for i, c in counts.items()]
+            heapq.heapify(self._heap)
+
+    def update(self, items: Iterable[Hashable]):
+        """逐个记录元素，与 Counter.update 对可迭代对象的用法一致"""
+        for item in items:
+            self.add(item)
+
+    def merge(self, items: Iterable[Tuple[Hashable, int, int]]):
+        """合并 (元素, 计数, 误差) 序列，如另一个摘要的 items() 或持久化的桶"""
+        for item, count, error in items:
+            self.add(item, count, error)
+
+    def items(self) -> List[Tuple[Hashable, int, int]]:
+        """全部 (元素, 计数, 误差)，按计数降序"""
+        errors = self.errors
+        return sorted(((item, count, errors[item]) for item, count in self.counts.items()),
+                      key=lambda entry: entry[1], reverse=True)
+
+    def most_common(self, n: int = None) -> List[Tuple[Hashable, int]]:
+        return [(item, count) for item, count, _ in self.items()[:n]]
+
+    def counter(self) -> Counter:
+        """以 Counter 形式返回当前计数"""
+        return Counter(self.counts)
+
+    def _pop_min(self) -> Tuple[Hashable, int]:
+        counts = self.counts
+        while True:
+            count, item = heapq.heappop(self._heap)
+            if counts.get(item) == count:
+                return item, count
@@ -0,0 +1,153 @@
+from typing import List, Dict, Any, Mapping, Sequence, Iterable
+from collections import Counter
+import itertools
+
+import numpy as np
+
+
+class ScoreMatrix:
+    """代币 × 数据源 的计数矩阵"""
+
+    def __init__(self, symbols: List[str], sources: List[str], values: np.ndarray):
+        self.symbols = symbols
+        self.sources = sources
+        self.values = values
+
+    @classmethod
+    def build(cls, source_counts: Mapping[str, Mapping[str, float]],
+              sources: Sequence[str] = None,
+              symbol_index: Dict[str, int] = None) -> "ScoreMatrix":
+        """由 {数据源: {代币: 计数}} 构建矩阵，可复用已有的代币索引"""
+        sources = list(sources) if sources is not None else list(source_counts)
+
+        if symbol_index is None:
+            symbol_index = {}
+            for source in sources:
+                for symbol in source_counts.get(source, {}):
+                    symbol_index.setdefault(symbol, len(symbol_index))
+
+        symbols = [None] * len(symbol_index)
+        for symbol, i in symbol_index.items():
+            symbols[i] = symbol
+
+        values = np.zeros((len(symbols), len(sources)), dtype=np.float64)
+
+        for j, source in enumerate(sources):
+            counts = source_counts.get(source, {})
+            if not counts:
+                continue
+            rows = [symbol_index[s] for s in counts if s in symbol_index]
+            vals = [c for s, c in counts.items() if s in symbol_index]
+            values[rows, j] = vals
+
+        return cls(symbols, sources, values)
+
+
+class VectorizedScoreEngine:
+    """向量化Alpha分数引擎，支持任意数量的数据源"""
+
+    def __init__(self, weights: Mapping[str, float]):
+        self.sources = list(weights)
+        self.weight_vector = np.array([weights[s] for s in self.sources], dtype=np.float64)
+
+    def score_matrix(self, matrix: ScoreMatrix) -> np.ndarray:
+        """计算矩阵中每个代币的分数"""
+        return matrix.values @ self.weight_vector
+
+    def score(self, source_counts: Mapping[str, Mapping[str, float]]) -> Counter:
+        """计算 {数据源: {代币: 计数}} 的Alpha分数"""
+        matrix = ScoreMatrix.build(source_counts, self.sources)
+        if not matrix.symbols:
+            return Counter()
+
+        scores = self.score_matrix(matrix)
+        return Counter({
+            symbol: float(score)
+            for symbol, score in zip(matrix.symbols, scores)
+            if score != 0
+        })
+
+
+class WeightBacktester:
+    """权重回测器：在历史运行上同时评估大量权重组合"""
+
+    def __init__(self, sources: Sequence[str], top_k: int = 10):
+        self.sources = list(sources)
+        self.top_k = top_k
+
+    @staticmethod
+    def grid(sources: Sequence[str], values: Iterable[float]) -> np.ndarray:
+        """生成网格权重组合（去掉全零组合）"""
+        values = list(values)
+        combos = np.array(list(itertools.product(values, repeat=len(sources))), dtype=np.float64)
+        return combos[combos.sum(axis=1) > 0]
+
+    @staticmethod
+    def random(sources: Sequence[str], samples: int, max_weight: float = 2.0,
+               seed: int = 0) -> np.ndarray:
+        """生成随机权重组合"""
+        rng = np.random.default_rng(seed)
+        return rng.uniform(0, max_weight, size=(samples, len(sources)))
+
+    def run(self, runs: List[Mapping[str, Mapping[str, float]]],
+            weight_configs: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        回放历史运行：用第t次运行的分数排名预测第t+1次运行中
+        讨论度最高（各数据源原始计数之和）的top_k代币，返回按命中率排序的结果
+        """
+        if len(runs) < 2 or len(weight_configs) == 0:
+            return []
+
+        symbol_index: Dict[str, int] = {}
+        for run in runs:
+            for counts in run.values():
+                for symbol in counts:
+                    symbol_index.setdefault(symbol, len(symbol_index))
+
+        matrices = [ScoreMatrix.build(run, self.sources, symbol_index) for run in runs]
+        n_symbols = len(symbol_index)
+        k = min(self.top_k, n_symbols)
+
+        # 每次运行的真实热度：不加权的原始计数之和
+        targets = []
+        for run in runs:
+            totals = ScoreMatrix.build(run, list(run), symbol_index).values.sum(axis=1)
+            target = np.zeros(n_symbols, dtype=bool)
+            positive = np.flatnonzero(totals > 0)
+            top = positive[np.argsort(-totals[positive], kind="stable")[:k]]
+            target[top] = True
+            targets.append(target)
+
+        hits = np.zeros(len(weight_configs), dtype=np.float64)
+        weights = weight_configs.astype(np.float32)
+        evaluated = 0
+
+        for matrix, target in zip(matrices[:-1], targets[1:]):
+            if not target.any():
+                continue
+            # 只对本次运行出现过的代币打分，零分代币不可能进入预测
+            active = np.flatnonzero(matrix.values.any(axis=1))
+            if len(active) == 0:
+                continue
+            k_active = min(k, len(active))
+            # scores: 权重组合 × 代币（按行取top_k，内存连续）
+            scores = weights @ matrix.values[active].T.astype(np.float32)
+            top = np.argpartition(-scores, k_active - 1, axis=1)[:, :k_active]
+            predicted_score = np.take_along_axis(scores, top, axis=1)
+            hit = target[active[top]] & (predicted_score > 0)
+            hits += hit.sum(axis=1) / min(k, int(target.sum()))
+            evaluated += 1
+
+        if evaluated == 0:
+            return []
+
+        precision = hits / evaluated
+        order = np.argsort(-precision, kind="stable")
+
+        return [
+            {
+                "weights": {s: round(float(w), 4) for s, w in zip(self.sources, weight_configs[i])},
+                "precision_at_k": round(float(precision[i]), 4)
+            }
+            for i in order
+        ]
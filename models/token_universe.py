@@ -0,0 +1,164 @@
+from typing import List, Dict, Any, Tuple, Optional, Iterable, Mapping
+from collections import Counter
+import json
+import os
+import time
+
+import requests
+
+from utils.logger import get_logger
+
+logger = get_logger('models.token_universe')
+
+
+class TokenUniverse:
+    """代币全集索引（基于CoinGecko币种列表，本地缓存，按TTL刷新）"""
+
+    def __init__(self, api_url: str = "https://api.coingecko.com/api/v3",
+                 cache_file: str = "token_universe.json", ttl_hours: float = 24.0,
+                 aliases: Dict[str, str] = None, ignore: List[str] = None):
+        self.api_url = api_url
+        self.cache_file = cache_file
+        self.ttl_seconds = ttl_hours * 3600
+        self.extra_aliases = {k.lower(): v.upper() for k, v in (aliases or {}).items()}
+        self.ignore = {s.upper() for s in (ignore or [])}
+
+        self.symbols = set()
+        self.aliases = {}
+        self.fetched_at = 0.0
+
+    @property
+    def loaded(self) -> bool:
+        """索引是否可用（不可用时不做过滤，只做大小写规范化）"""
+        return bool(self.symbols)
+
+    def ensure_fresh(self):
+        """索引过期时刷新：优先读本地缓存，缓存过期再请求CoinGecko"""
+        now = time.time()
+        if self.loaded and now - self.fetched_at < self.ttl_seconds:
+            return
+
+        cache = self._read_cache()
+        if cache and now - cache["fetched_at"] < self.ttl_seconds:
+            self._build_index(cache)
+            return
+
+        fresh = self._fetch()
+        if fresh:
+            self._build_index(fresh)
+            self._write_cache(fresh)
+        elif cache:
+            # 拉取失败时沿用过期缓存
+            self._build_index(cache)
+
+    def canonicalize(self, raw: str) -> Optional[str]:
+        """把原始符号或别名规范化为标准代币符号，未知符号返回None"""
+        symbol = raw.lstrip("$").upper()
+        if not symbol or symbol in self.ignore or symbol.replace(".", "").isdigit():
+            return None
+        if symbol.lower() in self.extra_aliases:
+            return self.extra_aliases[symbol.lower()]
+        if not self.loaded or symbol in self.symbols:
+            return symbol
+        return self.aliases.get(symbol.lower())
+
+    def partition(self, counts: Counter,
+                  extra_known: Iterable[str] = ()) -> Tuple[Counter, Counter]:
+        """把计数拆分为(已知代币计数, 未知符号计数)，已知代币按标准符号合并"""
+        extra_known = {s.upper() for s in extra_known}
+        known = Counter()
+        unknown = Counter()
+
+        for raw, count in counts.items():
+            symbol = self.canonicalize(raw)
+            if symbol is None and raw.upper() in extra_known and raw.upper() not in self.ignore:
+                symbol = raw.upper()
+            if symbol is None:
+                unknown[raw.upper()] += count
+            else:
+                known[symbol] += count
+
+        return known, unknown
+
+    def canonicalize_all(self, symbols: List[str]) -> List[str]:
+        """规范化交易所/趋势榜返回的符号列表（只做别名合并，不做过滤）"""
+        result = []
+        for raw in symbols:
+            symbol = raw.upper()
+            if symbol in self.ignore:
+                continue
+            if symbol.lower() in self.extra_aliases:
+                symbol = self.extra_aliases[symbol.lower()]
+            elif self.loaded and symbol not in self.symbols:
+                symbol = self.aliases.get(symbol.lower(), symbol)
+            result.append(symbol)
+        return result
+
+    def canonicalize_counts(self, counts: Mapping[str, float]) -> Counter:
+        """规范化 {符号: 数值}，别名合并后的数值相加（规则同 canonicalize_all）"""
+        result = Counter()
+        for raw, value in counts.items():
+            for symbol in self.canonicalize_all([raw]):
+                result[symbol] += value
+        return result
+
+    def _build_index(self, data: Dict[str, Any]):
+        """由缓存数据构建O(1)查找索引"""
+        self.symbols = set(data["symbols"])
+        aliases = dict(data.get("aliases", {}))
+        aliases.update(self.extra_aliases)
+        self.aliases = aliases
+        self.symbols.update(self.extra_aliases.values())
+        self.fetched_at = data["fetched_at"]
+
+    def _fetch(self) -> Optional[Dict[str, Any]]:
+        """从CoinGecko获取完整币种列表"""
+        try:
+            r = requests.get(f"{self.api_url}/coins/list", timeout=30)
+            r.raise_for_status()
+            coins = r.json()
+        except Exception as e:
+            logger.warning(f"Token universe fetch error: {e}")
+            return None
+
+        symbols = set()
+        aliases = {}
+        for coin in coins:
+            symbol = (coin.get("symbol") or "").upper()
+            if not symbol:
+                continue
+            symbols.add(symbol)
+            # 币种id和名称作为别名，同名时保留先出现的
+            for alias in (coin.get("id"), coin.get("name")):
+                if alias:
+                    aliases.setdefault(alias.lower(), symbol)
+
+        # 别名不覆盖真实符号
+        aliases = {k: v for k, v in aliases.items() if k.upper() not in symbols}
+
+        return {
+            "fetched_at": time.time(),
+            "symbols": sorted(symbols),
+            "aliases": aliases
+        }
+
+    def _read_cache(self) -> Optional[Dict[str, Any]]:
+        """读取本地缓存"""
+        if not os.path.exists(self.cache_file):
+            return None
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Token universe cache error: {e}")
+            return None
+
+    def _write_cache(self, data: Dict[str, Any]):
+        """写入本地缓存（先写临时文件再替换，避免读到半截文件）"""
+        tmp_file = self.cache_file + ".tmp"
+        try:
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp_file, self.cache_file)
+        except OSError as e:
+            logger.warning(f"Token universe cache write error: {e}")
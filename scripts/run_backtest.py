@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+权重回测脚本
+在已保存的历史运行上回放大量数据源权重组合，用于调优Alpha分数权重
+"""
+
+import sys
+import os
+import argparse
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.logger import logger
+
+
+def main(days: int = 30, grid: list = None, samples: int = 0, 
+         top_k: int = 10, show: int = 10):
+    """主函数"""
+    # NumPy较重，只在真正回测时导入
+    from services.backtest_service import WeightBacktestService
+    
+    try:
+        # 创建服务实例
+        service = WeightBacktestService()
+        
+        # 运行回测
+        results = service.run_backtest(days, grid, samples, top_k, show)
+        
+        logger.info(f"Backtest completed: {len(results)} weight configurations ranked")
+        return results
+        
+    except Exception as e:
+        logger.error(f"Backtest failed: {e}", exc_info=True)
+        return None
+
+
+def parse_grid(value: str) -> list:
+    """解析逗号分隔的权重网格"""
+    return [float(v) for v in value.split(',') if v.strip()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='回测数据源权重组合')
+    parser.add_argument('--days', type=int, default=30, help='回放最近N天的运行 (默认: 30)')
+    parser.add_argument('--grid', type=parse_grid, help='每个数据源的候选权重，逗号分隔，如 0,0.5,1,1.5,2')
+    parser.add_argument('--samples', type=int, default=0, help='额外随机采样的权重组合数量')
+    parser.add_argument('--top-k', type=int, default=10, help='评估命中率的top K (默认: 10)')
+    parser.add_argument('--show', type=int, default=10, help='显示前N个结果 (默认: 10)')
+    args = parser.parse_args()
+    main(args.days, args.grid, args.samples, args.top_k, args.show)
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+基准测试脚本
+测量Web监控和Web3 Alpha热路径的吞吐量与延迟，并与JSON基线比较
+"""
+
+import sys
+import os
+import argparse
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.logger import logger
+
+DEFAULT_BASELINE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'baseline.json'
+)
+
+
+def main(pattern: str = None, quick: bool = False, baseline: str = DEFAULT_BASELINE,
+         save_baseline: bool = False, threshold: float = 0.2,
+         fail_on_regression: bool = False, imports_only: bool = False):
+    """主函数"""
+    from benchmarks.suite import run_suite
+    from benchmarks.importtime import check as check_import_budget
+    
+    if imports_only:
+        report = {"results": {}, "regressions": []}
+    else:
+        report = run_suite(pattern, quick, baseline, save_baseline, threshold)
+    
+    # 导入耗时预算检查
+    if not pattern or pattern.startswith("import"):
+        report["regressions"].extend(check_import_budget(repeat=3 if quick else 5))
+    
+    regressions = report["regressions"]
+    if regressions:
+        logger.warning(f"{len(regressions)} benchmarks regressed more than {threshold:.0%} "
+                       f"or exceeded the import budget")
+        if fail_on_regression:
+            raise RuntimeError("Benchmark regression detected")
+    else:
+        logger.info(f"Benchmarks completed: {len(report['results'])} cases")
+    
+    return report
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """注册命令行参数（main.py bench 复用）"""
+    parser.add_argument('--filter', dest='pattern', help='只运行名称包含该字符串的用例')
+    parser.add_argument('--quick', action='store_true', help='使用更小的数据集和更少的迭代')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='基线JSON文件路径')
+    parser.add_argument('--save-baseline', action='store_true', help='把本次结果保存为基线')
+    parser.add_argument('--threshold', type=float, default=0.2, help='p50回退阈值 (默认: 0.2 即20%%)')
+    parser.add_argument('--imports-only', action='store_true', help='只运行导入耗时预算检查')
+    parser.add_argument('--fail-on-regression', action='store_true', help='出现回退时以非零状态退出')
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='运行基准测试')
+    add_arguments(parser)
+    args = parser.parse_args()
+    main(args.pattern, args.quick, args.baseline, args.save_baseline,
+         args.threshold, args.fail_on_regression, args.imports_only)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+数据库维护脚本
+按保留期清理过期数据、增量vacuum、刷新规划器统计信息，并报告维护前后的大小和碎片
+"""
+
+import sys
+import os
+import json
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.maintenance_service import MaintenanceService
+from utils.logger import logger
+
+
+def _format_size(size: int) -> str:
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def _print_stats(name: str, stats: dict, previous: dict = None):
+    """输出一个数据库的统计，previous 非空时同时输出变化"""
+    def line(label, key, fmt=str):
+        value = fmt(stats[key])
+        if previous is not None:
+            value = f"{fmt(previous[key])} -> {value}"
+        print(f"  {label:<14} {value}")
+
+    print(f"[{name}] auto_vacuum={stats['auto_vacuum']}")
+    line('file', 'file_bytes', _format_size)
+    line('wal', 'wal_bytes', _format_size)
+    line('pages', 'page_count')
+    line('free pages', 'freelist_count')
+    line('fragmentation', 'fragmentation', lambda v: f"{v:.1%}")
+    print(f"  {'table':<24} {'rows':>10} {'size':>10}")
+    for table, table_stats in stats['tables'].items():
+        rows = table_stats['rows']
+        if previous is not None and table in previous['tables']:
+            rows = f"{previous['tables'][table]['rows']}->{rows}"
+        size = _format_size(table_stats['bytes']) if 'bytes' in table_stats else '-'
+        print(f"  {table:<24} {rows:>10} {size:>10}")
+
+
+def main(action: str = 'maintain', databases: list = None, vacuum: bool = True, analyze: bool = True,
+         convert: bool = False, as_json: bool = False):
+    """主函数，action 为 maintain 或 stats；convert 为真时先把数据库切换为增量vacuum"""
+    try:
+        service = MaintenanceService()
+
+        if action == 'stats':
+            result = service.stats(databases)
+            if as_json:
+                print(json.dumps(result, indent=2, ensure_ascii=False))
+            else:
+                for name, stats in result.items():
+                    _print_stats(name, stats)
+            return result
+
+        if convert:
+            service.convert(databases)
+
+        report = service.maintain(databases, vacuum=vacuum, analyze=analyze)
+        if as_json:
+            print(json.dumps(report, indent=2, ensure_ascii=False))
+        else:
+            for name, result in report.items():
+                deleted = ', '.join(f"{table}={rows}" for table, rows in result['deleted'].items() if rows) or 'nothing'
+                print(f"[{name}] deleted: {deleted}; freed pages: {result['freed_pages']}; "
+                      f"{result['duration_seconds']}s")
+                _print_stats(name, result['after'], result['before'])
+        return report
+
+    except Exception as e:
+        logger.error(f"Database maintenance failed: {e}", exc_info=True)
+        return None
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+数据导出脚本
+把代币历史、按天汇总的代币统计或Web监控变更事件流式导出为CSV、NDJSON或Parquet
+"""
+
+import sys
+import os
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.export_service import ExportService
+from utils.logger import logger, LogPipeline
+
+
+def main(dataset: str, fmt: str = 'csv', output: str = '-', since: str = None, until: str = None,
+         symbols: list = None, urls: list = None, chunk_size: int = 5000):
+    """主函数，output 为 '-' 时写到标准输出；导出失败时抛出异常"""
+    if output == '-':
+        # 标准输出用于数据，终端日志改写到stderr
+        LogPipeline.configure_from_config(stream=sys.stderr)
+    try:
+        service = ExportService()
+        started = time.perf_counter()
+        rows = service.export(dataset, fmt, output, since, until, symbols, urls, chunk_size)
+        logger.info(f"Exported {rows} {dataset} rows as {fmt} to {'stdout' if output == '-' else output} "
+                    f"in {time.perf_counter() - started:.2f}s")
+        return rows
+    except BrokenPipeError:
+        # 下游（如 head）提前关闭了管道
+        logger.info("Export stopped: output pipe closed")
+        sys.stderr.flush()
+        return None
+    # 其他错误向上抛出，由 main.py 记录并以非零状态退出，脚本化的导出可以据此判断失败
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else 'tokens')
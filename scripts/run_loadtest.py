@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+API负载测试脚本
+在合成数据库上启动进程内API或压测指定URL，报告各接口的吞吐量和 p50/p95/p99 延迟
+"""
+
+import sys
+import os
+import json
+import argparse
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.logger import logger
+
+
+def main(url: str = None, clients: int = 16, duration: float = 30, total_requests: int = None,
+         mix: str = None, days: int = 30, runs_per_day: int = 24, tokens_per_run: int = 50,
+         db_file: str = None, timeout: float = 10, output: str = None):
+    """主函数，output 非空时把报告以JSON写入该文件"""
+    from benchmarks.loadtest import run_loadtest, parse_mix, DEFAULT_MIX
+    
+    report = run_loadtest(url, clients, duration, total_requests, parse_mix(mix or DEFAULT_MIX),
+                          days, runs_per_day, tokens_per_run, db_file, timeout)
+    
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        logger.info(f"Load test report written to {output}")
+    
+    if report['total']['errors']:
+        logger.warning(f"{report['total']['errors']} of {report['total']['requests']} requests failed")
+    return report
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """注册命令行参数（main.py loadtest 复用）"""
+    parser.add_argument('--url', help='压测已运行的API（如 http://127.0.0.1:8080），省略时在合成数据库上启动进程内API')
+    parser.add_argument('--clients', type=int, default=16, help='并发客户端数 (默认: 16)')
+    parser.add_argument('--duration', type=float, default=30, help='压测时长秒数 (默认: 30)')
+    parser.add_argument('--requests', dest='total_requests', type=int, help='发出指定数量的请求后结束（代替 --duration）')
+    parser.add_argument('--mix', help='各接口的请求权重 (默认: tokens=5,narratives=2,hashtags=2,health=1，'
+                                      '可选 tokens、narratives、hashtags、health、dashboard)')
+    parser.add_argument('--days', type=int, default=30, help='合成数据库的历史天数 (默认: 30)')
+    parser.add_argument('--runs-per-day', type=int, default=24, help='合成数据库每天的分析运行次数 (默认: 24)')
+    parser.add_argument('--tokens-per-run', type=int, default=50, help='合成数据库每次运行的代币数 (默认: 50)')
+    parser.add_argument('--db', dest='db_file', help='合成数据库文件，不存在时生成并保留，已存在时直接使用')
+    parser.add_argument('--timeout', type=float, default=10, help='单个请求超时秒数 (默认: 10)')
+    parser.add_argument('--json', dest='output', help='把报告以JSON写入文件')
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='API负载测试')
+    add_arguments(parser)
+    args = parser.parse_args()
+    main(args.url, args.clients, args.duration, args.total_requests, args.mix, args.days,
+         args.runs_per_day, args.tokens_per_run, args.db_file, args.timeout, args.output)
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+页面版本历史脚本
+列出监控页面的历史版本、输出任意历史版本内容或两个版本之间的diff
+"""
+
+import sys
+import os
+import argparse
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.page_history_service import PageHistoryService
+from utils.logger import logger
+
+
+def _write(text: str, output: str = None):
+    """输出到文件或标准输出"""
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(text)
+        logger.info(f"Written to {output}")
+    else:
+        sys.stdout.write(text if text.endswith('\n') else text + '\n')
+
+
+def main(url: str = None, version: int = None, diff: list = None, stats: bool = False,
+         output: str = None):
+    """主函数，历史版本内容和diff写入output文件，未指定时输出到标准输出；版本不存在或出错时抛出异常"""
+    service = PageHistoryService()
+    
+    if stats or not url:
+        summary = service.get_stats()
+        print(f"{summary['pages']} pages, {summary['versions']} versions, "
+              f"{summary['raw_bytes']:,} bytes raw -> {summary['stored_bytes']:,} bytes stored "
+              f"({summary['ratio']:.1%})")
+        return summary
+    
+    if diff:
+        text = service.diff_versions(url, diff[0], diff[1])
+        if text is None:
+            raise LookupError(f"Version {diff[0]} or {diff[1]} not found for {url}")
+        _write(text, output)
+        return text
+    
+    if version is not None:
+        content = service.get_version(url, version)
+        if content is None:
+            raise LookupError(f"Version {version} not found for {url}")
+        _write(content, output)
+        return content
+    
+    versions = service.list_versions(url)
+    print(f"{'version':>8}  {'created_at':<19}  {'kind':<5}  {'size':>10}  {'stored':>8}  hash")
+    for v in versions:
+        print(f"{v['version']:>8}  {v['created_at']:<19}  {v['kind']:<5}  {v['size']:>10,}  "
+              f"{v['stored_bytes']:>8,}  {v['hash']}")
+    return versions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='页面版本历史')
+    parser.add_argument('url', nargs='?', help='监控的URL，省略时输出存储统计')
+    parser.add_argument('--version', type=int, help='输出指定版本的内容')
+    parser.add_argument('--diff', type=int, nargs=2, metavar=('OLD', 'NEW'), help='输出两个版本之间的diff')
+    parser.add_argument('--stats', action='store_true', help='输出存储统计')
+    parser.add_argument('-o', '--output', help='把版本内容或diff写入文件')
+    args = parser.parse_args()
+    main(args.url, args.version, args.diff, args.stats, args.output)
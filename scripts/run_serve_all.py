@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+一体化运行脚本
+在一个进程中定时运行Web3 Alpha分析、Web监控轮询和数据库维护，并提供API服务
+"""
+
+import sys
+import os
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.pooled_server import PooledWSGIServer
+from api.web3_alpha_api import Web3AlphaAPI
+from services.supervisor import Supervisor
+from config.config import config
+from utils.logger import logger
+
+
+def main(host: str = '0.0.0.0', port: int = 8080, alpha_interval: float = None, monitor_interval: float = None,
+         workers: int = None, worker_id: str = None, no_api: bool = False):
+    """主函数，未指定的间隔和线程数取配置 serve_all"""
+    settings = config.get_serve_all_config()
+    supervisor = Supervisor(workers=workers or settings['workers'])
+
+    if worker_id:
+        from services.shard_coordinator import ShardCoordinator
+
+        sharding = config.get_monitor_sharding_config()
+        supervisor.coordinator = ShardCoordinator(
+            supervisor.monitor_service.db, worker_id,
+            lease_seconds=sharding['lease_seconds'],
+            vnodes=sharding['vnodes']
+        )
+
+    server = None
+    if not no_api:
+        # API与定时任务共用服务实例，分析完成后直接让Dashboard缓存失效
+        api = Web3AlphaAPI(supervisor.alpha_service, supervisor.monitor_service)
+        supervisor.after_analysis.append(api.dashboard.invalidate)
+        server = PooledWSGIServer(host, port, api.app, supervisor.executor)
+
+    logger.info("Starting serve-all (alpha + monitor + api)...")
+    supervisor.run(
+        server,
+        alpha_interval=alpha_interval or settings['alpha_interval_seconds'],
+        monitor_interval=monitor_interval or settings['monitor_interval_seconds'],
+        run_on_start=settings['run_on_start']
+    )
+    logger.info("serve-all stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,33 +6,78 @@ Web监控脚本
 
 import sys
 import os
+import time
 
 # 添加项目根目录到Python路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from services.web_monitor_service import WebMonitorService
+from config.config import config
 from utils.logger import logger
 
 
-def main():
-    """主函数"""
+def main(worker_id: str = None, lease_seconds: float = None, loop: bool = False,
+         interval: float = 300, watch: bool = False):
+    """
+    主函数
+    指定 worker_id 时以分片模式运行：多个进程/节点共享同一数据库，按一致性哈希分摊URL；
+    watch 为真时持续运行，本地文件一有变更即检查，其余URL每隔 interval 秒检查
+    """
+    coordinator = None
+    service = None
+    maintenance = None
     try:
         # 创建服务实例
         service = WebMonitorService()
         
-        # 运行监控
-        changes = service.monitor_urls()
+        if loop or watch:
+            from services.maintenance_service import MaintenanceService
+            
+            # 长驻进程内按 db_maintenance.interval_hours 定时维护数据库
+            maintenance = MaintenanceService(monitor_db=service.db)
+            maintenance.start()
         
-        if changes:
-            logger.info(f"Detected {len(changes)} changes")
-        else:
-            logger.info("No changes detected")
+        if worker_id:
+            from services.shard_coordinator import ShardCoordinator
+            
+            sharding = config.get_monitor_sharding_config()
+            coordinator = ShardCoordinator(
+                service.db, worker_id,
+                lease_seconds=lease_seconds or sharding['lease_seconds'],
+                vnodes=sharding['vnodes']
+            )
         
-        return changes
+        if watch:
+            service.watch_urls(interval=interval, coordinator=coordinator)
+            return None
         
+        while True:
+            # 运行监控
+            changes = service.monitor_urls(coordinator=coordinator)
+            
+            if changes:
+                logger.info(f"Detected {len(changes)} changes")
+            else:
+                logger.info("No changes detected")
+            
+            if not loop:
+                return changes
+            time.sleep(interval)
+        
+    except KeyboardInterrupt:
+        logger.info("Web monitoring stopped")
+        return None
     except Exception as e:
         logger.error(f"Web monitoring failed: {e}", exc_info=True)
         return None
+    finally:
+        if maintenance is not None:
+            maintenance.stop()
+        if service is not None:
+            # 投递本次产生的通知，超时未投递的留在发件箱由下次运行继续
+            service.flush_notifications()
+        if coordinator is not None:
+            coordinator.shutdown()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,78 @@
+from typing import List, Dict, Any
+from datetime import datetime, timedelta
+import time
+
+import numpy as np
+
+from models.database import TokenModel
+from models.scoring import WeightBacktester
+from config.config import config
+from utils.logger import get_logger
+
+logger = get_logger('services.backtest')
+
+
+class WeightBacktestService:
+    """数据源权重回测服务"""
+    
+    def __init__(self):
+        self.db = TokenModel()
+        self.sources = list(config.get_weights())
+    
+    def run_backtest(self, days: int = 30, grid: List[float] = None, 
+                     samples: int = 0, top_k: int = 10, 
+                     show: int = 10) -> List[Dict[str, Any]]:
+        """在最近days天的历史运行上回测权重组合"""
+        logger.info(f"🧪 Backtesting weights for sources: {', '.join(self.sources)}")
+        
+        self.db.init_db()
+        
+        start_time = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+        runs = self.db.get_source_observations(start_time)
+        
+        if len(runs) < 2:
+            logger.warning(f"Not enough stored runs to backtest ({len(runs)} found, need at least 2)")
+            return []
+        
+        backtester = WeightBacktester(self.sources, top_k=top_k)
+        
+        configs = []
+        if grid:
+            configs.append(WeightBacktester.grid(self.sources, grid))
+        if samples:
+            configs.append(WeightBacktester.random(self.sources, samples))
+        if not configs:
+            configs.append(WeightBacktester.grid(self.sources, [0, 0.5, 1.0, 1.5, 2.0]))
+        
+        # 当前配置的权重总是参与比较
+        current = np.array([[config.get_weights()[s] for s in self.sources]])
+        weight_configs = np.vstack(configs + [current])
+        
+        started = time.perf_counter()
+        results = backtester.run(runs, weight_configs)
+        elapsed = time.perf_counter() - started
+        
+        logger.info(f"✅ Evaluated {len(weight_configs)} weight configurations "
+                    f"over {len(runs)} runs in {elapsed:.3f}s")
+        
+        self._print_results(results, show, top_k)
+        
+        return results
+    
+    def _print_results(self, results: List[Dict[str, Any]], show: int, top_k: int):
+        """打印回测结果"""
+        current = config.get_weights()
+        
+        lines = [f"Rank  Precision@{top_k}  Weights", "--------------------------------"]
+        
+        for i, result in enumerate(results[:show], 1):
+            weights = ", ".join(f"{s}={w}" for s, w in result["weights"].items())
+            lines.append(f"{i:<5} {result['precision_at_k']:<13} {weights}")
+        
+        for i, result in enumerate(results, 1):
+            if all(abs(result["weights"][s] - current[s]) < 1e-9 for s in self.sources):
+                lines.append(f"\nCurrent weights rank {i}/{len(results)} "
+                             f"with precision@{top_k} {result['precision_at_k']}")
+                break
+        
+        logger.info("\n" + "\n".join(lines))
@@ -0,0 +1,139 @@
+from typing import Any, Dict, Generator, List, TextIO
+import csv
+import json
+import sys
+
+from models.database import TokenModel, WebMonitorModel
+from utils.logger import get_logger
+
+logger = get_logger('services.export')
+
+# 数据集 -> (数据库, 读取方法, 各列类型)，类型用于Parquet的schema
+DATASETS = {
+    'tokens': ('alpha', 'iter_token_history', {
+        'id': 'int', 'symbol': 'text', 'name': 'text', 'rank': 'int', 'alpha_score': 'real',
+        'heat_level': 'int', 'created_at': 'text', 'updated_at': 'text'
+    }),
+    'token_rollups': ('alpha', 'iter_token_rollups', {
+        'day': 'text', 'symbol': 'text', 'runs': 'int', 'avg_score': 'real', 'max_score': 'real',
+        'best_rank': 'int', 'max_heat': 'int'
+    }),
+    'changes': ('monitor', 'iter_change_events', {
+        'id': 'int', 'url': 'text', 'element_type': 'text', 'change_type': 'text', 'magnitude': 'text',
+        'version': 'int', 'detected_at': 'text', 'content': 'text'
+    })
+}
+
+FORMATS = ('csv', 'ndjson', 'parquet')
+
+
+class CsvExporter:
+    """CSV，第一行为列名"""
+
+    def __init__(self, stream: TextIO, columns: List[str], types: Dict[str, str]):
+        self.writer = csv.writer(stream)
+        self.writer.writerow(columns)
+
+    def write(self, rows: List[tuple]):
+        self.writer.writerows(rows)
+
+    def close(self):
+        pass
+
+
+class NdjsonExporter:
+    """每行一个JSON对象"""
+
+    def __init__(self, stream: TextIO, columns: List[str], types: Dict[str, str]):
+        self.stream = stream
+        self.columns = columns
+
+    def write(self, rows: List[tuple]):
+        columns = self.columns
+        self.stream.writelines(
+            json.dumps(dict(zip(columns, row)), ensure_ascii=False) + '\n' for row in rows
+        )
+
+    def close(self):
+        pass
+
+
+class ParquetExporter:
+    """Parquet（需要pyarrow），每个分块写为一个行组"""
+
+    ARROW_TYPES = {'int': 'int64', 'real': 'float64', 'text': 'string'}
+
+    def __init__(self, path: str, columns: List[str], types: Dict[str, str]):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa = pa
+        self.schema = pa.schema([(column, getattr(pa, self.ARROW_TYPES[types[column]])()) for column in columns])
+        self.writer = pq.ParquetWriter(path, self.schema, compression='zstd')
+
+    def write(self, rows: List[tuple]):
+        arrays = [self.pa.array(values, type=field.type)
+                  for values, field in zip(zip(*rows), self.schema)]
+        self.writer.write_batch(self.pa.RecordBatch.from_arrays(arrays, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+class ExportService:
+    """从数据库流式导出代币历史、按天汇总和变更事件，分块读取、分块写出，内存占用恒定"""
+
+    def __init__(self, alpha_db: TokenModel = None, monitor_db: WebMonitorModel = None):
+        self.databases = {
+            'alpha': alpha_db or TokenModel(),
+            'monitor': monitor_db or WebMonitorModel()
+        }
+
+    def export(self, dataset: str, fmt: str = 'csv', output: str = '-', since: str = None,
+               until: str = None, symbols: List[str] = None, urls: List[str] = None,
+               chunk_size: int = 5000) -> int:
+        """导出数据集到output（'-' 表示标准输出，Parquet必须指定文件），返回导出的行数"""
+        if dataset not in DATASETS:
+            raise ValueError(f"Unknown dataset: {dataset} (choose from {', '.join(DATASETS)})")
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown format: {fmt} (choose from {', '.join(FORMATS)})")
+        if fmt == 'parquet':
+            if output == '-':
+                raise ValueError("Parquet export needs an output file")
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)")
+
+        db_name, method, types = DATASETS[dataset]
+        # 补齐表结构并确保WAL模式，长时间的读事务不会阻塞分析和监控写入
+        self.databases[db_name].init_db()
+        filters = {'urls': urls} if db_name == 'monitor' else {'symbols': symbols}
+        columns, chunks = getattr(self.databases[db_name], method)(
+            since=since, until=until, chunk_size=chunk_size, **filters)
+
+        if fmt == 'parquet':
+            return self._write(ParquetExporter(output, columns, types), chunks)
+
+        if output == '-':
+            return self._write(self._text_exporter(fmt, sys.stdout, columns, types), chunks)
+        with open(output, 'w', encoding='utf-8', newline='') as stream:
+            return self._write(self._text_exporter(fmt, stream, columns, types), chunks)
+
+    @staticmethod
+    def _text_exporter(fmt: str, stream: TextIO, columns: List[str], types: Dict[str, str]):
+        exporter_class = CsvExporter if fmt == 'csv' else NdjsonExporter
+        return exporter_class(stream, columns, types)
+
+    @staticmethod
+    def _write(exporter: Any, chunks: Generator[List[tuple], None, None]) -> int:
+        total = 0
+        try:
+            for rows in chunks:
+                exporter.write(rows)
+                total += len(rows)
+        finally:
+            exporter.close()
+            # 提前结束时也立即结束读事务、关闭连接
+            chunks.close()
+        return total
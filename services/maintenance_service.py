@@ -0,0 +1,142 @@
+from typing import Dict, Any, List
+from datetime import datetime
+import threading
+import time
+
+from models.database import DatabaseManager, TokenModel, WebMonitorModel
+from config.config import config
+from utils.metrics import metrics
+from utils.logger import get_logger
+
+logger = get_logger('services.maintenance')
+
+# 定时维护检查是否到期的间隔（秒）
+SCHEDULE_POLL_SECONDS = 600
+
+
+class MaintenanceService:
+    """
+    数据库维护：按保留期分批清理、增量vacuum回收空闲页、刷新规划器统计信息
+    所有步骤都按小批次提交，可以在其他进程读写数据库时运行
+    """
+
+    def __init__(self, alpha_db: TokenModel = None, monitor_db: WebMonitorModel = None):
+        self.databases: Dict[str, DatabaseManager] = {
+            'alpha': alpha_db or TokenModel(),
+            'monitor': monitor_db or WebMonitorModel()
+        }
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def stats(self, names: List[str] = None) -> Dict[str, Dict[str, Any]]:
+        """各数据库的大小、碎片和表统计"""
+        return {name: db.storage_stats() for name, db in self._select(names).items()}
+
+    def maintain(self, names: List[str] = None, vacuum: bool = True, analyze: bool = True) -> Dict[str, Any]:
+        """执行一次完整维护，返回每个数据库维护前后的统计和各步骤结果"""
+        settings = config.get_db_maintenance_config()
+        retention_days = dict(settings['retention_days'])
+        now = datetime.now()
+        report = {}
+
+        for name, db in self._select(names).items():
+            db.init_db()
+            started = time.perf_counter()
+            before = db.storage_stats()
+
+            with metrics.timer('db_maintenance_duration_seconds', 'Time spent in each maintenance step',
+                               database=name, step='retention'):
+                if name == 'monitor':
+                    deleted = db.apply_retention(retention_days, now, config.get_monitor_urls(),
+                                                 settings['batch_size'])
+                else:
+                    deleted = db.apply_retention(retention_days, now, settings['batch_size'])
+            for table, rows in deleted.items():
+                metrics.counter('db_retention_deleted_rows_total', 'Rows deleted by retention policies').inc(
+                    rows, database=name, table=table)
+
+            freed_pages = 0
+            if vacuum:
+                with metrics.timer('db_maintenance_duration_seconds', 'Time spent in each maintenance step',
+                                   database=name, step='vacuum'):
+                    freed_pages = db.incremental_vacuum(settings['vacuum_step_pages'])
+            if analyze:
+                with metrics.timer('db_maintenance_duration_seconds', 'Time spent in each maintenance step',
+                                   database=name, step='analyze'):
+                    db.analyze()
+            db.checkpoint()
+
+            after = db.storage_stats()
+            report[name] = {
+                'db_file': db.db_file,
+                'deleted': deleted,
+                'freed_pages': freed_pages,
+                'duration_seconds': round(time.perf_counter() - started, 3),
+                'before': before,
+                'after': after
+            }
+            if before['auto_vacuum'] != 'incremental':
+                logger.warning(f"{db.db_file} does not use incremental auto_vacuum; free pages are reused but the "
+                               f"file will not shrink until 'db maintain --convert' runs once", database=name)
+            logger.info(f"Maintained {db.db_file}: deleted {sum(deleted.values())} rows, freed {freed_pages} pages, "
+                        f"{before['file_bytes']} -> {after['file_bytes']} bytes", database=name)
+
+        return report
+
+    def convert(self, names: List[str] = None):
+        """把数据库切换为增量vacuum（一次完整VACUUM，期间独占数据库，建议在停机窗口执行）"""
+        for name, db in self._select(names).items():
+            logger.info(f"Converting {db.db_file} to incremental auto_vacuum (full VACUUM)...", database=name)
+            db.init_db()
+            db.convert_incremental_vacuum()
+
+    def run_if_due(self) -> bool:
+        """距上次维护超过 interval_hours 时执行一次（多个进程共享数据库时只有一个会执行）"""
+        interval = config.get_db_maintenance_config()['interval_hours'] * 3600
+        now = time.time()
+        claims = {}
+        for name, db in self.databases.items():
+            db.init_db()
+            run_id = db.claim_maintenance(now, interval)
+            if run_id is not None:
+                claims[name] = run_id
+        if not claims:
+            return False
+
+        report = self.maintain(list(claims))
+        for name, run_id in claims.items():
+            self.databases[name].finish_maintenance(run_id, time.time(), report[name])
+        return True
+
+    def start(self):
+        """启动后台定时维护线程（配置 db_maintenance.schedule 为false时不启动）"""
+        if not config.get_db_maintenance_config()['schedule']:
+            return
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name='db-maintenance', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止后台线程"""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                self.run_if_due()
+            except Exception as e:
+                logger.error(f"Scheduled database maintenance failed: {e}", exc_info=True)
+            self._stopping.wait(SCHEDULE_POLL_SECONDS)
+
+    def _select(self, names: List[str] = None) -> Dict[str, DatabaseManager]:
+        if not names:
+            return dict(self.databases)
+        unknown = set(names) - set(self.databases)
+        if unknown:
+            raise ValueError(f"Unknown database: {', '.join(sorted(unknown))}")
+        return {name: self.databases[name] for name in names}
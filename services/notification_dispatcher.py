@@ -0,0 +1,143 @@
+from typing import List, Dict
+import os
+import socket
+import threading
+import time
+import uuid
+
+from models.database import WebMonitorModel
+from services.notification_sinks import NotificationSink
+from utils.metrics import metrics
+from utils.logger import get_logger
+
+logger = get_logger('services.notification_dispatcher')
+
+# 连续失败时的最长退避时间（秒）
+MAX_BACKOFF_SECONDS = 3600
+
+# 认领一批投递的有效期（秒），分发器在投递中途退出时过期后由其他分发器重试
+CLAIM_SECONDS = 300
+
+
+class NotificationDispatcher:
+    """
+    通知分发器
+    变更事件先与页面状态在同一事务中写入发件箱（notification_outbox），
+    分发器在后台线程中按批次投递给每个目的地，各目的地独立记录已投递的位置，
+    投递成功后才前移，失败则按指数退避重试，保证至少一次投递且监控循环不等待任何目的地
+    多个工作进程共享发件箱时，每批投递前在数据库中原子认领目的地的当前位置，同一批只由一个分发器投递
+    """
+
+    def __init__(self, db: WebMonitorModel, sinks: List[NotificationSink] = None,
+                 batch_size: int = 50, retry_seconds: float = 30, poll_interval: float = 5):
+        self.db = db
+        self.batch_size = batch_size
+        self.retry_seconds = retry_seconds
+        self.poll_interval = poll_interval
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.sinks: Dict[str, NotificationSink] = {}
+        self._lock = threading.Lock()
+        self._dispatch_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self.set_sinks(sinks or [])
+
+    def set_sinks(self, sinks: List[NotificationSink]):
+        """更新目的地；新目的地从当前发件箱末尾开始，不补发历史通知"""
+        for sink in sinks:
+            self.db.register_notification_sink(sink.name)
+        with self._lock:
+            self.sinks = {sink.name: sink for sink in sinks}
+
+    def dispatch_once(self) -> int:
+        """每个到期的目的地投递一批，返回本次投递的事件数"""
+        with self._dispatch_lock:
+            return self._dispatch()
+
+    def _dispatch(self) -> int:
+        with self._lock:
+            sinks = list(self.sinks.values())
+
+        delivered = 0
+        now = time.time()
+        for sink in sinks:
+            state = self.db.get_notification_sink(sink.name)
+            if state is None or (state['next_attempt_at'] or 0) > now:
+                continue
+
+            batch = self.db.fetch_outbox(state['last_id'], self.batch_size)
+            if not batch:
+                continue
+            # 其他分发器已认领或已前移位置时跳过，由它负责这一批
+            if not self.db.claim_notification_sink(sink.name, self.owner, state['last_id'], CLAIM_SECONDS):
+                continue
+
+            try:
+                with metrics.timer('notification_send_duration_seconds', 'Time spent delivering a notification batch',
+                                   sink=sink.name):
+                    sink.send([entry['payload'] for entry in batch])
+            except Exception as e:
+                failures = state['failures'] + 1
+                backoff = min(self.retry_seconds * 2 ** (failures - 1), MAX_BACKOFF_SECONDS)
+                self.db.record_notification_failure(sink.name, str(e), now + backoff, self.owner)
+                metrics.counter('notification_failures_total', 'Failed notification batch deliveries').inc(sink=sink.name)
+                logger.warning(f"Notification sink {sink.name} failed, retrying in {backoff:.0f}s: {e}",
+                               sink=sink.name, failures=failures)
+                continue
+
+            self.db.advance_notification_sink(sink.name, batch[-1]['id'], self.owner)
+            metrics.counter('notifications_delivered_total', 'Change events delivered to notification sinks').inc(
+                len(batch), sink=sink.name)
+            logger.info(f"Delivered {len(batch)} notifications to {sink.name}", sink=sink.name)
+            delivered += len(batch)
+
+        return delivered
+
+    def pending(self) -> int:
+        """尚未投递给所有目的地的事件数（按最落后的目的地计）"""
+        with self._lock:
+            names = list(self.sinks)
+        return self.db.count_pending_notifications(names)
+
+    def start(self):
+        """启动后台投递线程（可重复调用）"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name='notification-dispatcher', daemon=True)
+        self._thread.start()
+
+    def wake(self):
+        """有新事件时立即唤醒投递线程"""
+        self._wakeup.set()
+
+    def drain(self, timeout: float = 30) -> bool:
+        """在当前线程中投递到没有到期的待发事件或超时，返回是否已全部投递"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if not self.dispatch_once():
+                break
+        remaining = self.pending()
+        if remaining:
+            logger.warning(f"{remaining} notifications still pending; they stay in the outbox for the next run")
+        return remaining == 0
+
+    def stop(self):
+        """停止后台线程"""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval + 10)
+            self._thread = None
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+            try:
+                # 有积压时连续投递
+                while not self._stopping.is_set() and self.dispatch_once():
+                    pass
+            except Exception as e:
+                logger.error(f"Notification dispatch failed: {e}", exc_info=True)
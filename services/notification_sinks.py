@@ -0,0 +1,152 @@
+from typing import List, Dict, Any, Mapping, Optional
+import json
+import os
+import ssl
+import urllib.request
+
+from utils.logger import get_logger
+
+logger = get_logger('services.notification_sinks')
+
+# 飞书卡片内容有长度限制，单个页面最多展示的变更条数
+LARK_MAX_CHANGES_PER_PAGE = 20
+
+
+def _post_json(url: str, data: Any, timeout: float = 10,
+               headers: Optional[Mapping[str, str]] = None) -> bytes:
+    """POST JSON，HTTP错误时抛出异常"""
+    context = ssl.create_default_context()
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+
+    request_headers = {'Content-Type': 'application/json'}
+    request_headers.update(headers or {})
+    req = urllib.request.Request(
+        url,
+        data=json.dumps(data, ensure_ascii=False).encode('utf-8'),
+        headers=request_headers
+    )
+    with urllib.request.urlopen(req, timeout=timeout, context=context) as response:
+        return response.read()
+
+
+class NotificationSink:
+    """通知目的地基类，send 失败时抛出异常，由分发器重试"""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def send(self, events: List[Dict[str, Any]]):
+        """投递一批变更事件"""
+        raise NotImplementedError
+
+
+class LarkSink(NotificationSink):
+    """飞书机器人，一批事件合并为一张卡片"""
+
+    def __init__(self, url: str, name: str = 'lark', timeout: float = 10):
+        super().__init__(name)
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, events: List[Dict[str, Any]]):
+        data = {
+            "msg_type": "interactive",
+            "card": {
+                "header": {
+                    "title": {
+                        "tag": "plain_text",
+                        "content": "Web Page Change Notification"
+                    },
+                    "template": "red"
+                },
+                "elements": [
+                    {
+                        "tag": "div",
+                        "text": {
+                            "tag": "lark_md",
+                            "content": self.format_message(events)
+                        }
+                    }
+                ]
+            }
+        }
+
+        body = json.loads(_post_json(self.url, data, self.timeout) or b'{}')
+        # 飞书在HTTP 200中用code字段返回业务错误
+        code = body.get('code', body.get('StatusCode', 0))
+        if code:
+            raise RuntimeError(f"Lark webhook returned code {code}: {body.get('msg', body)}")
+
+    @staticmethod
+    def format_message(events: List[Dict[str, Any]]) -> str:
+        """构建卡片的markdown内容"""
+        message = "## Web Page Change Notification\n\n"
+
+        for event in events:
+            message += f"**URL**: {event['url']}\n"
+            message += f"**Detection Time**: {event['detected_at']}"
+            if event.get('magnitude'):
+                message += f"  **Magnitude**: {event['magnitude']}"
+            message += "\n\n"
+
+            changes = event['changes']
+            for element_type, change_type, change_content in changes[:LARK_MAX_CHANGES_PER_PAGE]:
+                message += f"### {element_type} {change_type}\n```\n{change_content}\n```\n\n"
+            if len(changes) > LARK_MAX_CHANGES_PER_PAGE:
+                message += f"... {len(changes) - LARK_MAX_CHANGES_PER_PAGE} more changes\n\n"
+
+        return message
+
+
+class WebhookSink(NotificationSink):
+    """通用Webhook，POST {"events": [...]}"""
+
+    def __init__(self, url: str, name: str = None, timeout: float = 10,
+                 headers: Optional[Mapping[str, str]] = None):
+        super().__init__(name or f"webhook:{url}")
+        self.url = url
+        self.timeout = timeout
+        self.headers = dict(headers or {})
+
+    def send(self, events: List[Dict[str, Any]]):
+        _post_json(self.url, {"events": events}, self.timeout, self.headers)
+
+
+class NdjsonSink(NotificationSink):
+    """追加写入本地NDJSON文件，每个事件一行，主要用于测试和本地排查"""
+
+    def __init__(self, path: str, name: str = None):
+        super().__init__(name or f"ndjson:{path}")
+        self.path = path
+
+    def send(self, events: List[Dict[str, Any]]):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for event in events:
+                f.write(json.dumps(event, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+
+SINK_TYPES = {
+    'lark': LarkSink,
+    'webhook': WebhookSink,
+    'ndjson': NdjsonSink
+}
+
+
+def build_sinks(sink_configs: List[Mapping[str, Any]]) -> List[NotificationSink]:
+    """按配置创建通知目的地，配置无效的条目记录错误后跳过"""
+    sinks = []
+    for sink_config in sink_configs:
+        options = dict(sink_config)
+        sink_type = options.pop('type', None)
+        sink_class = SINK_TYPES.get(sink_type)
+        if sink_class is None:
+            logger.error(f"Unknown notification sink type: {sink_type}")
+            continue
+        try:
+            sinks.append(sink_class(**options))
+        except TypeError as e:
+            logger.error(f"Invalid {sink_type} sink configuration: {e}")
+    return sinks
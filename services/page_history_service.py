@@ -0,0 +1,57 @@
+from typing import List, Dict, Any, Optional
+import difflib
+
+from models.database import WebMonitorModel
+from utils import text_delta
+from utils.logger import get_logger
+
+logger = get_logger('services.page_history')
+
+
+class PageHistoryService:
+    """页面版本历史：列出版本、还原任意历史版本、比较两个版本"""
+    
+    def __init__(self, db: WebMonitorModel = None):
+        self.db = db or WebMonitorModel()
+        self.db.init_db()
+    
+    def list_versions(self, url: str) -> List[Dict[str, Any]]:
+        """列出URL的全部版本"""
+        return self.db.get_page_versions(url)
+    
+    def get_version(self, url: str, version: Optional[int] = None) -> Optional[str]:
+        """还原指定版本的内容，version为空时返回最新版本"""
+        if version is None:
+            versions = self.db.get_page_versions(url)
+            if not versions:
+                return None
+            version = versions[-1]['version']
+        
+        chain = self.db.get_version_chain(url, version)
+        if not chain or chain[-1]['version'] != version:
+            return None
+        
+        # 从最近的全文版本开始，逐个应用反向增量
+        content = text_delta.decompress(chain[0]['data'])
+        for record in chain[1:]:
+            content = text_delta.apply_delta(content, record['data'])
+        return content
+    
+    def diff_versions(self, url: str, old_version: int, new_version: int) -> Optional[str]:
+        """两个版本的统一diff文本"""
+        old_content = self.get_version(url, old_version)
+        new_content = self.get_version(url, new_version)
+        if old_content is None or new_content is None:
+            return None
+        
+        diff = difflib.unified_diff(
+            old_content.splitlines(), new_content.splitlines(),
+            fromfile=f"{url}@v{old_version}", tofile=f"{url}@v{new_version}", lineterm=''
+        )
+        return "\n".join(diff)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """存储统计：原始总字节数与实际存储字节数"""
+        stats = self.db.get_history_stats()
+        stats['ratio'] = round(stats['stored_bytes'] / stats['raw_bytes'], 4) if stats['raw_bytes'] else 0.0
+        return stats
@@ -0,0 +1,138 @@
+from typing import Dict, Any, Optional, Callable, Sequence, Tuple
+import hashlib
+import re
+
+from utils.metrics import metrics
+from utils.logger import get_logger
+
+logger = get_logger('services.page_precheck')
+
+PRECHECK_TIERS = ('head', 'range')
+
+# opener(url, timeout, method, headers) -> (status, headers, body)
+Opener = Callable[[str, float, str, Dict[str, str]], Tuple[int, Dict[str, str], bytes]]
+
+CONTENT_RANGE_PATTERN = re.compile(r'bytes\s+\d+-\d+/(\d+)')
+
+
+def _header(headers: Dict[str, str], name: str) -> Optional[str]:
+    """大小写不敏感地读取响应头"""
+    name = name.lower()
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def _int_or_none(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def extract_validators(headers: Dict[str, str], body: bytes, prefix_bytes: int) -> Dict[str, Any]:
+    """由一次完整下载的响应头和内容生成校验信息，供下次预检比较"""
+    return {
+        'etag': _header(headers, 'ETag'),
+        'last_modified': _header(headers, 'Last-Modified'),
+        'content_length': _int_or_none(_header(headers, 'Content-Length')),
+        'size': len(body),
+        'prefix_bytes': prefix_bytes,
+        'prefix_hash': hashlib.md5(body[:prefix_bytes]).hexdigest()
+    }
+
+
+class PrecheckResult:
+    """预检结果：unchanged 为 True 时无需下载；body 非空表示预检过程中已拿到完整内容"""
+
+    def __init__(self, tier: Optional[str] = None, unchanged: bool = False,
+                 body: Optional[bytes] = None, headers: Optional[Dict[str, str]] = None):
+        self.tier = tier
+        self.unchanged = unchanged
+        self.body = body
+        self.headers = headers or {}
+
+
+class PagePrechecker:
+    """
+    下载前的低成本预检
+    按配置顺序尝试各层级：
+    - head: HEAD请求比较 ETag / Last-Modified / Content-Length
+    - range: 只GET前N字节（<head>部分），比较前缀哈希和 Content-Range 中的总长度
+    某一层级的信号一致即判定未变更；信号不同则直接完整下载；信号缺失时尝试下一层级
+    """
+
+    def __init__(self, opener: Opener):
+        self.opener = opener
+
+    def check(self, url: str, tiers: Sequence[str], stored: Dict[str, Any],
+              timeout: float = 10, range_bytes: int = 4096) -> PrecheckResult:
+        """依次执行预检层级"""
+        for tier in tiers:
+            try:
+                if tier == 'head':
+                    outcome, result = self._check_head(url, stored, timeout)
+                elif tier == 'range':
+                    outcome, result = self._check_range(url, stored, timeout, range_bytes)
+                else:
+                    logger.warning(f"Unknown precheck tier: {tier}", url=url)
+                    continue
+            except Exception as e:
+                outcome, result = 'error', None
+                logger.debug(f"Precheck {tier} failed for {url}: {e}", url=url)
+
+            metrics.counter('monitor_precheck_total', 'Pre-download checks by tier and outcome').inc(
+                tier=tier, outcome=outcome)
+
+            if outcome in ('unchanged', 'changed') or (result is not None and result.body is not None):
+                return result
+
+        return PrecheckResult()
+
+    def _check_head(self, url: str, stored: Dict[str, Any],
+                    timeout: float) -> Tuple[str, Optional[PrecheckResult]]:
+        """HEAD请求比较缓存校验头"""
+        status, headers, _ = self.opener(url, timeout, 'HEAD', {})
+        if status >= 400:
+            return 'error', None
+
+        etag = _header(headers, 'ETag')
+        last_modified = _header(headers, 'Last-Modified')
+        content_length = _int_or_none(_header(headers, 'Content-Length'))
+
+        # 长度不同足以判定已变更
+        if content_length is not None and stored['content_length'] is not None \
+                and content_length != stored['content_length']:
+            return 'changed', PrecheckResult('head')
+
+        if etag and stored['etag']:
+            same = etag == stored['etag']
+        elif last_modified and stored['last_modified']:
+            same = last_modified == stored['last_modified']
+        else:
+            # 只有长度相同不足以判定未变更
+            return 'missing', None
+
+        return ('unchanged' if same else 'changed'), PrecheckResult('head', unchanged=same)
+
+    def _check_range(self, url: str, stored: Dict[str, Any], timeout: float,
+                     range_bytes: int) -> Tuple[str, Optional[PrecheckResult]]:
+        """只下载前range_bytes字节，比较前缀哈希和总长度"""
+        if stored['prefix_hash'] is None or stored['prefix_bytes'] != range_bytes:
+            return 'missing', None
+
+        status, headers, body = self.opener(url, timeout, 'GET', {'Range': f'bytes=0-{range_bytes - 1}'})
+        if status == 200:
+            # 服务器忽略Range直接返回全文，作为完整下载结果使用
+            return 'ignored', PrecheckResult('range', body=body, headers=headers)
+        if status != 206:
+            return 'error', None
+
+        match = CONTENT_RANGE_PATTERN.match(_header(headers, 'Content-Range') or '')
+        if not match:
+            return 'missing', None
+
+        same = int(match.group(1)) == stored['size'] \
+            and hashlib.md5(body[:range_bytes]).hexdigest() == stored['prefix_hash']
+        return ('unchanged' if same else 'changed'), PrecheckResult('range', unchanged=same)
@@ -0,0 +1,121 @@
+from typing import List, Dict, Iterable
+import bisect
+import hashlib
+import os
+import socket
+import threading
+import time
+
+from models.database import WebMonitorModel
+from utils.logger import get_logger
+
+logger = get_logger('services.shard_coordinator')
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], 'big')
+
+
+class ConsistentHashRing:
+    """一致性哈希环：工作进程增减时只有约 1/N 的URL需要换主"""
+    
+    def __init__(self, nodes: Iterable[str], vnodes: int = 64):
+        self.vnodes = vnodes
+        self._ring = sorted(
+            (_hash(f"{node}#{i}"), node)
+            for node in nodes
+            for i in range(vnodes)
+        )
+        self._keys = [h for h, _ in self._ring]
+    
+    def owner(self, key: str) -> str:
+        """返回key所属的节点"""
+        if not self._ring:
+            raise ValueError("Hash ring is empty")
+        index = bisect.bisect(self._keys, _hash(key)) % len(self._ring)
+        return self._ring[index][1]
+
+
+class ShardCoordinator:
+    """
+    分片协调器
+    工作进程通过共享数据库中的心跳发现彼此，按一致性哈希划分URL，
+    并用带过期时间的租约保证同一时刻只有一个进程检查某个URL；
+    进程退出或失联后其租约过期，URL由哈希环上的新主接管；
+    两轮检查之间由后台线程继续发送心跳，检查间隔不短于租约时长时进程也不会被视为失联
+    """
+    
+    def __init__(self, db: WebMonitorModel, worker_id: str = None,
+                 lease_seconds: float = 300, vnodes: int = 64):
+        self.db = db
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.vnodes = vnodes
+        self._last_renew = 0.0
+        self._owned: List[str] = []
+        self._stopping = threading.Event()
+        self._heartbeat_thread = None
+    
+    def claim(self, urls: List[str]) -> List[str]:
+        """发送心跳并领取本进程负责的URL，同时释放不再属于自己的租约"""
+        now = time.time()
+        self.db.heartbeat(self.worker_id, now)
+        
+        live_workers = self.db.get_live_workers(now - self.lease_seconds)
+        if self.worker_id not in live_workers:
+            live_workers.append(self.worker_id)
+        ring = ConsistentHashRing(live_workers, self.vnodes)
+        
+        mine = [url for url in urls if ring.owner(url) == self.worker_id]
+        mine_set = set(mine)
+        others = [url for url in urls if url not in mine_set]
+        
+        # 哈希环变化后交出不再属于自己的URL，新主无需等待租约过期
+        self.db.release_leases(self.worker_id, others)
+        
+        self._owned = self.db.acquire_leases(self.worker_id, mine, now, now + self.lease_seconds)
+        self._last_renew = now
+        
+        waiting = len(mine) - len(self._owned)
+        logger.info(f"Worker {self.worker_id} owns {len(self._owned)}/{len(urls)} URLs "
+                    f"across {len(live_workers)} workers"
+                    + (f", {waiting} waiting for lease expiry" if waiting else ""))
+        self._start_heartbeat()
+        return self._owned
+    
+    def maybe_renew(self):
+        """长时间的检查循环中，租约过去三分之一时续约"""
+        now = time.time()
+        if now - self._last_renew < self.lease_seconds / 3:
+            return
+        self.db.heartbeat(self.worker_id, now)
+        self._owned = self.db.acquire_leases(self.worker_id, self._owned, now, now + self.lease_seconds)
+        self._last_renew = now
+    
+    def owns(self, url: str) -> bool:
+        """本进程当前是否持有该URL的租约"""
+        return url in self._owned
+    
+    def _start_heartbeat(self):
+        """首次领取后启动后台心跳线程（每三分之一租约时长一次）"""
+        if self._heartbeat_thread is not None:
+            return
+        self._heartbeat_thread = threading.Thread(target=self._heartbeat_loop, name='shard-heartbeat', daemon=True)
+        self._heartbeat_thread.start()
+    
+    def _heartbeat_loop(self):
+        while not self._stopping.wait(self.lease_seconds / 3):
+            try:
+                self.db.heartbeat(self.worker_id, time.time())
+            except Exception as e:
+                logger.warning(f"Worker {self.worker_id} heartbeat failed: {e}")
+    
+    def shutdown(self):
+        """正常退出时注销并释放租约，其他进程可立即接管"""
+        self._stopping.set()
+        if self._heartbeat_thread is not None:
+            self._heartbeat_thread.join(timeout=10)
+            self._heartbeat_thread = None
+        self.db.remove_worker(self.worker_id)
+        self._owned = []
+        logger.info(f"Worker {self.worker_id} released its leases")
@@ -0,0 +1,126 @@
+from typing import Any, Callable, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import signal
+import threading
+import time
+
+from services.web3_alpha_service import Web3AlphaService
+from services.web_monitor_service import WebMonitorService
+from services.maintenance_service import MaintenanceService, SCHEDULE_POLL_SECONDS
+from config.config import config
+from utils.metrics import metrics
+from utils.logger import get_logger
+
+logger = get_logger('services.supervisor')
+
+# 定时任务名称
+JOBS = ('alpha', 'monitor', 'maintenance')
+
+
+class Supervisor:
+    """
+    单进程运行定时Alpha分析、Web监控轮询、数据库维护和API服务
+    调度在一个asyncio事件循环中，阻塞任务在各自的任务线程池中执行，HTTP请求使用独立的请求线程池，
+    长时间的分析或监控轮询不会占用请求线程；服务实例（数据库、HTTP连接池、配置、缓存）和指标在各部分之间共享
+    """
+
+    def __init__(self, alpha_service: Web3AlphaService = None, monitor_service: WebMonitorService = None,
+                 workers: int = 8):
+        self.alpha_service = alpha_service or Web3AlphaService()
+        self.monitor_service = monitor_service or WebMonitorService()
+        self.maintenance = MaintenanceService(self.alpha_service.db, self.monitor_service.db)
+        # 请求线程池（供 api.pooled_server 使用）；每个定时任务最多同时运行一次，任务线程池按任务数固定
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='serve-all')
+        self.job_executor = ThreadPoolExecutor(max_workers=len(JOBS), thread_name_prefix='serve-all-job')
+        self.coordinator = None
+        self.server = None
+        self._server_thread = None
+        self.after_analysis: List[Callable[[], Any]] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopping: Optional[asyncio.Event] = None
+
+    def run(self, server=None, alpha_interval: float = 3600, monitor_interval: float = 300,
+            run_on_start: bool = True):
+        """
+        运行直到收到 SIGINT/SIGTERM
+        server 为在 self.executor 中处理请求的WSGI服务器（见 api.pooled_server），为None时不提供API
+        """
+        self.server = server
+        try:
+            asyncio.run(self._main(alpha_interval, monitor_interval, run_on_start))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._shutdown()
+
+    def stop(self):
+        """请求停止（可在任意线程调用），正在执行的任务完成后退出"""
+        if self._loop is not None and self._stopping is not None:
+            self._loop.call_soon_threadsafe(self._stopping.set)
+
+    async def _main(self, alpha_interval: float, monitor_interval: float, run_on_start: bool):
+        self._loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                self._loop.add_signal_handler(sig, self._stopping.set)
+            except (NotImplementedError, RuntimeError):
+                # 非主线程或不支持的平台，依赖 KeyboardInterrupt
+                pass
+
+        if self.server is not None:
+            self._server_thread = threading.Thread(target=self.server.serve_forever, name='api-server', daemon=True)
+            self._server_thread.start()
+            logger.info(f"API listening on {self.server.host}:{self.server.port}")
+
+        jobs = [
+            self._every('alpha', alpha_interval, self._run_alpha, run_on_start),
+            self._every('monitor', monitor_interval, self._run_monitor, run_on_start)
+        ]
+        if config.get_db_maintenance_config()['schedule']:
+            jobs.append(self._every('maintenance', SCHEDULE_POLL_SECONDS, self.maintenance.run_if_due, True))
+        await asyncio.gather(*jobs)
+
+    async def _every(self, name: str, interval: float, job: Callable[[], Any], run_on_start: bool):
+        """每隔 interval 秒（从上次开始计）在线程池中执行一次，上一次未结束时不会重叠执行"""
+        started = time.monotonic() if not run_on_start else None
+        while not self._stopping.is_set():
+            if started is not None:
+                delay = max(0.0, interval - (time.monotonic() - started))
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=delay)
+                    return
+                except asyncio.TimeoutError:
+                    pass
+            started = time.monotonic()
+            await self._loop.run_in_executor(self.job_executor, self._run_job, name, job)
+
+    def _run_job(self, name: str, job: Callable[[], Any]):
+        try:
+            with metrics.timer('supervisor_job_duration_seconds', 'Duration of jobs run by serve-all', job=name):
+                job()
+        except Exception as e:
+            metrics.counter('supervisor_job_failures_total', 'Failed jobs run by serve-all').inc(job=name)
+            logger.error(f"Scheduled {name} job failed: {e}", exc_info=True)
+
+    def _run_alpha(self):
+        self.alpha_service.run_analysis()
+        # 同一进程内直接通知缓存失效，不必等到下次请求比较数据版本
+        for callback in self.after_analysis:
+            callback()
+
+    def _run_monitor(self):
+        changes = self.monitor_service.monitor_urls(coordinator=self.coordinator)
+        logger.info(f"Detected {len(changes)} changes" if changes else "No changes detected")
+
+    def _shutdown(self):
+        logger.info("Stopping serve-all...")
+        if self._server_thread is not None:
+            self.server.shutdown()
+        self.job_executor.shutdown(wait=True)
+        self.executor.shutdown(wait=True)
+        # 投递本次产生的通知，超时未投递的留在发件箱由下次运行继续
+        self.monitor_service.flush_notifications()
+        if self.coordinator is not None:
+            self.coordinator.shutdown()
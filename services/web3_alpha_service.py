@@ -1,13 +1,28 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from concurrent.futures import Future, TimeoutError as FutureTimeout
 from datetime import datetime, timedelta
 from collections import Counter
+import threading
+import time
 
 from models.database import TokenModel
+from models.heavy_hitters import SpaceSaving, WINDOWS
+from models.token_universe import TokenUniverse
 from models.data_source import (
     RedditDataSource, CoinGeckoDataSource, DexScreenerDataSource,
-    TextAnalyzer, AlphaScoreCalculator
+    TextAnalyzer, AlphaScoreCalculator, MomentumCalculator
 )
 from config.config import config
+from utils.metrics import metrics
+from utils.resilience import CircuitBreaker, Deadline, call_with_retries
+from utils.logger import get_logger
+
+logger = get_logger('services.web3_alpha')
+
+SOURCE_NAMES = ('reddit', 'coingecko', 'dexscreener')
+
+STAGE_METRIC = 'alpha_stage_duration_seconds'
+STAGE_HELP = 'Time spent in each Web3 Alpha analysis stage'
 
 
 class Web3AlphaService:
@@ -15,12 +30,25 @@ class Web3AlphaService:
     
     def __init__(self):
         self.db = TokenModel()
-        self.narratives = config.get_narratives()
-        self.data_sources_config = config.get_data_sources()
-        self.weights = config.get_weights()
+        self.config_version = None
+        # 超过预算后不再等待但仍在运行的获取调用，结束前不会为同一数据源发起新的调用
+        self._inflight: Dict[str, Future] = {}
+        self._apply_config()
+    
+    def _apply_config(self):
+        """按当前配置快照（重新）构建数据源和分析器，配置未变化时不做任何事"""
+        snapshot = config.snapshot
+        if snapshot.version == self.config_version:
+            return
+        
+        self.config_version = snapshot.version
+        self.narratives = snapshot.narratives
+        self.data_sources_config = snapshot.data_sources
+        self.weights = snapshot.weights
         
         # 初始化数据源
         self.sources = {}
+        default_timeout = snapshot.source_resilience['timeout']
         
         # Reddit数据源
         reddit_config = self.data_sources_config.get('reddit', {})
@@ -28,111 +56,246 @@ class Web3AlphaService:
             self.sources['reddit'] = RedditDataSource(
                 client_id=reddit_config.get('client_id', ''),
                 client_secret=reddit_config.get('client_secret', ''),
-                user_agent=reddit_config.get('user_agent', 'web3-alpha-tracker')
+                user_agent=reddit_config.get('user_agent', 'web3-alpha-tracker'),
+                timeout=reddit_config.get('timeout', default_timeout)
             )
         
         # CoinGecko数据源
         coingecko_config = self.data_sources_config.get('coingecko', {})
         if coingecko_config.get('enabled', True):
             self.sources['coingecko'] = CoinGeckoDataSource(
-                api_url=coingecko_config.get('api_url', 'https://api.coingecko.com/api/v3')
+                api_url=coingecko_config.get('api_url', 'https://api.coingecko.com/api/v3'),
+                timeout=coingecko_config.get('timeout', default_timeout)
             )
         
         # DexScreener数据源
         dexscreener_config = self.data_sources_config.get('dexscreener', {})
         if dexscreener_config.get('enabled', True):
             self.sources['dexscreener'] = DexScreenerDataSource(
-                api_url=dexscreener_config.get('api_url', 'https://api.dexscreener.com/latest/dex/search')
+                api_url=dexscreener_config.get('api_url', 'https://api.dexscreener.com/latest/dex/search'),
+                queries=dexscreener_config.get('queries', ('sol',)),
+                chains=dexscreener_config.get('chains', ()),
+                max_pairs_per_query=dexscreener_config.get('max_pairs_per_query'),
+                max_workers=dexscreener_config.get('max_workers', 4),
+                timeout=dexscreener_config.get('timeout', default_timeout)
+            )
+        
+        # 代币全集索引（过滤/规范化文本中提取的符号）
+        universe_config = snapshot.token_universe
+        self.token_universe = None
+        if universe_config['enabled']:
+            self.token_universe = TokenUniverse(
+                api_url=coingecko_config.get('api_url', 'https://api.coingecko.com/api/v3'),
+                cache_file=universe_config['cache_file'],
+                ttl_hours=universe_config['ttl_hours'],
+                aliases=universe_config['aliases'],
+                ignore=universe_config['ignore']
             )
         
         # 初始化分析器
-        self.text_analyzer = TextAnalyzer(self.narratives)
+        self.heavy_hitters_config = snapshot.heavy_hitters
+        self.text_analyzer = TextAnalyzer(self.narratives, snapshot.narrative_matchers,
+                                          capacity=self.heavy_hitters_config['capacity'])
         self.score_calculator = AlphaScoreCalculator(self.weights)
+        self.momentum_calculator = MomentumCalculator(
+            half_life_hours=snapshot.momentum['half_life_hours']
+        )
     
     def run_analysis(self):
         """运行完整的分析流程"""
-        print("\n🚀 Starting Web3 Alpha Radar\n")
+        logger.info("🚀 Starting Web3 Alpha Radar")
+        
+        # 长驻进程中拾取config.json的修改
+        self._apply_config()
         
         # 初始化数据库
         self.db.init_db()
         
-        # 获取数据
-        reddit_texts = []
-        cg_tokens = []
-        cg_details = {}
-        dex_tokens = []
-        dex_details = {}
-        
-        if 'reddit' in self.sources:
-            reddit_texts = self._fetch_reddit()
-        if 'coingecko' in self.sources:
-            cg_tokens, cg_details = self._fetch_coingecko()
-        if 'dexscreener' in self.sources:
-            dex_tokens, dex_details = self._fetch_dex()
+        # 获取数据（并发，受整体截止时间预算约束）
+        fetched = self._fetch_sources()
+        reddit_texts = fetched.get('reddit', {}).get('data') or []
+        cg_tokens, cg_details = fetched.get('coingecko', {}).get('data') or ([], {})
+        dex_tokens, dex_details = fetched.get('dexscreener', {}).get('data') or ([], {})
+        source_results = {
+            name: {key: value for key, value in result.items() if key != 'data'}
+            for name, result in fetched.items()
+        }
+        missing = sorted(name for name, result in source_results.items() if result['status'] != 'ok')
+        if missing:
+            logger.warning(f"⚠️  Partial run: no data from {', '.join(missing)}", sources=missing)
         
         # 分析文本
-        reddit_tokens, hashtags, narratives = self.text_analyzer.analyze(reddit_texts)
+        with metrics.timer(STAGE_METRIC, STAGE_HELP, stage='analyze', source='reddit'):
+            reddit_tokens, hashtags, narratives = self.text_analyzer.analyze(reddit_texts)
+        
+        dex_signals = DexScreenerDataSource.signal_totals(dex_details)
+        
+        # 校验并规范化代币符号，未知符号不参与打分和存储
+        unknown_tokens = Counter()
+        if self.token_universe:
+            with metrics.timer(STAGE_METRIC, STAGE_HELP, stage='validate', source='all'):
+                self.token_universe.ensure_fresh()
+                cg_tokens = self.token_universe.canonicalize_all(cg_tokens)
+                dex_tokens = self.token_universe.canonicalize_all(dex_tokens)
+                dex_signals = {signal: self.token_universe.canonicalize_counts(totals)
+                               for signal, totals in dex_signals.items()}
+                reddit_tokens, unknown_tokens = self.token_universe.partition(
+                    reddit_tokens, extra_known=set(cg_tokens) | set(dex_tokens)
+                )
+            if unknown_tokens:
+                logger.info(f"🗑️  Unknown symbols dropped: {sum(unknown_tokens.values())} mentions "
+                            f"of {len(unknown_tokens)} symbols")
         
         # 计算Alpha分数
-        alpha_scores = self.score_calculator.calculate(
-            reddit_tokens,
-            cg_tokens,
-            dex_tokens
-        )
+        source_counts = {
+            'reddit': reddit_tokens,
+            'coingecko': Counter(cg_tokens),
+            'dexscreener': Counter(dex_tokens)
+        }
+        # 配置了权重的DexScreener信号（成交量、流动性）按代币汇总后参与打分
+        for signal, totals in dex_signals.items():
+            if f'dexscreener_{signal}' in self.weights:
+                source_counts[f'dexscreener_{signal}'] = DexScreenerDataSource.signal_scores(totals)
+        with metrics.timer(STAGE_METRIC, STAGE_HELP, stage='score', source='all'):
+            alpha_scores = self.score_calculator.calculate_sources(source_counts)
         
         # 准备数据并保存
         tokens_data = self._prepare_tokens_data(
             alpha_scores, cg_details, dex_details
         )
         
-        self.db.save_tokens(tokens_data)
-        self.db.save_narratives(dict(narratives.most_common(20)))
-        self.db.save_hashtags(dict(hashtags.most_common(20)))
+        with metrics.timer(STAGE_METRIC, STAGE_HELP, stage='save', source='all'):
+            self.db.save_tokens(tokens_data)
+            self.db.save_narratives(dict(narratives.most_common(20)))
+            self.db.save_hashtags(dict(hashtags.most_common(20)))
+            
+            # 增量更新动量状态
+            self._update_momentum(alpha_scores)
+            
+            # 跨运行的提及次数 top-K 摘要（滑动窗口）
+            self._update_heavy_hitters({
+                'token': reddit_tokens,
+                'hashtag': hashtags,
+                'narrative': narratives
+            })
+            
+            # 运行记录最后写入，新的运行ID表示本批数据已完整落库（Dashboard缓存据此失效）；
+            # 同时记录各数据源是否贡献了数据，缺少数据源的运行标记为 partial
+            self.db.save_source_observations(source_counts, source_results)
+        
+        metrics.counter('alpha_runs_total', 'Completed Web3 Alpha analysis runs').inc()
+        metrics.counter('alpha_tokens_scored_total', 'Tokens scored by Web3 Alpha analysis').inc(len(alpha_scores))
         
         # 打印仪表板
         self._print_dashboard(alpha_scores, narratives, hashtags)
         
-        print("\n💾 Data saved to database: web3_alpha.db")
+        logger.info(f"💾 Data saved to database: {self.db.db_file}")
         
         return {
             'tokens': tokens_data,
             'narratives': dict(narratives.most_common(20)),
-            'hashtags': dict(hashtags.most_common(20))
+            'hashtags': dict(hashtags.most_common(20)),
+            'unknown_tokens': dict(unknown_tokens.most_common(20)),
+            'sources': source_results,
+            'partial': bool(missing)
         }
     
-    def _fetch_reddit(self) -> List[str]:
-        """获取Reddit数据"""
-        if 'reddit' not in self.sources:
-            print("📡 Reddit: Skipped (disabled in config)")
-            return []
-        print("📡 Reddit...")
-        texts = self.sources['reddit'].fetch()
-        print(f"✅ Reddit texts: {len(texts)}")
-        return texts
-    
-    def _fetch_coingecko(self) -> tuple:
-        """获取CoinGecko数据"""
-        if 'coingecko' not in self.sources:
-            print("📡 CoinGecko: Skipped (disabled in config)")
-            return [], {}
-        print("📡 CoinGecko...")
-        tokens, details = self.sources['coingecko'].fetch()
-        print(f"✅ CoinGecko tokens: {len(tokens)}")
-        return tokens, details
-    
-    def _fetch_dex(self) -> tuple:
-        """获取DexScreener数据"""
-        if 'dexscreener' not in self.sources:
-            print("📡 DexScreener: Skipped (disabled in config)")
-            return [], {}
-        print("📡 DexScreener...")
-        tokens, details = self.sources['dexscreener'].fetch()
-        print(f"✅ Dex tokens: {len(tokens)}")
-        return tokens, details
+    def _fetch_sources(self) -> Dict[str, Dict[str, Any]]:
+        """
+        并发获取所有启用的数据源，整体受 source_resilience.deadline_seconds 预算约束；
+        失败时按退避有限重试，连续失败的数据源熔断 cooldown_seconds 秒
+        返回 {数据源: {status, data, items, attempts, duration_ms, error}}，status 为
+        ok、failed、timeout（预算内未返回）、circuit_open（熔断中跳过）或 busy（上次超时的调用仍未结束）
+        """
+        for name in SOURCE_NAMES:
+            if name not in self.sources:
+                logger.info(f"📡 {name}: Skipped (disabled in config)", source=name)
+        
+        settings = config.get_source_resilience_config()
+        deadline = Deadline(settings['deadline_seconds'])
+        health = self.db.get_source_health()
+        now = time.time()
+        breakers = {}
+        results = {}
+        pending = {}
+        
+        for name, source in self.sources.items():
+            state = health.get(name, {})
+            breaker = breakers[name] = CircuitBreaker(
+                settings['failure_threshold'], settings['cooldown_seconds'],
+                state.get('state', CircuitBreaker.CLOSED), state.get('failures', 0), state.get('opened_until', 0.0)
+            )
+            previous = self._inflight.get(name)
+            if not breaker.allow(now):
+                results[name] = {'status': 'circuit_open',
+                                 'error': f"circuit open until {datetime.fromtimestamp(breaker.opened_until):%H:%M:%S}"}
+            elif previous is not None and not previous.done():
+                results[name] = {'status': 'busy', 'error': 'previous fetch still running'}
+            else:
+                logger.debug(f"📡 {name}...", source=name)
+                pending[name] = self._inflight[name] = self._start_fetch(name, source, settings, deadline)
+        
+        for name, future in pending.items():
+            try:
+                data, attempts, duration = future.result(timeout=deadline.remaining())
+            except FutureTimeout:
+                results[name] = {'status': 'timeout', 'attempts': 0,
+                                 'duration_ms': int(settings['deadline_seconds'] * 1000),
+                                 'error': f"no result within the {settings['deadline_seconds']:g}s run budget"}
+                breakers[name].record_failure()
+            except Exception as e:
+                results[name] = {'status': 'failed', 'attempts': getattr(e, 'attempts', 1),
+                                 'duration_ms': int(getattr(e, 'duration', 0) * 1000),
+                                 'error': f"{type(e).__name__}: {e}"[:500]}
+                breakers[name].record_failure()
+            else:
+                items = len(data) if name == 'reddit' else len(data[0])
+                results[name] = {'status': 'ok', 'data': data, 'items': items, 'attempts': attempts,
+                                 'duration_ms': int(duration * 1000), 'error': None}
+                breakers[name].record_success()
+                metrics.counter('alpha_source_items_total', 'Items fetched per data source').inc(items, source=name)
+        
+        for name, result in results.items():
+            result.setdefault('items', 0)
+            result.setdefault('attempts', 0)
+            result.setdefault('duration_ms', 0)
+            metrics.counter('alpha_source_fetch_total', 'Data source fetches per outcome').inc(
+                source=name, status=result['status'])
+            if result['status'] == 'ok':
+                logger.info(f"✅ {name}: {result['items']} items", source=name, items=result['items'],
+                            attempts=result['attempts'])
+            else:
+                logger.warning(f"❌ {name}: {result['status']} ({result['error']})", source=name,
+                               status=result['status'])
+        
+        self.db.save_source_health({
+            name: {**breaker.to_dict(), 'last_error': results[name]['error']}
+            for name, breaker in breakers.items()
+        })
+        return results
+    
+    def _start_fetch(self, name: str, source, settings, deadline: Deadline) -> Future:
+        """在守护线程中获取数据源：超过预算后不再等待，挂起的调用也不会阻止进程退出"""
+        future = Future()
+        
+        def run():
+            started = time.perf_counter()
+            try:
+                with metrics.timer(STAGE_METRIC, STAGE_HELP, stage='fetch', source=name):
+                    data, attempts = call_with_retries(
+                        source.fetch, settings['retries'], settings['backoff_seconds'], deadline)
+            except Exception as e:
+                e.duration = time.perf_counter() - started
+                future.set_exception(e)
+            else:
+                future.set_result((data, attempts, time.perf_counter() - started))
+        
+        threading.Thread(target=run, name=f'fetch-{name}', daemon=True).start()
+        return future
     
     def _prepare_tokens_data(self, alpha_scores: Counter, 
                           cg_details: Dict[str, Dict[str, str]],
-                          dex_details: Dict[str, Dict[str, str]]) -> List[Dict[str, Any]]:
+                          dex_details: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
         """准备代币数据"""
         tokens_data = []
         max_score = max(alpha_scores.values()) if alpha_scores else 1
@@ -154,44 +317,92 @@ class Web3AlphaService:
             elif symbol in dex_details:
                 token_info["name"] = dex_details[symbol]["name"]
                 token_info["icon_url"] = dex_details[symbol]["icon_url"]
+            if symbol in dex_details:
+                token_info["dex_volume_24h"] = dex_details[symbol]["volume_24h"]
+                token_info["dex_liquidity_usd"] = dex_details[symbol]["liquidity_usd"]
             
             tokens_data.append(token_info)
         
         return tokens_data
     
+    def _update_momentum(self, alpha_scores: Counter):
+        """用本次运行的分数增量更新动量状态（只触及本次出现的代币）"""
+        if not alpha_scores:
+            return
+        
+        now = datetime.now()
+        states = self.db.get_momentum_states(list(alpha_scores.keys()))
+        
+        updated = {
+            symbol: self.momentum_calculator.update(states.get(symbol), score, now)
+            for symbol, score in alpha_scores.items()
+        }
+        
+        self.db.save_momentum_states(updated)
+    
+    def _update_heavy_hitters(self, counts: Dict[str, Counter]):
+        """把本次运行的计数合并进当前时间桶的 Space-Saving 摘要，并合并/清理旧的桶"""
+        settings = self.heavy_hitters_config
+        now = datetime.now()
+        bucket_seconds = settings['bucket_minutes'] * 60
+        start = datetime.fromtimestamp(now.timestamp() // bucket_seconds * bucket_seconds)
+        bucket_start = start.strftime("%Y-%m-%d %H:%M:%S")
+        bucket_end = (start + timedelta(seconds=bucket_seconds)).strftime("%Y-%m-%d %H:%M:%S")
+        
+        summaries = {}
+        for kind, counter in counts.items():
+            summary = SpaceSaving(settings['capacity'], self.db.get_heavy_hitter_bucket(kind, bucket_start))
+            summary.merge((item, count, 0) for item, count in counter.items())
+            summaries[kind] = summary.items()
+        self.db.save_heavy_hitters(bucket_start, bucket_end, summaries)
+        
+        # 超过一天的细粒度桶按天合并，超过最长窗口的桶删除
+        rollup_before = (now - timedelta(hours=WINDOWS['24h'])).strftime("%Y-%m-%d %H:%M:%S")
+        for kind, day in self.db.get_heavy_hitter_rollup_days(rollup_before):
+            day_end = (datetime.strptime(day, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d %H:%M:%S")
+            day_start = f"{day} 00:00:00"
+            summary = SpaceSaving(settings['capacity'], self.db.get_heavy_hitter_bucket(kind, day_start, day_end))
+            self.db.save_heavy_hitters(day_start, day_end, {kind: summary.items()}, replace_range=True)
+        self.db.prune_heavy_hitters(
+            (now - timedelta(hours=max(WINDOWS.values()))).strftime("%Y-%m-%d %H:%M:%S"))
+    
     def _print_dashboard(self, alpha_tokens: Counter, 
                       narratives: Counter, hashtags: Counter):
-        """打印仪表板"""
-        print("\n")
-        print("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
-        print("🔥 WEB3 ALPHA TREND RADAR")
-        print("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
+        """输出仪表板（整块文本一次写入日志）"""
+        lines = [
+            "",
+            "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━",
+            "🔥 WEB3 ALPHA TREND RADAR",
+            "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━",
+        ]
         
         # 代币
-        print("\n🥇 MOST DISCUSSED TOKENS (Alpha Score)")
-        print("Rank  Token    Score   Heat")
-        print("--------------------------------")
+        lines.append("\n🥇 MOST DISCUSSED TOKENS (Alpha Score)")
+        lines.append("Rank  Token    Score   Heat")
+        lines.append("--------------------------------")
         
         max_score = max(alpha_tokens.values()) if alpha_tokens else 1
         
         for i, (t, s) in enumerate(alpha_tokens.most_common(12), 1):
             heat = self._heat_bar(s, max_score)
-            print(f"{i:<5} {t:<8} {round(s,2):<7} {heat}")
+            lines.append(f"{i:<5} {t:<8} {round(s,2):<7} {heat}")
         
         # 叙事
-        print("\n🚀 HOTTEST WEB3 NARRATIVES")
-        print("Rank  Narrative   Mentions")
-        print("--------------------------------")
+        lines.append("\n🚀 HOTTEST WEB3 NARRATIVES")
+        lines.append("Rank  Narrative   Mentions")
+        lines.append("--------------------------------")
         
         for i, (n, c) in enumerate(narratives.most_common(10), 1):
-            print(f"{i:<5} {n:<12} {c}")
+            lines.append(f"{i:<5} {n:<12} {c}")
         
         # 标签
-        print("\n📢 TRENDING HASHTAGS")
-        print("--------------------------------")
+        lines.append("\n📢 TRENDING HASHTAGS")
+        lines.append("--------------------------------")
         
         for tag, c in hashtags.most_common(10):
-            print(tag, c)
+            lines.append(f"{tag} {c}")
+        
+        logger.info("\n".join(lines))
     
     def _heat_bar(self, score: float, max_score: float) -> str:
         """生成热度条"""
@@ -220,10 +431,67 @@ class Web3AlphaService:
         
         return self.db.get_tokens_by_time_range(start_time_str, limit)
     
-    def get_narratives(self) -> List[Dict[str, Any]]:
-        """获取叙事数据"""
-        return self.db.get_narratives()
+    def get_momentum(self, limit: int = 100, 
+                   sort_by: str = 'momentum') -> List[Dict[str, Any]]:
+        """获取衰减到当前时刻的代币动量数据"""
+        now = datetime.now()
+        
+        states = [
+            self.momentum_calculator.decayed(state, now)
+            for state in self.db.get_all_momentum_states()
+        ]
+        
+        if sort_by not in ('momentum', 'velocity', 'ewma_score'):
+            sort_by = 'momentum'
+        
+        states.sort(key=lambda state: state[sort_by], reverse=True)
+        
+        for state in states:
+            state['momentum'] = round(state['momentum'], 4)
+            state['ewma_score'] = round(state['ewma_score'], 4)
+            state['velocity'] = round(state['velocity'], 4)
+        
+        return states[:limit]
+    
+    def get_latest_run(self) -> Optional[Dict[str, Any]]:
+        """最近一次分析运行：状态（complete/partial）和各数据源结果"""
+        return self.db.get_latest_run()
+    
+    def get_source_health(self) -> Dict[str, Dict[str, Any]]:
+        """各数据源的熔断器状态"""
+        return self.db.get_source_health()
+    
+    def get_data_version(self) -> int:
+        """数据版本：每次分析运行完成后递增"""
+        return self.db.get_latest_run_id()
+    
+    def get_source_history(self, days: int = 30) -> List[Dict[str, Dict[str, float]]]:
+        """获取最近days天内每次运行的数据源计数"""
+        start_time = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+        return self.db.get_source_observations(start_time)
+    
+    def get_heavy_hitters(self, kind: str, window: str = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        滑动窗口内提及次数最高的代币/标签/叙事
+        window 可选值：1h, 24h, 7d，默认取配置 heavy_hitters.default_window
+        """
+        if window not in WINDOWS:
+            window = config.get_heavy_hitters_config()['default_window']
+        since = (datetime.now() - timedelta(hours=WINDOWS.get(window, 24))).strftime("%Y-%m-%d %H:%M:%S")
+        return self.db.get_heavy_hitters(kind, since, limit)
+    
+    def get_narratives(self, window: str = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """获取叙事数据（滑动窗口内的提及次数）"""
+        return [
+            {'name': row['item'], 'mention_count': row['count'], 'error': row['error'],
+             'updated_at': row['updated_at']}
+            for row in self.get_heavy_hitters('narrative', window, limit)
+        ]
     
-    def get_hashtags(self) -> List[Dict[str, Any]]:
-        """获取标签数据"""
-        return self.db.get_hashtags()
+    def get_hashtags(self, window: str = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """获取标签数据（滑动窗口内的出现次数）"""
+        return [
+            {'tag': row['item'], 'count': row['count'], 'error': row['error'],
+             'updated_at': row['updated_at']}
+            for row in self.get_heavy_hitters('hashtag', window, limit)
+        ]
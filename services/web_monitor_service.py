@@ -1,126 +1,387 @@
-import requests
 import ssl
 import urllib.request
-import json
-from bs4 import BeautifulSoup
-from typing import List, Tuple, Dict, Any
+from typing import List, Tuple, Dict, Any, Optional
+from datetime import datetime
+import difflib
 import hashlib
+import os
+import time
 
 from models.database import WebMonitorModel
+from services.notification_dispatcher import NotificationDispatcher
+from services.notification_sinks import build_sinks
+from services.page_precheck import PagePrechecker, extract_validators
+from utils.file_watch import create_watcher, file_md5, file_signature, file_url_path
+from utils.html_extract import PageExtract, get_backend
+from utils.simhash import (SimHashIndex, fingerprint_html, hamming_distance, classify_change,
+                           TRIVIAL_DISTANCE, MAJOR_DISTANCE)
 from config.config import config
+from utils.helpers import encode_cursor, decode_cursor
+from utils.metrics import metrics
+from utils.logger import get_logger
+
+logger = get_logger('services.web_monitor')
+
+STAGE_METRIC = 'monitor_stage_duration_seconds'
+STAGE_HELP = 'Time spent in each web monitor stage'
+
+# 监听模式下收到文件事件后等待后续事件的时间，合并一次写入产生的多个事件
+WATCH_SETTLE_SECONDS = 0.2
 
 
 class WebMonitorService:
     """Web监控服务"""
     
-    def __init__(self):
-        self.db = WebMonitorModel()
-        self.lark_webhook_url = config.get_lark_webhook_url()
+    def __init__(self, db: WebMonitorModel = None):
+        self.db = db or WebMonitorModel()
+        self.db.init_db()
+        self.dispatcher = None
+        self.notification_config = None
+        self.prechecker = PagePrechecker(self._request)
+        self.extract = get_backend(config.get('html_parser', 'auto'))
     
-    def monitor_urls(self, urls: List[str] = None):
-        """监控多个URL"""
-        if urls is None:
-            urls = config.get_monitor_urls()
+    def monitor_urls(self, urls: List[str] = None, coordinator=None):
+        """监控多个URL，传入 ShardCoordinator 时只检查本工作进程持有租约的URL"""
+        # 每轮都从当前配置快照读取，长驻进程无需重启即可拾取修改
+        targets = config.get_monitor_targets(urls)
+        all_urls = [target.url for target in targets]
+        self.extract = get_backend(config.get('html_parser', 'auto'))
+        self._apply_notification_config()
+        
+        if coordinator is not None:
+            owned = set(coordinator.claim(all_urls))
+            targets = [target for target in targets if target.url in owned]
         
-        print(f"\n🔍 Monitoring {len(urls)} URLs\n")
+        logger.info(f"🔍 Monitoring {len(targets)} URLs")
         
         changes = []
         
-        for url in urls:
-            print(f"Checking: {url}")
-            url_changes = self._check_url(url)
+        for target in targets:
+            url = target.url
+            if coordinator is not None:
+                coordinator.maybe_renew()
+                # 续约失败（如进程长时间卡住后租约被接管）时跳过，避免重复检查
+                if not coordinator.owns(url):
+                    continue
+            logger.debug("Checking URL", url=url)
+            url_changes = self._check_url(url, target.settings)
+            metrics.counter('monitor_urls_checked_total', 'URLs checked by the web monitor').inc()
             if url_changes:
                 changes.extend(url_changes)
+                metrics.counter('monitor_changes_total', 'Changes detected by the web monitor').inc(len(url_changes))
         
-        # 发送通知
-        if changes and self.lark_webhook_url:
-            self._send_lark_notification(changes)
+        # 通知已在保存页面状态时写入发件箱，由后台分发器投递，这里只唤醒它
+        if changes:
+            self.dispatcher.wake()
+        
+        self.find_near_duplicates(all_urls)
         
         return changes
     
-    def _check_url(self, url: str) -> List[Tuple[str, str, str]]:
+    def watch_urls(self, urls: List[str] = None, interval: float = 300, coordinator=None,
+                   stop_event=None):
+        """
+        监听模式：file:// 目标由文件系统事件触发即时检查，
+        其余URL（以及本地文件的兜底检查）每隔 interval 秒完整检查一轮
+        """
+        watcher = create_watcher()
+        file_targets = {}
+        next_sweep = 0.0
+        try:
+            while stop_event is None or not stop_event.is_set():
+                if time.monotonic() >= next_sweep:
+                    self.monitor_urls(urls, coordinator)
+                    # 每轮按当前配置刷新监听的文件
+                    file_targets = {}
+                    for target in config.get_monitor_targets(urls):
+                        if target.url.startswith('file://'):
+                            path = os.path.abspath(file_url_path(target.url))
+                            file_targets[path] = target
+                            watcher.add(path)
+                    next_sweep = time.monotonic() + interval
+                
+                changed = watcher.wait(min(next_sweep - time.monotonic(), 1.0))
+                if coordinator is not None:
+                    coordinator.maybe_renew()
+                if not changed:
+                    continue
+                for _ in range(10):
+                    more = watcher.wait(WATCH_SETTLE_SECONDS)
+                    if not more:
+                        break
+                    changed |= more
+                
+                changes = []
+                for path in sorted(changed):
+                    target = file_targets.get(path)
+                    if target is None or (coordinator is not None and not coordinator.owns(target.url)):
+                        continue
+                    logger.debug("File changed", url=target.url)
+                    url_changes = self._check_url(target.url, target.settings)
+                    metrics.counter('monitor_urls_checked_total', 'URLs checked by the web monitor').inc()
+                    if url_changes:
+                        changes.extend(url_changes)
+                        metrics.counter('monitor_changes_total', 'Changes detected by the web monitor').inc(
+                            len(url_changes))
+                if changes:
+                    self.dispatcher.wake()
+        finally:
+            watcher.close()
+    
+    def _apply_notification_config(self):
+        """按当前配置创建或更新通知分发器，并确保后台投递线程在运行"""
+        notification_config = config.get_notification_config()
+        if notification_config is not self.notification_config:
+            sinks = build_sinks(notification_config['sinks'])
+            if self.dispatcher is None:
+                self.dispatcher = NotificationDispatcher(
+                    self.db, sinks,
+                    batch_size=notification_config['batch_size'],
+                    retry_seconds=notification_config['retry_seconds']
+                )
+            else:
+                self.dispatcher.set_sinks(sinks)
+            self.notification_config = notification_config
+        self.dispatcher.start()
+    
+    def flush_notifications(self, timeout: float = None) -> bool:
+        """投递发件箱中的待发通知并停止后台线程，用于单次运行结束时"""
+        if self.dispatcher is None:
+            return True
+        self.dispatcher.stop()
+        if timeout is None:
+            timeout = config.get_notification_config()['drain_timeout']
+        return self.dispatcher.drain(timeout)
+    
+    def get_pages(self, cursor: str = None, limit: int = 100) -> Dict[str, Any]:
+        """分页列出监控页面"""
+        values = decode_cursor(cursor) if cursor else None
+        if values is not None and (len(values) != 1 or not isinstance(values[0], str)):
+            raise ValueError(f"Invalid cursor: {cursor}")
+        after_url = values[0] if values else None
+        pages = self.db.query_pages(after_url, limit + 1)
+        next_cursor = encode_cursor([pages[limit - 1]['url']]) if len(pages) > limit else None
+        return {'data': pages[:limit], 'next_cursor': next_cursor}
+    
+    def get_changes(self, url: str = None, element_type: str = None, change_type: str = None,
+                    since: str = None, until: str = None, cursor: str = None,
+                    limit: int = 100) -> Dict[str, Any]:
+        """按时间倒序分页查询变更事件，cursor 为上一页返回的 next_cursor"""
+        before = tuple(decode_cursor(cursor)) if cursor else None
+        if before is not None and (len(before) != 2 or not isinstance(before[0], str)
+                                   or not isinstance(before[1], int) or isinstance(before[1], bool)):
+            raise ValueError(f"Invalid cursor: {cursor}")
+        events = self.db.query_change_events(url, element_type, change_type, since, until, before, limit + 1)
+        next_cursor = None
+        if len(events) > limit:
+            last = events[limit - 1]
+            next_cursor = encode_cursor([last['detected_at'], last['id']])
+        return {'data': events[:limit], 'next_cursor': next_cursor}
+    
+    def find_near_duplicates(self, urls: List[str]) -> List[Tuple[str, str, int]]:
+        """按SimHash指纹找出内容几乎相同的监控URL（重复抓取浪费）"""
+        max_distance = config.snapshot.monitor_defaults.get('near_duplicate_distance', 3)
+        index = SimHashIndex(max_distance)
+        for url, fingerprint in self.db.get_page_fingerprints(urls).items():
+            index.add(url, fingerprint)
+        
+        duplicates = index.near_duplicates()
+        for url_a, url_b, distance in duplicates:
+            logger.warning(f"Near-duplicate monitor URLs: {url_a} ~ {url_b}", distance=distance)
+        return duplicates
+    
+    def _check_url(self, url: str, settings: Dict[str, Any] = None) -> List[Tuple[str, str, str]]:
         """检查单个URL的变更"""
-        content = self._get_page_content(url)
+        settings = settings or config.snapshot.monitor_defaults
+        timeout = settings.get('timeout', 10)
+        # 预检只对HTTP(S)生效
+        tiers = (settings.get('precheck') or ()) if url.startswith(('http://', 'https://')) else ()
+        range_bytes = settings.get('precheck_range_bytes', 4096)
+        
+        signature = None
+        if url.startswith('file://') and settings.get('file_stat_precheck', True):
+            unchanged, signature = self._precheck_file(url)
+            if unchanged:
+                return []
+        
+        raw = headers = None
+        if tiers:
+            stored = self.db.get_page_validators(url)
+            if stored:
+                with metrics.timer(STAGE_METRIC, STAGE_HELP, stage='precheck'):
+                    result = self.prechecker.check(url, tiers, stored, timeout, range_bytes)
+                if result.unchanged:
+                    self.db.record_precheck(url, result.tier)
+                    logger.debug(f"Precheck {result.tier}: unchanged", url=url)
+                    return []
+                raw, headers = result.body, result.headers
+        
+        content, headers = self._get_page_content(url, timeout, raw, headers)
         if not content:
             return []
         
-        # 计算内容哈希
-        content_hash = hashlib.md5(content.encode()).hexdigest()
+        # 计算内容哈希和SimHash指纹
+        with metrics.timer(STAGE_METRIC, STAGE_HELP, stage='hash'):
+            content_hash = hashlib.md5(content.encode()).hexdigest()
         
         # 获取历史记录
         page_data = self.db.get_page_by_url(url)
         
         changes = []
+        magnitude = None
         
-        if page_data and page_data['hash'] != content_hash:
-            # 检测到变更
-            changes = self._detect_changes(
-                page_data['content'],
-                content,
-                url
-            )
+        if page_data and page_data['trivial_hash'] == content_hash:
+            # 已判定过的细微变更（基准版本未替换），不再重复指纹、分类和记录
+            magnitude = 'trivial'
+            fingerprint = None
+        else:
+            # 内容未变时沿用已保存的指纹；旧版本写入的页面没有指纹时补算
+            with metrics.timer(STAGE_METRIC, STAGE_HELP, stage='fingerprint'):
+                fingerprint = page_data['simhash'] if page_data and page_data['hash'] == content_hash \
+                    and page_data['simhash'] else fingerprint_html(content)
+        
+        if page_data and page_data['hash'] != content_hash and magnitude is None:
+            distance = hamming_distance(fingerprint, page_data['simhash']) if page_data['simhash'] else None
+            magnitude = classify_change(distance, settings.get('simhash_trivial', TRIVIAL_DISTANCE),
+                                        settings.get('simhash_major', MAJOR_DISTANCE))
+            metrics.counter('monitor_change_magnitude_total', 'Detected changes by magnitude').inc(
+                magnitude=magnitude)
+            if magnitude == 'trivial':
+                # 记录已判定的内容，之后的检查不再重复判定和输出
+                logger.debug("Change detected: trivial", url=url, distance=distance)
+                self.db.save_trivial_hash(url, content_hash)
+            else:
+                logger.info(f"Change detected: {magnitude}", url=url, distance=distance)
+                # 检测到变更
+                changes = self._detect_changes(
+                    page_data['content'],
+                    content,
+                    url
+                )
         
         # 保存当前状态
-        self.db.save_page(url, content, content_hash)
+        with metrics.timer(STAGE_METRIC, STAGE_HELP, stage='persist'):
+            # 版本历史记录每个不同的内容（包括细微变更），内容未变时不写入
+            history = config.get_monitor_history_config()
+            version = None
+            if history['enabled']:
+                version = self.db.add_page_version(url, content, content_hash, history['keyframe_interval'])
+            # 细微变更不替换基准版本，多次细微变更累积后会被识别为 minor/major
+            # 页面状态、变更记录和通知发件箱在同一事务中写入
+            if magnitude != 'trivial':
+                self.db.save_check_result(url, content, content_hash, fingerprint, changes,
+                                          datetime.now().strftime("%Y-%m-%d %H:%M:%S"), magnitude, version)
+            if tiers:
+                self.db.save_page_validators(url, extract_validators(headers, content.encode('utf-8'), range_bytes))
+                self.db.record_precheck(url, 'full')
+            if signature is not None:
+                # 记录读取前取得的状态：读取期间文件若又被修改，下次检查时状态不一致会重新读取
+                self.db.save_file_stat(url, signature)
+                self.db.record_precheck(url, 'full')
         
         return changes
     
-    def _get_page_content(self, url: str) -> str:
-        """获取页面内容"""
+    def _precheck_file(self, url: str) -> Tuple[bool, Optional[Tuple[int, int, int]]]:
+        """
+        本地文件预检：(mtime, size, inode) 与上次相同时不读取文件；
+        状态变化但内容哈希不变（如只 touch 过）时只更新状态，返回是否未变更和当前状态
+        """
+        path = file_url_path(url)
+        signature = file_signature(path)
+        if signature is None:
+            # 文件不存在等错误交给正常读取流程记录
+            return False, None
+        
+        if self.db.get_file_stat(url) == signature:
+            self.db.record_precheck(url, 'stat')
+            logger.debug("Precheck stat: unchanged", url=url)
+            return True, signature
+        
         try:
-            if url.startswith('file://'):
-                # 本地文件
-                file_path = url.replace('file://', '')
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    return f.read()
-            else:
-                # 网络请求
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                }
-                
-                # 创建SSL上下文，不验证证书
-                context = ssl.create_default_context()
-                context.check_hostname = False
-                context.verify_mode = ssl.CERT_NONE
-                
-                req = urllib.request.Request(url, headers=headers)
-                with urllib.request.urlopen(req, timeout=10, context=context) as response:
-                    return response.read().decode('utf-8')
+            with metrics.timer(STAGE_METRIC, STAGE_HELP, stage='precheck'):
+                content_hash = file_md5(path)
+        except OSError:
+            return False, None
+        if content_hash == self.db.get_page_hash(url):
+            self.db.save_file_stat(url, signature)
+            self.db.record_precheck(url, 'file_hash')
+            logger.debug("Precheck file_hash: unchanged", url=url)
+            return True, signature
+        return False, signature
+    
+    def _get_page_content(self, url: str, timeout: float = 10, raw: Optional[bytes] = None,
+                          headers: Optional[Dict[str, str]] = None) -> Tuple[str, Dict[str, str]]:
+        """获取页面内容和响应头，raw 非空时（预检已拿到全文）跳过下载"""
+        try:
+            if raw is None:
+                with metrics.timer(STAGE_METRIC, STAGE_HELP, stage='fetch'):
+                    raw, headers = self._fetch_raw(url, timeout)
+            with metrics.timer(STAGE_METRIC, STAGE_HELP, stage='decode'):
+                return raw.decode('utf-8'), headers or {}
         except Exception as e:
-            print(f"Failed to fetch {url}: {e}")
-            return ""
+            metrics.counter('monitor_fetch_errors_total', 'Failed page fetches').inc()
+            logger.warning(f"Failed to fetch {url}: {e}", url=url)
+            return "", {}
+    
+    def _fetch_raw(self, url: str, timeout: float = 10) -> Tuple[bytes, Dict[str, str]]:
+        """获取页面原始字节和响应头"""
+        if url.startswith('file://'):
+            # 本地文件
+            file_path = file_url_path(url)
+            with open(file_path, 'rb') as f:
+                return f.read(), {}
+        else:
+            # 网络请求
+            status, headers, body = self._request(url, timeout)
+            return body, headers
+    
+    def _request(self, url: str, timeout: float = 10, method: str = 'GET',
+                 extra_headers: Dict[str, str] = None) -> Tuple[int, Dict[str, str], bytes]:
+        """发送HTTP请求，返回状态码、响应头和内容"""
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+        }
+        headers.update(extra_headers or {})
+        
+        # 创建SSL上下文，不验证证书
+        context = ssl.create_default_context()
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+        
+        req = urllib.request.Request(url, headers=headers, method=method)
+        with urllib.request.urlopen(req, timeout=timeout, context=context) as response:
+            return response.status, dict(response.headers), response.read()
     
     def _detect_changes(self, old_content: str, new_content: str, 
                       url: str) -> List[Tuple[str, str, str]]:
         """检测内容变更"""
-        import difflib
+        # 解析HTML，每个版本只遍历一次
+        with metrics.timer(STAGE_METRIC, STAGE_HELP, stage='parse'):
+            old_page = self.extract(old_content)
+            new_page = self.extract(new_content)
         
-        changes = []
+        with metrics.timer(STAGE_METRIC, STAGE_HELP, stage='diff'):
+            changes = self._diff_pages(old_page, new_page)
         
-        # 解析HTML
-        old_soup = BeautifulSoup(old_content, 'html.parser')
-        new_soup = BeautifulSoup(new_content, 'html.parser')
+        return changes
+    
+    def _diff_pages(self, old_page: PageExtract, 
+                    new_page: PageExtract) -> List[Tuple[str, str, str]]:
+        """比较两个版本的文本行和元素"""
+        changes = []
         
         # 检测文本变更
-        old_texts = [t.strip() for t in old_soup.get_text().split('\n') if t.strip()]
-        new_texts = [t.strip() for t in new_soup.get_text().split('\n') if t.strip()]
-        
-        diff = difflib.unified_diff(old_texts, new_texts, lineterm='')
-        
-        for line in diff:
-            if line.startswith('- ') and len(line) > 2:
-                changes.append(('text', 'deleted', line[2:]))
-            elif line.startswith('+ ') and len(line) > 2:
-                changes.append(('text', 'added', line[2:]))
+        matcher = difflib.SequenceMatcher(None, old_page.text_lines, new_page.text_lines)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag in ('replace', 'delete'):
+                changes.extend(('text', 'deleted', line) for line in old_page.text_lines[i1:i2])
+            if tag in ('replace', 'insert'):
+                changes.extend(('text', 'added', line) for line in new_page.text_lines[j1:j2])
         
         # 检测元素变更
-        old_elements = self._extract_elements(old_soup)
-        new_elements = self._extract_elements(new_soup)
-        
-        for element_type, elements in new_elements.items():
-            if element_type in old_elements:
-                old_set = set(old_elements[element_type])
+        for element_type, elements in new_page.elements.items():
+            if element_type in old_page.elements:
+                old_set = set(old_page.elements[element_type])
                 new_set = set(elements)
                 
                 added = new_set - old_set
@@ -132,98 +393,3 @@ class WebMonitorService:
                     changes.append((element_type, 'deleted', str(elem)))
         
         return changes
-    
-    def _extract_elements(self, soup: BeautifulSoup) -> Dict[str, List[Any]]:
-        """提取页面元素"""
-        elements = {
-            'images': [],
-            'scripts': [],
-            'styles': [],
-            'links': []
-        }
-        
-        # 图片
-        for img in soup.find_all('img'):
-            src = img.get('src', '')
-            if src:
-                elements['images'].append(src)
-        
-        # 脚本
-        for script in soup.find_all('script'):
-            src = script.get('src', '')
-            content = script.string
-            if src:
-                elements['scripts'].append(src)
-            elif content:
-                elements['scripts'].append(content[:100])
-        
-        # 样式
-        for style in soup.find_all('style'):
-            content = style.string
-            if content:
-                elements['styles'].append(content[:100])
-        
-        # 链接
-        for link in soup.find_all('a'):
-            href = link.get('href', '')
-            if href:
-                elements['links'].append(href)
-        
-        return elements
-    
-    def _send_lark_notification(self, changes: List[Tuple[str, str, str]]):
-        """发送飞书通知"""
-        if not self.lark_webhook_url:
-            return False
-        
-        # 构建消息
-        message = "## Web Page Change Notification\n\n"
-        message += f"**Detection Time**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
-        
-        for element_type, change_type, change_content in changes:
-            if element_type == 'text' and change_type == 'modified':
-                modified_content = change_content.replace('- ', 'Old content: ').replace('+ ', 'New content: ')
-                message += f"### Text Changes\n```\n{modified_content}\n```\n\n"
-            else:
-                message += f"### {element_type} Changes\n```\n{change_content}\n```\n\n"
-        
-        # 构建飞书消息格式
-        data = {
-            "msg_type": "interactive",
-            "card": {
-                "header": {
-                    "title": {
-                        "tag": "plain_text",
-                        "content": "Web Page Change Notification"
-                    },
-                    "template": "red"
-                },
-                "elements": [
-                    {
-                        "tag": "div",
-                        "text": {
-                            "tag": "lark_md",
-                            "content": message
-                        }
-                    }
-                ]
-            }
-        }
-        
-        try:
-            context = ssl.create_default_context()
-            context.check_hostname = False
-            context.verify_mode = ssl.CERT_NONE
-            
-            req = urllib.request.Request(
-                self.lark_webhook_url,
-                data=json.dumps(data).encode('utf-8'),
-                headers={'Content-Type': 'application/json'}
-            )
-            with urllib.request.urlopen(req, timeout=10, context=context) as response:
-                response_data = response.read().decode('utf-8')
-                print(f"Lark notification sent successfully: {response_data}")
-                return True
-        except Exception as e:
-            print(f"Failed to send Lark notification: {e}")
-            return False
\ No newline at end of file
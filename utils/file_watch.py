@@ -0,0 +1,183 @@
+"""
+本地文件（file:// 目标）的状态签名、哈希与变更监听
+Linux 上通过 ctypes 直接调用 inotify（监听文件所在目录，兼容"写临时文件再重命名"的生成方式），
+其他平台回退为按 (mtime, size, inode) 轮询
+"""
+
+from typing import Dict, Iterable, Optional, Set, Tuple
+import ctypes
+import ctypes.util
+import hashlib
+import mmap
+import os
+import select
+import struct
+import sys
+import time
+
+from utils.logger import get_logger
+
+logger = get_logger('utils.file_watch')
+
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_CREATE | IN_DELETE | IN_ATTRIB
+
+EVENT_HEADER = struct.Struct('iIII')
+
+# 超过该大小的文件用 mmap 分块哈希，不把整个文件读入内存
+MMAP_THRESHOLD = 1024 * 1024
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_url_path(url: str) -> str:
+    """file:// URL 对应的本地路径"""
+    return url[len('file://'):]
+
+
+def file_signature(path: str) -> Optional[Tuple[int, int, int]]:
+    """文件的 (mtime_ns, size, inode)，文件不存在时为None"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+def file_md5(path: str) -> str:
+    """文件内容的md5，与 md5(content.encode()) 一致（content 为UTF-8解码后的文本）"""
+    digest = hashlib.md5()
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < MMAP_THRESHOLD:
+            digest.update(f.read())
+            return digest.hexdigest()
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if hasattr(mapped, 'madvise'):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            view = memoryview(mapped)
+            try:
+                for offset in range(0, len(mapped), HASH_CHUNK_SIZE):
+                    digest.update(view[offset:offset + HASH_CHUNK_SIZE])
+            finally:
+                view.release()
+    return digest.hexdigest()
+
+
+class InotifyWatcher:
+    """基于inotify的监听：按目录注册，返回发生变化的被监听文件"""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or None, use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+        self._dirs: Dict[int, str] = {}
+        self._watched_dirs: Dict[str, int] = {}
+        self._files: Set[str] = set()
+
+    def add(self, path: str):
+        """监听文件（实际监听其所在目录）"""
+        path = os.path.abspath(path)
+        directory = os.path.dirname(path)
+        if directory not in self._watched_dirs:
+            wd = self._add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                errno = ctypes.get_errno()
+                logger.warning(f"Cannot watch {directory}: {os.strerror(errno)}")
+                return
+            self._dirs[wd] = directory
+            self._watched_dirs[directory] = wd
+        self._files.add(path)
+
+    def wait(self, timeout: float) -> Set[str]:
+        """等待最多timeout秒，返回发生变化的被监听文件"""
+        deadline = time.monotonic() + max(0.0, timeout)
+        while True:
+            # 同目录中其他文件的事件不算变化，继续等待到超时
+            changed = self._read_events(deadline - time.monotonic())
+            if changed or time.monotonic() >= deadline:
+                return changed
+
+    def _read_events(self, timeout: float) -> Set[str]:
+        readable, _, _ = select.select([self._fd], [], [], max(0.0, timeout))
+        if not readable:
+            return set()
+
+        changed = set()
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, name_len = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + name_len].rstrip(b'\0')
+                offset += name_len
+                if mask & IN_Q_OVERFLOW:
+                    # 事件队列溢出，保守地认为全部文件都可能变化
+                    changed.update(self._files)
+                    continue
+                directory = self._dirs.get(wd)
+                if directory and name:
+                    path = os.path.join(directory, os.fsdecode(name))
+                    if path in self._files:
+                        changed.add(path)
+        return changed
+
+    def close(self):
+        os.close(self._fd)
+
+
+class PollingWatcher:
+    """轮询 (mtime, size, inode) 的监听，inotify 不可用时使用"""
+
+    def __init__(self, poll_interval: float = 1.0):
+        self.poll_interval = poll_interval
+        self._signatures: Dict[str, Optional[Tuple[int, int, int]]] = {}
+
+    def add(self, path: str):
+        path = os.path.abspath(path)
+        if path not in self._signatures:
+            self._signatures[path] = file_signature(path)
+
+    def wait(self, timeout: float) -> Set[str]:
+        time.sleep(max(0.0, min(timeout, self.poll_interval)))
+        changed = set()
+        for path, signature in self._signatures.items():
+            current = file_signature(path)
+            if current != signature:
+                self._signatures[path] = current
+                changed.add(path)
+        return changed
+
+    def close(self):
+        pass
+
+
+def create_watcher(paths: Iterable[str] = ()):
+    """创建当前平台可用的监听器"""
+    watcher = None
+    if sys.platform.startswith('linux'):
+        try:
+            watcher = InotifyWatcher()
+        except (OSError, AttributeError) as e:
+            logger.warning(f"inotify unavailable, falling back to polling: {e}")
+    if watcher is None:
+        watcher = PollingWatcher()
+    for path in paths:
+        watcher.add(path)
+    return watcher
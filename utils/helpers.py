@@ -65,4 +65,25 @@ def calculate_percentage(value: float, total: float) -> float:
     """计算百分比"""
     if total == 0:
         return 0.0
-    return (value / total) * 100
\ No newline at end of file
+    return (value / total) * 100
+
+
+def encode_cursor(values: list) -> str:
+    """把分页位置（最后一条记录的排序键）编码为不透明的游标字符串"""
+    import base64
+    import json
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> list:
+    """解码游标，格式不正确时抛出 ValueError"""
+    import base64
+    import binascii
+    import json
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    if not isinstance(values, list):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return values
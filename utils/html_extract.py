@@ -0,0 +1,240 @@
+"""
+HTML提取后端
+一次遍历同时得到页面文本行和图片/脚本/样式/链接四类元素，
+按可用性依次选择 selectolax、lxml，最后回退到标准库 html.parser 的流式解析；
+bs4 后端保留原先基于 BeautifulSoup 的实现，用于对照和基准测试
+"""
+
+from html.parser import HTMLParser
+from typing import Callable, Dict, List, Optional
+
+from utils.logger import get_logger
+
+logger = get_logger('utils.html_extract')
+
+ELEMENT_TYPES = ('images', 'scripts', 'styles', 'links')
+
+# 与 BeautifulSoup.get_text() 一致：脚本、样式内容不计入页面文本
+NON_TEXT_TAGS = frozenset(('script', 'style', 'template'))
+
+# 内联脚本、样式只保留前100个字符参与比较
+INLINE_PREVIEW = 100
+
+
+class PageExtract:
+    """一次解析的结果：去空白后的非空文本行和各类元素"""
+
+    __slots__ = ('text_lines', 'elements')
+
+    def __init__(self, text_lines: List[str], elements: Dict[str, List[str]]):
+        self.text_lines = text_lines
+        self.elements = elements
+
+
+def _empty_elements() -> Dict[str, List[str]]:
+    return {element_type: [] for element_type in ELEMENT_TYPES}
+
+
+def _split_lines(text: str) -> List[str]:
+    return [line.strip() for line in text.split('\n') if line.strip()]
+
+
+class _StreamingExtractor(HTMLParser):
+    """基于标准库tokenizer的流式提取，不构建文档树"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.text_parts: List[str] = []
+        self.elements = _empty_elements()
+        self._skip_depth = 0
+        self._raw_tag: Optional[str] = None
+        self._raw_parts: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'img' or tag == 'a' or tag == 'script':
+            name = 'href' if tag == 'a' else 'src'
+            value = ''
+            for key, attr_value in attrs:
+                if key == name:
+                    value = attr_value or ''
+            if value:
+                self.elements['links' if tag == 'a' else 'images' if tag == 'img' else 'scripts'].append(value)
+
+        if tag in NON_TEXT_TAGS:
+            self._skip_depth += 1
+            # 没有src的脚本和样式收集内联内容
+            if tag == 'style' or (tag == 'script' and not value):
+                self._raw_tag = tag
+                self._raw_parts = []
+
+    def handle_endtag(self, tag):
+        if tag in NON_TEXT_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+            if self._raw_tag == tag:
+                content = ''.join(self._raw_parts)
+                if content:
+                    self.elements['scripts' if tag == 'script' else 'styles'].append(content[:INLINE_PREVIEW])
+                self._raw_tag = None
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            if self._raw_tag:
+                self._raw_parts.append(data)
+        else:
+            self.text_parts.append(data)
+
+
+def extract_stdlib(html: str) -> PageExtract:
+    """标准库 html.parser 流式解析"""
+    parser = _StreamingExtractor()
+    parser.feed(html)
+    parser.close()
+    return PageExtract(_split_lines(''.join(parser.text_parts)), parser.elements)
+
+
+def extract_bs4(html: str) -> PageExtract:
+    """BeautifulSoup + html.parser（原实现：get_text 加四次 find_all）"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    elements = _empty_elements()
+
+    for img in soup.find_all('img'):
+        if img.get('src', ''):
+            elements['images'].append(img.get('src'))
+
+    for script in soup.find_all('script'):
+        src = script.get('src', '')
+        if src:
+            elements['scripts'].append(src)
+        elif script.string:
+            elements['scripts'].append(script.string[:INLINE_PREVIEW])
+
+    for style in soup.find_all('style'):
+        if style.string:
+            elements['styles'].append(style.string[:INLINE_PREVIEW])
+
+    for link in soup.find_all('a'):
+        if link.get('href', ''):
+            elements['links'].append(link.get('href'))
+
+    return PageExtract(_split_lines(soup.get_text()), elements)
+
+
+def extract_lxml(html: str) -> PageExtract:
+    """lxml（libxml2）解析后一次遍历"""
+    import lxml.html
+
+    root = lxml.html.document_fromstring(html)
+    text_parts: List[str] = []
+    elements = _empty_elements()
+
+    for node in root.iter():
+        tag = node.tag
+        if not isinstance(tag, str):
+            # 注释、处理指令：自身文本不计入，尾随文本计入
+            if node.tail:
+                text_parts.append(node.tail)
+            continue
+
+        if tag == 'img':
+            src = node.get('src')
+            if src:
+                elements['images'].append(src)
+        elif tag == 'a':
+            href = node.get('href')
+            if href:
+                elements['links'].append(href)
+        elif tag == 'script':
+            src = node.get('src')
+            if src:
+                elements['scripts'].append(src)
+            elif node.text:
+                elements['scripts'].append(node.text[:INLINE_PREVIEW])
+        elif tag == 'style':
+            if node.text:
+                elements['styles'].append(node.text[:INLINE_PREVIEW])
+
+        if node.text and tag not in NON_TEXT_TAGS:
+            text_parts.append(node.text)
+        if node.tail:
+            text_parts.append(node.tail)
+
+    return PageExtract(_split_lines(''.join(text_parts)), elements)
+
+
+def extract_selectolax(html: str) -> PageExtract:
+    """selectolax（lexbor）解析后一次遍历"""
+    from selectolax.lexbor import LexborHTMLParser
+
+    tree = LexborHTMLParser(html)
+    text_parts: List[str] = []
+    elements = _empty_elements()
+
+    for node in tree.root.traverse(include_text=True):
+        tag = node.tag
+        if tag == '-text':
+            if node.parent is not None and node.parent.tag not in NON_TEXT_TAGS:
+                text_parts.append(node.text_content)
+        elif tag == 'img':
+            src = node.attributes.get('src')
+            if src:
+                elements['images'].append(src)
+        elif tag == 'a':
+            href = node.attributes.get('href')
+            if href:
+                elements['links'].append(href)
+        elif tag == 'script':
+            src = node.attributes.get('src')
+            content = node.text(deep=True)
+            if src:
+                elements['scripts'].append(src)
+            elif content:
+                elements['scripts'].append(content[:INLINE_PREVIEW])
+        elif tag == 'style':
+            content = node.text(deep=True)
+            if content:
+                elements['styles'].append(content[:INLINE_PREVIEW])
+
+    return PageExtract(_split_lines(''.join(text_parts)), elements)
+
+
+BACKENDS: Dict[str, Callable[[str], PageExtract]] = {
+    'selectolax': extract_selectolax,
+    'lxml': extract_lxml,
+    'stdlib': extract_stdlib,
+    'bs4': extract_bs4
+}
+
+# auto 模式的优先顺序
+AUTO_ORDER = ('selectolax', 'lxml', 'stdlib')
+
+_BACKEND_MODULES = {'selectolax': 'selectolax.lexbor', 'lxml': 'lxml.html', 'bs4': 'bs4'}
+
+
+def available_backends() -> List[str]:
+    """当前环境可用的后端"""
+    import importlib.util
+
+    names = []
+    for name in BACKENDS:
+        module = _BACKEND_MODULES.get(name)
+        try:
+            if module is None or importlib.util.find_spec(module) is not None:
+                names.append(name)
+        except ModuleNotFoundError:
+            continue
+    return names
+
+
+def get_backend(name: str = 'auto') -> Callable[[str], PageExtract]:
+    """按名称获取提取函数，auto 选择最快的可用后端；指定的后端不可用时回退到 auto"""
+    available = available_backends()
+    if name != 'auto':
+        if name in available:
+            return BACKENDS[name]
+        logger.warning(f"HTML parser backend '{name}' is not available, falling back to auto")
+    for candidate in AUTO_ORDER:
+        if candidate in available:
+            return BACKENDS[candidate]
+    return extract_stdlib
@@ -0,0 +1,242 @@
+"""
+HTTP录制/回放层
+录制模式下把 requests（包括PRAW内部使用的requests会话）和 urllib 的响应保存到gzip压缩的归档文件，
+回放模式下从归档返回响应，可按录制时的真实延迟或零延迟回放，用于离线、可复现的基准测试和CI
+"""
+
+import base64
+import email.message
+import gzip
+import hashlib
+import io
+import json
+import os
+import socket
+import threading
+import time
+import urllib.error
+import urllib.request
+import urllib.response
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from utils.logger import get_logger
+
+logger = get_logger('utils.http_replay')
+
+ARCHIVE_VERSION = 1
+
+
+class ReplayMissError(ConnectionError):
+    """回放模式下归档中没有对应请求"""
+
+
+def request_key(method: str, url: str, body: Optional[bytes] = None) -> str:
+    """请求指纹：方法 + 规范化URL（查询参数排序）+ 请求体哈希"""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    normalized = urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, query, ''))
+    digest = hashlib.sha1(body).hexdigest()[:16] if body else '-'
+    return f"{method.upper()} {normalized} {digest}"
+
+
+class HttpArchive:
+    """录制结果的磁盘归档：同一请求可录制多次，回放时按顺序返回，用尽后重复最后一次"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.interactions: Dict[str, List[Dict[str, Any]]] = {}
+        self._cursors: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def load(self) -> "HttpArchive":
+        """读取归档文件"""
+        with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != ARCHIVE_VERSION:
+            raise ValueError(f"Unsupported HTTP archive version: {data.get('version')}")
+        self.interactions = data['interactions']
+        return self
+
+    def save(self):
+        """写入归档文件（先写临时文件再替换）"""
+        tmp_path = self.path + '.tmp'
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump({'version': ARCHIVE_VERSION, 'interactions': self.interactions}, f,
+                      separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+
+    def add(self, key: str, status: int, reason: str, headers: Dict[str, str],
+            body: bytes, elapsed: float):
+        """记录一次响应"""
+        with self._lock:
+            self.interactions.setdefault(key, []).append({
+                'status': status,
+                'reason': reason,
+                'headers': headers,
+                'body': base64.b64encode(body).decode('ascii'),
+                'elapsed': round(elapsed, 4)
+            })
+
+    def next(self, key: str) -> Dict[str, Any]:
+        """取出下一次回放的响应"""
+        with self._lock:
+            entries = self.interactions.get(key)
+            if not entries:
+                raise ReplayMissError(f"No recorded response for {key}")
+            cursor = self._cursors.get(key, 0)
+            self._cursors[key] = cursor + 1
+            entry = dict(entries[min(cursor, len(entries) - 1)])
+        entry['body'] = base64.b64decode(entry['body'])
+        return entry
+
+
+class HttpRecorder:
+    """
+    录制/回放上下文管理器
+    mode: 'record' 或 'replay'；latency: 'recorded'（按录制耗时sleep）、'zero' 或固定秒数
+    """
+
+    def __init__(self, path: str, mode: str = 'replay', latency: Any = 'zero'):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"Unknown HTTP recorder mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self.archive = HttpArchive(path)
+        self._originals: Dict[str, Any] = {}
+
+    def __enter__(self) -> "HttpRecorder":
+        if self.mode == 'replay':
+            self.archive.load()
+            logger.info(f"Replaying HTTP traffic from {self.path}",
+                        requests=sum(len(v) for v in self.archive.interactions.values()))
+        elif os.path.exists(self.path):
+            # 追加录制
+            self.archive.load()
+        self._install()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._uninstall()
+        if self.mode == 'record':
+            self.archive.save()
+            logger.info(f"Recorded HTTP traffic to {self.path}",
+                        requests=sum(len(v) for v in self.archive.interactions.values()))
+        return False
+
+    def _sleep(self, recorded: float):
+        if self.latency == 'recorded':
+            time.sleep(recorded)
+        elif self.latency not in ('zero', None):
+            time.sleep(float(self.latency))
+
+    # ---- 安装/卸载补丁 ----
+
+    def _install(self):
+        self._originals['urlopen'] = urllib.request.urlopen
+        urllib.request.urlopen = self._urlopen
+
+        try:
+            import requests.adapters
+        except ImportError:
+            return
+        self._originals['requests_send'] = requests.adapters.HTTPAdapter.send
+        recorder = self
+
+        def send(adapter, request, **kwargs):
+            return recorder._requests_send(adapter, request, **kwargs)
+
+        requests.adapters.HTTPAdapter.send = send
+
+    def _uninstall(self):
+        urllib.request.urlopen = self._originals.pop('urlopen', urllib.request.urlopen)
+        if 'requests_send' in self._originals:
+            import requests.adapters
+            requests.adapters.HTTPAdapter.send = self._originals.pop('requests_send')
+
+    # ---- requests（含PRAW） ----
+
+    def _requests_send(self, adapter, request, **kwargs):
+        import requests
+        from requests.structures import CaseInsensitiveDict
+        from requests.utils import get_encoding_from_headers
+
+        body = request.body.encode('utf-8') if isinstance(request.body, str) else request.body
+        key = request_key(request.method, request.url, body)
+
+        if self.mode == 'record':
+            started = time.perf_counter()
+            response = self._originals['requests_send'](adapter, request, **kwargs)
+            content = response.content
+            self.archive.add(key, response.status_code, response.reason or '',
+                             dict(response.headers), content, time.perf_counter() - started)
+            return response
+
+        entry = self.archive.next(key)
+        self._sleep(entry['elapsed'])
+
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.reason = entry['reason']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response._content = entry['body']
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.connection = adapter
+        response.elapsed = timedelta(seconds=entry['elapsed'])
+        return response
+
+    # ---- urllib ----
+
+    def _urlopen(self, url, data=None, timeout=socket._GLOBAL_DEFAULT_TIMEOUT, **kwargs):
+        if isinstance(url, urllib.request.Request):
+            method, full_url, body = url.get_method(), url.full_url, url.data
+        else:
+            method, full_url, body = ('POST' if data else 'GET'), url, data
+        body = body or data
+        key = request_key(method, full_url, body)
+
+        if self.mode == 'record':
+            started = time.perf_counter()
+            try:
+                with self._originals['urlopen'](url, data, timeout, **kwargs) as response:
+                    status, reason, headers = response.status, response.reason, dict(response.headers)
+                    content = response.read()
+            except urllib.error.HTTPError as e:
+                content = e.read()
+                self.archive.add(key, e.code, str(e.reason), dict(e.headers or {}), content,
+                                 time.perf_counter() - started)
+                raise urllib.error.HTTPError(full_url, e.code, e.reason, e.headers, io.BytesIO(content))
+            self.archive.add(key, status, reason, headers, content, time.perf_counter() - started)
+            return self._build_urllib_response(full_url, status, reason, headers, content)
+
+        entry = self.archive.next(key)
+        self._sleep(entry['elapsed'])
+        if entry['status'] >= 400:
+            raise urllib.error.HTTPError(full_url, entry['status'], entry['reason'],
+                                         self._headers(entry['headers']), io.BytesIO(entry['body']))
+        return self._build_urllib_response(full_url, entry['status'], entry['reason'],
+                                           entry['headers'], entry['body'])
+
+    @staticmethod
+    def _headers(headers: Dict[str, str]) -> email.message.Message:
+        message = email.message.Message()
+        for name, value in headers.items():
+            message[name] = value
+        return message
+
+    def _build_urllib_response(self, url: str, status: int, reason: str,
+                               headers: Dict[str, str], body: bytes):
+        response = urllib.response.addinfourl(io.BytesIO(body), self._headers(headers), url, status)
+        response.reason = reason
+        return response
+
+
+def parse_latency(value: str) -> Any:
+    """解析 --replay-latency 参数"""
+    if value in ('recorded', 'zero'):
+        return value
+    return float(value)
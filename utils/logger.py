@@ -1,47 +1,188 @@
+import atexit
+import json
 import logging
+import logging.handlers
+import queue
 import sys
+import threading
 from datetime import datetime
-from typing import Any
+from typing import Any, Dict, Optional, TextIO
 
+from utils.metrics import metrics
 
-class Logger:
-    """日志工具类"""
-    
-    def __init__(self, name: str = 'monitor_page', level: int = logging.INFO):
-        self.logger = logging.getLogger(name)
-        self.logger.setLevel(level)
-        
-        # 避免重复添加handler
-        if not self.logger.handlers:
-            # 控制台handler
-            console_handler = logging.StreamHandler(sys.stdout)
-            console_handler.setLevel(level)
-            
-            # 格式化
-            formatter = logging.Formatter(
+
+ROOT_LOGGER_NAME = 'monitor_page'
+
+
+class JsonFormatter(logging.Formatter):
+    """每条日志输出一行JSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            'time': datetime.fromtimestamp(record.created).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3],
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        payload.update(getattr(record, 'fields', {}))
+        if record.exc_info:
+            payload['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """文本格式，附加字段以 key=value 形式追加在消息后"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = super().format(record)
+        fields = getattr(record, 'fields', None)
+        if fields:
+            message += ' ' + ' '.join(f'{k}={v}' for k, v in fields.items())
+        return message
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """队列满时直接丢弃日志，保证调用方永不阻塞"""
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            metrics.counter('log_records_dropped_total', 'Log records dropped because the log queue was full').inc()
+
+
+class LogPipeline:
+    """后台写日志线程：所有logger只把记录放入队列，由QueueListener统一写终端/文件"""
+
+    _lock = threading.Lock()
+    _listener: Optional[logging.handlers.QueueListener] = None
+    _configured = False
+    _init_lock = threading.Lock()
+
+    @classmethod
+    def configure(cls, level: str = 'INFO', fmt: str = 'text', file: Optional[str] = None,
+                  levels: Optional[Dict[str, str]] = None, queue_size: int = 10000,
+                  stream: Optional[TextIO] = None):
+        """（重新）配置日志管道，可重复调用；stream 为终端输出流，默认标准输出"""
+        with cls._lock:
+            cls._stop_listener()
+
+            formatter = JsonFormatter() if fmt == 'json' else TextFormatter(
                 '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
                 datefmt='%Y-%m-%d %H:%M:%S'
             )
+
+            handlers = []
+            console_handler = logging.StreamHandler(stream or sys.stdout)
             console_handler.setFormatter(formatter)
-            
-            self.logger.addHandler(console_handler)
-    
-    def info(self, message: str):
+            handlers.append(console_handler)
+
+            if file:
+                file_handler = logging.FileHandler(file, encoding='utf-8')
+                file_handler.setFormatter(formatter)
+                handlers.append(file_handler)
+
+            log_queue = queue.Queue(maxsize=queue_size)
+            root = logging.getLogger(ROOT_LOGGER_NAME)
+            root.handlers = [DroppingQueueHandler(log_queue)]
+            root.setLevel(_parse_level(level))
+            root.propagate = False
+
+            # 按模块设置级别，如 {"services.web_monitor": "DEBUG"}
+            for name, module_level in (levels or {}).items():
+                logging.getLogger(_qualify(name)).setLevel(_parse_level(module_level))
+
+            cls._listener = logging.handlers.QueueListener(
+                log_queue, *handlers, respect_handler_level=False
+            )
+            cls._listener.start()
+            cls._configured = True
+
+    @classmethod
+    def ensure_configured(cls):
+        """首次使用时按配置文件初始化"""
+        if cls._configured:
+            return
+        # 首次写日志可能发生在多个线程中，只初始化一次
+        with cls._init_lock:
+            if not cls._configured:
+                cls.configure_from_config()
+
+    @classmethod
+    def configure_from_config(cls, stream: Optional[TextIO] = None):
+        """按配置文件（重新）配置，stream 用于把终端日志改写到其他流（如标准输出用于数据时改到stderr）"""
+        from config.config import config
+        settings = config.get_logging_config()
+        cls.configure(settings['level'], settings['format'], settings['file'], settings['levels'], stream=stream)
+
+    @classmethod
+    def _stop_listener(cls):
+        if cls._listener is not None:
+            cls._listener.stop()
+            for handler in cls._listener.handlers:
+                handler.close()
+            cls._listener = None
+
+
+def _parse_level(level: Any) -> int:
+    if isinstance(level, int):
+        return level
+    value = logging.getLevelName(str(level).upper())
+    return value if isinstance(value, int) else logging.INFO
+
+
+def _qualify(name: str) -> str:
+    if name == ROOT_LOGGER_NAME or name.startswith(ROOT_LOGGER_NAME + '.'):
+        return name
+    return f'{ROOT_LOGGER_NAME}.{name}'
+
+
+class Logger:
+    """日志工具类"""
+
+    def __init__(self, name: str = ROOT_LOGGER_NAME, level: Optional[int] = None):
+        # 日志管道（以及它依赖的配置模块）在第一次写日志时才初始化，导入本模块保持轻量
+        self.logger = logging.getLogger(_qualify(name))
+        if level is not None:
+            self.logger.setLevel(level)
+
+    def _log(self, level: int, message: str, exc_info: bool = False, **fields):
+        if not LogPipeline._configured:
+            LogPipeline.ensure_configured()
+        if self.logger.isEnabledFor(level):
+            self.logger.log(level, message, exc_info=exc_info, extra={'fields': fields})
+
+    def info(self, message: str, **fields):
         """记录信息"""
-        self.logger.info(message)
-    
-    def warning(self, message: str):
+        self._log(logging.INFO, message, **fields)
+
+    def warning(self, message: str, **fields):
         """记录警告"""
-        self.logger.warning(message)
-    
-    def error(self, message: str, exc_info: bool = False):
+        self._log(logging.WARNING, message, **fields)
+
+    def error(self, message: str, exc_info: bool = False, **fields):
         """记录错误"""
-        self.logger.error(message, exc_info=exc_info)
-    
-    def debug(self, message: str):
+        self._log(logging.ERROR, message, exc_info=exc_info, **fields)
+
+    def debug(self, message: str, **fields):
         """记录调试信息"""
-        self.logger.debug(message)
+        self._log(logging.DEBUG, message, **fields)
+
+
+def get_logger(name: str) -> Logger:
+    """获取模块级日志实例，如 get_logger('services.web_monitor')"""
+    return Logger(name)
+
+
+def shutdown():
+    """停止后台写线程并写出剩余日志"""
+    with LogPipeline._lock:
+        LogPipeline._stop_listener()
+        LogPipeline._configured = False
+
+
+atexit.register(shutdown)
 
 
 # 全局日志实例
-logger = Logger()
\ No newline at end of file
+logger = Logger()
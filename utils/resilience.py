@@ -0,0 +1,89 @@
+"""
+外部调用的容错工具：截止时间预算、带退避的有限重试、熔断器
+"""
+
+from typing import Any, Callable, Dict, Tuple
+import random
+import time
+
+
+class Deadline:
+    """一次运行的截止时间预算（单调时钟）"""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+
+class CircuitBreaker:
+    """
+    熔断器：连续失败 failure_threshold 次后打开，cooldown 秒内直接跳过调用；
+    冷却结束后进入半开状态放行一次试探调用，成功则关闭，失败则重新打开
+    时间使用墙钟（time.time），状态可以持久化后在下一个进程中恢复
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 3, cooldown: float = 900, state: str = CLOSED,
+                 failures: int = 0, opened_until: float = 0.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self.state = state
+        self.failures = failures
+        self.opened_until = opened_until
+
+    def allow(self, now: float = None) -> bool:
+        """是否允许调用，冷却结束时转为半开"""
+        if self.state != self.OPEN:
+            return True
+        if (now or time.time()) < self.opened_until:
+            return False
+        self.state = self.HALF_OPEN
+        return True
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_until = 0.0
+
+    def record_failure(self, now: float = None):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_until = (now or time.time()) + self.cooldown
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'state': self.state, 'failures': self.failures, 'opened_until': self.opened_until}
+
+
+def call_with_retries(fn: Callable[[], Any], retries: int = 2, backoff: float = 1.0,
+                      deadline: Deadline = None) -> Tuple[Any, int]:
+    """
+    调用 fn，失败后按指数退避（带抖动）最多重试 retries 次，返回 (结果, 尝试次数)
+    剩余预算不足以等待下一次退避时不再重试，直接抛出最后一次的异常
+    """
+    attempt = 0
+    delay = backoff
+    while True:
+        attempt += 1
+        try:
+            return fn(), attempt
+        except Exception as e:
+            # 尝试次数记在异常上，调用方可以统计
+            e.attempts = attempt
+            if attempt > retries:
+                raise
+            wait = delay * random.uniform(0.5, 1.5)
+            if deadline is not None and deadline.remaining() <= wait:
+                raise
+            time.sleep(wait)
+            delay *= 2
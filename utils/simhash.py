@@ -0,0 +1,124 @@
+"""
+SimHash 指纹
+对页面的规范化文本（小写单词 + 图片/脚本/链接地址）按单词3-gram计算64位SimHash，
+两个版本指纹的汉明距离近似反映内容变化的比例
+"""
+
+from collections import Counter
+from hashlib import blake2b
+from typing import Dict, Iterable, List, Optional, Tuple
+import re
+
+FINGERPRINT_BITS = 64
+SHINGLE_SIZE = 3
+
+COMMENT_PATTERN = re.compile(r'<!--.*?-->', re.S)
+ATTRIBUTE_PATTERN = re.compile(r'\b(?:src|href)\s*=\s*["\']?([^"\'\s>]+)', re.I)
+TAG_PATTERN = re.compile(r'<[^>]*>')
+WORD_PATTERN = re.compile(r'\w+')
+
+# 每个字节值中各比特位是否为1，用于由字节直方图还原逐位计数
+_BYTE_BITS = [[(value >> bit) & 1 for bit in range(8)] for value in range(256)]
+
+
+def normalize_tokens(html: str) -> List[str]:
+    """把HTML规范化为单词序列：忽略标签、注释、空白和大小写，保留src/href地址"""
+    html = COMMENT_PATTERN.sub(' ', html)
+    addresses = ATTRIBUTE_PATTERN.findall(html)
+    words = WORD_PATTERN.findall(TAG_PATTERN.sub(' ', html).lower())
+    return words + addresses
+
+
+def simhash(tokens: List[str]) -> int:
+    """计算64位SimHash"""
+    if len(tokens) >= SHINGLE_SIZE:
+        features = [' '.join(shingle) for shingle in zip(*(tokens[i:] for i in range(SHINGLE_SIZE)))]
+    else:
+        features = [' '.join(tokens)] if tokens else []
+    if not features:
+        return 0
+
+    # 所有特征哈希拼接后按字节位置切片统计直方图，避免逐特征逐比特的Python循环
+    digests = b''.join(blake2b(f.encode('utf-8'), digest_size=8).digest() for f in features)
+    threshold = len(features) / 2
+
+    fingerprint = 0
+    for byte_index in range(8):
+        histogram = Counter(digests[byte_index::8])
+        bit_counts = [0] * 8
+        for value, count in histogram.items():
+            for bit, is_set in enumerate(_BYTE_BITS[value]):
+                if is_set:
+                    bit_counts[bit] += count
+        for bit, count in enumerate(bit_counts):
+            if count > threshold:
+                fingerprint |= 1 << (byte_index * 8 + bit)
+    return fingerprint
+
+
+def fingerprint_html(html: str) -> str:
+    """页面指纹（16位十六进制字符串）"""
+    return format(simhash(normalize_tokens(html)), '016x')
+
+
+def hamming_distance(a: str, b: str) -> int:
+    """两个十六进制指纹的汉明距离"""
+    return bin(int(a, 16) ^ int(b, 16)).count('1')
+
+
+# 变更分类的默认汉明距离阈值（monitor_defaults.simhash_trivial / simhash_major）
+TRIVIAL_DISTANCE = 3
+MAJOR_DISTANCE = 16
+
+
+def classify_change(distance: Optional[int], trivial: int = TRIVIAL_DISTANCE, major: int = MAJOR_DISTANCE) -> str:
+    """按汉明距离分类变更：trivial、minor、major；没有旧指纹时为 unknown"""
+    if distance is None:
+        return 'unknown'
+    if distance <= trivial:
+        return 'trivial'
+    if distance <= major:
+        return 'minor'
+    return 'major'
+
+
+class SimHashIndex:
+    """
+    近似重复查找
+    把64位指纹切成 max_distance+1 段，汉明距离不超过 max_distance 的两个指纹至少有一段完全相同（抽屉原理），
+    只需比较落在同一桶里的候选
+    """
+
+    def __init__(self, max_distance: int = 3):
+        self.max_distance = max_distance
+        self.bands = max_distance + 1
+        self._buckets: Dict[Tuple[int, int], List[str]] = {}
+        self._fingerprints: Dict[str, str] = {}
+
+    def _band_keys(self, fingerprint: str) -> Iterable[Tuple[int, int]]:
+        value = int(fingerprint, 16)
+        width = FINGERPRINT_BITS // self.bands
+        for band in range(self.bands):
+            # 最后一段包含剩余的比特
+            bits = FINGERPRINT_BITS - width * band if band == self.bands - 1 else width
+            yield band, (value >> (band * width)) & ((1 << bits) - 1)
+
+    def add(self, key: str, fingerprint: str):
+        """加入一个指纹"""
+        self._fingerprints[key] = fingerprint
+        for band_key in self._band_keys(fingerprint):
+            self._buckets.setdefault(band_key, []).append(key)
+
+    def near_duplicates(self) -> List[Tuple[str, str, int]]:
+        """返回全部近似重复对 (key_a, key_b, 距离)"""
+        pairs = {}
+        for keys in self._buckets.values():
+            for i, a in enumerate(keys):
+                for b in keys[i + 1:]:
+                    pair = (a, b) if a < b else (b, a)
+                    if pair in pairs:
+                        continue
+                    distance = hamming_distance(self._fingerprints[a], self._fingerprints[b])
+                    if distance <= self.max_distance:
+                        pairs[pair] = distance
+        return sorted((a, b, d) for (a, b), d in pairs.items())
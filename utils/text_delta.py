@@ -0,0 +1,106 @@
+"""
+文本增量编码
+页面按标签边界和换行切分为片段，增量记录由基准版本还原目标版本所需的
+"复制基准片段区间" 与 "插入字面文本" 两种操作，压缩后存储
+"""
+
+from difflib import SequenceMatcher
+from typing import Iterator, List, Optional, Tuple
+import json
+import re
+import zlib
+
+# 在每个 '>' 和换行之后切分，压缩（单行）HTML也能得到细粒度片段
+TOKEN_PATTERN = re.compile(r'[^>\n]*(?:>|\n)|[^>\n]+$')
+
+
+def tokenize(text: str) -> List[str]:
+    """切分为片段，''.join(tokenize(text)) == text"""
+    return TOKEN_PATTERN.findall(text)
+
+
+# 中间不同部分超过这么多片段时改为按行匹配，大页面的SequenceMatcher开销近似平方级
+LINE_DIFF_THRESHOLD = 5000
+
+
+def make_delta(base: str, target: str) -> bytes:
+    """生成由base还原target的压缩增量"""
+    base_tokens = tokenize(base)
+    target_tokens = tokenize(target)
+
+    # 公共前缀和后缀直接复制，只对中间变化的部分做序列匹配
+    limit = min(len(base_tokens), len(target_tokens))
+    prefix = 0
+    while prefix < limit and base_tokens[prefix] == target_tokens[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and base_tokens[-1 - suffix] == target_tokens[-1 - suffix]:
+        suffix += 1
+
+    ops = [[0, prefix]] if prefix else []
+    base_end = len(base_tokens) - suffix
+    target_end = len(target_tokens) - suffix
+    for i1, i2, text in _diff(base_tokens, prefix, base_end, target_tokens, prefix, target_end):
+        ops.append([i1, i2] if text is None else text)
+    if suffix:
+        ops.append([base_end, len(base_tokens)])
+    return compress(json.dumps(ops, ensure_ascii=False, separators=(',', ':')))
+
+
+def _diff(base_tokens: List[str], base_start: int, base_end: int,
+          target_tokens: List[str], target_start: int, target_end: int
+          ) -> Iterator[Tuple[int, int, Optional[str]]]:
+    """
+    生成 (i1, i2, None)（复制base片段区间）或 (0, 0, 文本)（插入）操作
+    两边都很大时先按行分组匹配，行内的片段区间仍以片段下标表示，与 apply_delta 兼容
+    """
+    base_units = _units(base_tokens, base_start, base_end)
+    target_units = _units(target_tokens, target_start, target_end)
+    coarse = (min(base_end - base_start, target_end - target_start) > LINE_DIFF_THRESHOLD
+              and min(len(base_units), len(target_units)) >= 100)
+    if not coarse:
+        base_units = [(i, i + 1) for i in range(base_start, base_end)]
+        target_units = [(j, j + 1) for j in range(target_start, target_end)]
+
+    matcher = SequenceMatcher(None, [''.join(base_tokens[a:b]) for a, b in base_units],
+                              [''.join(target_tokens[a:b]) for a, b in target_units])
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            yield base_units[i1][0], base_units[i2 - 1][1], None
+        elif j2 > j1:
+            yield 0, 0, ''.join(target_tokens[target_units[j1][0]:target_units[j2 - 1][1]])
+
+
+def _units(tokens: List[str], start: int, end: int) -> List[Tuple[int, int]]:
+    """把 [start, end) 的片段按换行分组为 (起始下标, 结束下标) 区间"""
+    units = []
+    unit_start = start
+    for i in range(start, end):
+        if tokens[i].endswith('\n'):
+            units.append((unit_start, i + 1))
+            unit_start = i + 1
+    if unit_start < end:
+        units.append((unit_start, end))
+    return units
+
+
+def apply_delta(base: str, delta: bytes) -> str:
+    """把增量应用到base，得到目标文本"""
+    base_tokens = tokenize(base)
+    parts = []
+    for op in json.loads(decompress(delta)):
+        if isinstance(op, list):
+            parts.extend(base_tokens[op[0]:op[1]])
+        else:
+            parts.append(op)
+    return ''.join(parts)
+
+
+def compress(text: str) -> bytes:
+    """压缩文本"""
+    return zlib.compress(text.encode('utf-8'), 6)
+
+
+def decompress(data: bytes) -> str:
+    """解压文本"""
+    return zlib.decompress(data).decode('utf-8')